@@ -14,7 +14,8 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon, QPixmap, QFont
 from tools.json_formatter_tool import JSONFormatterTool
 from tools.timestamp_converter_tool import TimestampConverterTool
-from tools.redis_tool import RedisTool
+from tools.redis_tool import RedisTool, RedisConnectionThread
+from tools.redis_pool_registry import close_all_clients
 
 
 class DeveloperToolkit(QMainWindow):
@@ -183,7 +184,10 @@ class DeveloperToolkit(QMainWindow):
             if widget:
                 widget.setParent(None)
         
-        # 清空工具缓存
+        # 清空工具缓存，先释放工具持有的资源（Redis连接池保留在注册表中，切回后直接复用）
+        for tool in self.tools.values():
+            if hasattr(tool, 'cleanup'):
+                tool.cleanup()
         self.tools.clear()
         
         # 更新按钮样式
@@ -255,6 +259,9 @@ def main():
     
     window = DeveloperToolkit()
     window.show()
+    # 退出时先等待已停止的工作线程结束，再关闭所有共享的Redis连接池
+    app.aboutToQuit.connect(RedisConnectionThread.wait_retired)
+    app.aboutToQuit.connect(close_all_clients)
     sys.exit(app.exec_())
 
 
@@ -0,0 +1,918 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis异步后端
+基于redis.asyncio，在独立的事件循环线程中并发执行扫描、元数据和取值请求
+"""
+
+import asyncio
+import functools
+import time
+
+try:
+    import redis.asyncio as aioredis
+    from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster, ClusterNode as AsyncClusterNode
+    ASYNC_AVAILABLE = True
+except ImportError:
+    # redis-py 4.3以下没有asyncio集群客户端
+    aioredis = None
+    AsyncRedisCluster = None
+    AsyncClusterNode = None
+    ASYNC_AVAILABLE = False
+
+from .redis_tool import RedisConnectionThread
+from .redis_cluster_topology import get_topology_service
+from .redis_metrics import INFO_SECTIONS, merge_info_sections
+from .redis_slowlog import parse_slowlog_entries, to_text
+from .redis_hotkeys import HotKeyProfile
+from .redis_decoders import DecodeSession
+from .redis_value_cache import (CACHED_TYPES, CacheCursor, VALUE_DIGEST_SCRIPT, DIGEST_DEBUG, DIGEST_LUA,
+                                DIGEST_OFF, parse_digest_reply, lua_digest_allowed)
+from .redis_scripts import (KEY_INFO_SCRIPT, METADATA_FIELDS, MEMORY_FIELDS, ScriptUnavailable,
+                            slot_groups, queue_key_info, parse_key_info)
+from .redis_keyspace_watch import missing_notify_flags, parse_notify_config
+from .redis_streams import (StreamTail, PENDING_PAGE_SIZE, TAIL_READ_COUNT, merge_stream_groups,
+                            next_stream_cursor, stream_page_range)
+from .redis_compare import iter_value_chunks_async
+
+
+class AsyncRedisConnectionThread(RedisConnectionThread):
+    """异步Redis连接线程
+    
+    线程内运行asyncio事件循环，提交的协程任务并发执行，一个慢节点不会阻塞其他请求。
+    接口与RedisConnectionThread一致：submit/cancel提交和取消任务，结果通过Qt信号返回。
+    同步函数任务放到默认线程池中执行。
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = asyncio.new_event_loop()
+        self.stop_event = None
+        self.stop_requested = False
+        # 任务ID -> 正在执行的asyncio.Task
+        self.running_tasks = {}
+    
+    def run(self):
+        """线程主执行方法：在事件循环中完成连接、等待停止、清理"""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.main())
+        finally:
+            self.loop.close()
+    
+    async def main(self):
+        """事件循环主协程"""
+        self.stop_event = asyncio.Event()
+        try:
+            if await self.connect_client_async() and not self.stop_requested:
+                await self.stop_event.wait()
+        finally:
+            await self.shutdown()
+    
+    async def connect_client_async(self):
+        """建立异步Redis连接，成功返回True"""
+        try:
+            if self.cluster_mode:
+                # 以拓扑服务中已知的全部节点作为启动节点
+                topology = get_topology_service(self.host, self.port)
+                self.redis_client = AsyncRedisCluster(
+                    startup_nodes=[AsyncClusterNode(host, port) for host, port in topology.startup_nodes()],
+                    password=self.password,
+                    decode_responses=True,
+                    require_full_coverage=False,
+                    socket_connect_timeout=10,
+                    socket_timeout=10,
+                    socket_keepalive=True
+                )
+                await self.redis_client.initialize()
+                if topology.topology is None or topology.topology.is_stale():
+                    await self.refresh_topology(topology)
+            else:
+                self.redis_client = aioredis.Redis(
+                    host=self.host,
+                    port=self.port,
+                    password=self.password,
+                    db=self.db,
+                    decode_responses=True,
+                    socket_connect_timeout=10,
+                    socket_timeout=10,
+                    socket_keepalive=True,
+                    health_check_interval=30
+                )
+                await self.redis_client.ping()
+                
+                # 检查是否是集群节点（提供提示）
+                try:
+                    info = await self.redis_client.info()
+                    if info.get('redis_mode') == 'cluster':
+                        self.connection_result.emit(False, "这是集群节点，请使用集群模式连接")
+                        return False
+                except Exception:
+                    pass
+            
+            self.connection_result.emit(True, "连接成功（异步后端）")
+            return True
+        except Exception as e:
+            self.connection_result.emit(False, self.describe_connection_error(e))
+            return False
+    
+    async def refresh_topology(self, topology):
+        """通过异步客户端获取CLUSTER NODES并更新拓扑服务"""
+        try:
+            text = await self.redis_client.get_random_node().execute_command('CLUSTER', 'NODES')
+            topology.refresh(lambda: text)
+        except Exception as e:
+            print(f"刷新集群拓扑失败: {e}")
+    
+    async def shutdown(self):
+        """取消所有任务并关闭客户端"""
+        tasks = list(self.running_tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for profile in list(self.hot_key_profiles):
+            await self.close_hot_key_monitors(profile)
+        for tail in list(self.stream_tails):
+            await self.close_stream_tail(tail)
+        for watch in list(self.key_watches):
+            await self.close_key_watch(watch)
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.close()
+            except Exception as e:
+                print(f"关闭异步客户端失败: {e}")
+    
+    def close_client(self):
+        """客户端由事件循环在停止时关闭"""
+        pass
+    
+    # ---- 任务调度 ----
+    
+    def submit(self, func, *args, **kwargs):
+        """提交任务：协程函数在事件循环中并发执行，同步函数放到线程池执行"""
+        task_id = next(self.task_ids)
+        if asyncio.iscoroutinefunction(func):
+            coro = func(*args, **kwargs)
+        else:
+            coro = self.run_blocking(functools.partial(func, *args, **kwargs))
+        asyncio.run_coroutine_threadsafe(self.run_task(task_id, coro), self.loop)
+        return task_id
+    
+    async def run_blocking(self, call):
+        """在线程池中执行同步函数"""
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+    
+    async def run_task(self, task_id, coro):
+        """执行单个任务并发出结果信号"""
+        if task_id in self.cancelled_tasks:
+            coro.close()
+            self.cancelled_tasks.discard(task_id)
+            return
+        
+        self.running_tasks[task_id] = asyncio.current_task()
+        try:
+            result = await coro
+            if task_id not in self.cancelled_tasks:
+                self.task_finished.emit(task_id, result)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            if task_id not in self.cancelled_tasks:
+                self.task_failed.emit(task_id, str(e))
+        finally:
+            self.running_tasks.pop(task_id, None)
+            self.cancelled_tasks.discard(task_id)
+    
+    def cancel(self, task_id):
+        """取消任务：正在等待网络响应的协程会被立即中断"""
+        if task_id is None:
+            return
+        super().cancel(task_id)
+        try:
+            self.loop.call_soon_threadsafe(self.cancel_running_task, task_id)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+    
+    def request_stop(self):
+        """在事件循环线程中通知主协程退出"""
+        if self.stop_event is not None:
+            self.stop_event.set()
+    
+    def cancel_running_task(self, task_id):
+        """在事件循环线程中取消任务"""
+        task = self.running_tasks.get(task_id)
+        if task is not None:
+            task.cancel()
+    
+    def is_cancelled(self, task_id=None):
+        """异步任务通过asyncio取消，不依赖当前任务ID"""
+        return task_id is not None and task_id in self.cancelled_tasks
+    
+    def stop_worker(self):
+        """停止事件循环，运行中的任务在退出前被取消"""
+        self.cancel_scan()
+        self.stop_requested = True
+        try:
+            self.loop.call_soon_threadsafe(self.request_stop)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+    
+    # ---- 扫描 ----
+    
+    async def browse_keys(self, pattern="*", max_keys=1000, use_cache=True, scan_filter=None):
+        """任务：开始新的扫描并加载第一页"""
+        self.start_scan(pattern, use_cache=use_cache, scan_filter=scan_filter)
+        return await self.scan_pages(max_keys)
+    
+    async def refresh_keys(self, pattern="*", max_keys=1000, scan_filter=None):
+        """任务：清空key缓存后重新扫描"""
+        if self.key_cache is not None:
+            self.key_cache.clear()
+        return await self.browse_keys(pattern, max_keys, False, scan_filter)
+    
+    async def scan_pages(self, max_keys):
+        """任务：所有节点同时扫描，直到追加max_keys个key或游标结束"""
+        if self.cached_pages is not None:
+            loaded = 0
+            while loaded < max_keys and self.has_more_keys():
+                key_data, skipped = await self.filter_key_data_async(self.next_cached_page())
+                self.emit_cached_page(key_data, skipped)
+                loaded += len(key_data)
+            return loaded
+        
+        loaded = 0
+        limit = asyncio.Semaphore(self.MAX_SCAN_WORKERS)
+        
+        async def scan_node(node_name):
+            nonlocal loaded
+            while loaded < max_keys and not self.scan_cancelled:
+                cursor = self.scan_cursors.get(node_name)
+                if cursor is None:
+                    return
+                async with limit:
+                    page = await self.scan_node_page_async(node_name, cursor)
+                if self.scan_cancelled:
+                    return
+                self.apply_scan_page(node_name, page)
+                loaded += len(page['key_data'])
+        
+        await asyncio.gather(*(scan_node(node_name) for node_name in list(self.scan_cursors)))
+        return loaded
+    
+    async def scan_node_page_async(self, node_name, cursor):
+        """扫描单个节点的一页并获取元数据，返回与scan_node_page相同的结果，由apply_scan_page记录"""
+        key_type = self.server_scan_type()
+        page = {'server_filtered': False, 'type_unsupported': False}
+        try:
+            cursor, keys = await self.scan_node_keys(node_name, cursor, self.pattern, self.scan_count, key_type)
+        except aioredis.ResponseError:
+            if key_type is None:
+                raise
+            print("服务端不支持SCAN TYPE，改为在客户端按类型过滤")
+            page['type_unsupported'] = True
+            cursor, keys = await self.scan_node_keys(node_name, cursor, self.pattern, self.scan_count)
+        else:
+            page['server_filtered'] = key_type is not None
+        key_data = await self.fetch_key_metadata_async(keys, self.metadata_fields()) if keys else {}
+        self.cache_scan_page(key_data)
+        page['cursor'] = cursor
+        page['key_data'], page['skipped'] = await self.filter_key_data_async(key_data)
+        return page
+    
+    async def scan_node_keys(self, node_name, cursor, pattern, count=None, key_type=None):
+        """在单个节点上执行一次SCAN，返回(新游标, key列表)，key_type用于SCAN TYPE"""
+        count = count or self.DEFAULT_SCAN_COUNT
+        if node_name is None:
+            cursor, keys = await self.redis_client.scan(cursor=cursor, match=pattern, count=count,
+                                                        _type=key_type)
+        else:
+            node = self.redis_client.get_node(node_name=node_name)
+            args = ('TYPE', key_type) if key_type else ()
+            cursor, keys = await node.execute_command(
+                'SCAN', cursor, 'MATCH', pattern, 'COUNT', count, *args)
+        return int(cursor), keys
+    
+    async def filter_key_data_async(self, key_data):
+        """按过滤条件筛选一页key，最小大小用并发的pipeline探测，返回(保留的key数据, 跳过的数量)"""
+        scan_filter = self.scan_filter
+        if scan_filter is None or not key_data:
+            return key_data, 0
+        matched = {key: info for key, info in key_data.items() if scan_filter.matches(info)}
+        if matched and scan_filter.needs_size():
+            # 批量脚本已返回大小的直接判断，其余用pipeline探测
+            sized = {key: info for key, info in matched.items()
+                     if info.get('size') is not None and info['size'] >= scan_filter.min_size}
+            keys = [key for key, info in matched.items()
+                    if 'size' not in info and info['type'] in self.SIZE_COMMANDS]
+            
+            async def probe(batch):
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key in batch:
+                    getattr(pipe, self.SIZE_COMMANDS[matched[key]['type']])(key)
+                try:
+                    replies = await pipe.execute(raise_on_error=False)
+                except Exception as e:
+                    print(f"批量探测key大小失败: {e}")
+                    return
+                for key, size in zip(batch, replies):
+                    if not isinstance(size, Exception) and size >= scan_filter.min_size:
+                        sized[key] = matched[key]
+            
+            await asyncio.gather(*(probe(batch) for batch in self.iter_key_batches(keys)))
+            matched = sized
+        return matched, len(key_data) - len(matched)
+    
+    async def fetch_key_metadata_async(self, keys, fields=METADATA_FIELDS):
+        """并发获取各批次的元数据，优先用批量脚本，不可用时用pipeline"""
+        key_data = {}
+        
+        async def fetch(batch):
+            if await self.fetch_key_info_async(batch, fields, key_data):
+                return
+            pipe = self.redis_client.pipeline(transaction=False)
+            self.queue_metadata_commands(pipe, batch)
+            try:
+                replies = await pipe.execute(raise_on_error=False)
+            except Exception as e:
+                print(f"批量获取key信息失败: {e}")
+                return
+            self.parse_metadata_replies(batch, replies, key_data)
+        
+        await asyncio.gather(*(fetch(batch) for batch in self.iter_key_batches(keys)))
+        return key_data
+    
+    async def fetch_key_info_async(self, batch, fields, key_data):
+        """用批量脚本获取一批key的信息，脚本不可用时返回False；集群客户端按槽位路由各分组"""
+        if not self.batch_scripts_enabled:
+            return False
+        keyslot = self.redis_client.keyslot if self.cluster_mode else None
+        try:
+            missing = await self.execute_key_info_async(slot_groups(batch, keyslot), fields, key_data)
+            if missing:
+                await self.redis_client.script_load(KEY_INFO_SCRIPT)
+                await self.execute_key_info_async(missing, fields, key_data)
+        except (ScriptUnavailable, aioredis.ResponseError) as e:
+            print(f"批量脚本不可用，改用pipeline: {e}")
+            self.batch_scripts_enabled = False
+            return False
+        except Exception as e:
+            print(f"批量获取key信息失败: {e}")
+        return True
+    
+    async def execute_key_info_async(self, groups, fields, key_data):
+        """发送一个批量脚本pipeline，返回需要重发的分组"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        queue_key_info(pipe, groups, fields)
+        replies = await pipe.execute(raise_on_error=False)
+        return parse_key_info(groups, replies, fields, key_data)
+    
+    # ---- 取值 ----
+    
+    async def get_value_size(self, key, key_type):
+        """探测值的大小：元素个数，字符串为字节数"""
+        if key_type not in self.SIZE_COMMANDS:
+            raise ValueError(f"不支持的数据类型: {key_type}")
+        return await getattr(self.redis_client, self.SIZE_COMMANDS[key_type])(key)
+    
+    async def get_value_page(self, key, key_type, cursor=0, count=None, reverse=False, session=None):
+        """任务：读取下一页，与值缓存的末尾衔接时一并追加到缓存；缓存游标直接返回缓存中的下一页"""
+        if isinstance(cursor, CacheCursor):
+            return self.value_cache.page(cursor.entry, cursor.index)
+        page = await self.read_value_page(key, key_type, cursor, count, reverse, session)
+        if cursor:
+            self.value_cache.extend(key, key_type, self.value_cache_params(reverse, session), cursor, page)
+        return page
+    
+    async def read_value_page(self, key, key_type, cursor=0, count=None, reverse=False, session=None):
+        """分页读取值，返回格式与同步后端一致"""
+        count = count or self.VALUE_PAGE_SIZE
+        if key_type == 'string':
+            session = session or DecodeSession()
+            data = None
+            if not session.has_backlog():
+                end = cursor + self.STRING_CHUNK_SIZE - 1
+                data = await self.redis_client.execute_command(
+                    'GETRANGE', key, cursor, end, NEVER_DECODE=True)
+            return self.decode_string_chunk(key, data, cursor, session)
+        elif key_type == 'list':
+            items = await self.redis_client.execute_command(
+                'LRANGE', key, cursor, cursor + count - 1, NEVER_DECODE=True)
+            next_cursor = cursor + len(items) if len(items) == count else 0
+        elif key_type in self.VALUE_SCAN_COMMANDS:
+            next_cursor, items = await self.redis_client.execute_command(
+                self.VALUE_SCAN_COMMANDS[key_type], key, cursor, 'COUNT', count, NEVER_DECODE=True)
+        elif key_type == 'stream':
+            start, end = stream_page_range(cursor, reverse)
+            if reverse:
+                items = await self.redis_client.xrevrange(key, start, end, count=count)
+            else:
+                items = await self.redis_client.xrange(key, start, end, count=count)
+            return {'items': items, 'cursor': next_stream_cursor(items, count, reverse)}
+        else:
+            raise ValueError(f"不支持的数据类型: {key_type}")
+        return {'items': self.decode_value_items(key_type, items), 'cursor': next_cursor}
+    
+    async def get_value(self, key, key_type, reverse=False, session=None):
+        """获取值：大小探测、第一页和Stream消费组信息同时发出
+        
+        可缓存的类型先探测大小和摘要，摘要必须在读取之前取得，因此不与读取并发
+        """
+        if not self.redis_client:
+            raise ConnectionError("未连接到Redis")
+        
+        if key_type in CACHED_TYPES:
+            return await self.get_cached_value(key, key_type, reverse, session)
+        requests = [self.get_value_size(key, key_type),
+                    self.read_value_page(key, key_type, 0, None, reverse, session)]
+        if key_type == 'stream':
+            requests.append(self.get_stream_groups(key))
+        size, page, *groups = await asyncio.gather(*requests)
+        page['size'] = size
+        if groups:
+            page['groups'] = groups[0]
+        return page
+    
+    async def get_cached_value(self, key, key_type, reverse, session):
+        """读取可缓存类型的第一页，摘要与缓存一致时返回缓存的第一页"""
+        params = self.value_cache_params(reverse, session)
+        entry = self.value_cache.get(key, key_type, params)
+        if entry is not None and self.value_digest_mode == DIGEST_DEBUG:
+            # DEBUG DIGEST-VALUE不受大小限制，与大小探测同时发出
+            size, digest = await asyncio.gather(self.get_value_size(key, key_type),
+                                                self.get_value_digest(key, key_type, None))
+        else:
+            size = await self.get_value_size(key, key_type)
+            digest = None
+            if entry is not None or self.value_cache.accepts(key_type, size):
+                digest = await self.get_value_digest(key, key_type, size)
+        if entry is not None and digest is not None and digest == entry['digest']:
+            return self.value_cache.page(entry)
+        
+        page = await self.read_value_page(key, key_type, 0, None, reverse, session)
+        page['size'] = size
+        if digest is not None and self.value_cache.accepts(key_type, size):
+            self.value_cache.put(key, key_type, params, digest, size, page)
+        return page
+    
+    async def get_value_digest(self, key, key_type, size):
+        """值的服务端摘要，方式与同步后端一致"""
+        if self.value_digest_mode is None:
+            self.value_digest_mode = DIGEST_LUA if self.cluster_mode else DIGEST_DEBUG
+        if self.value_digest_mode == DIGEST_DEBUG:
+            try:
+                return parse_digest_reply(await self.redis_client.execute_command('DEBUG', 'DIGEST-VALUE', key))
+            except aioredis.ResponseError as e:
+                print(f"DEBUG DIGEST-VALUE不可用，改用Lua脚本计算摘要: {e}")
+                self.value_digest_mode = DIGEST_LUA
+        if self.value_digest_mode == DIGEST_LUA:
+            if not lua_digest_allowed(key_type, size):
+                return None
+            if self.value_digest_script is None:
+                self.value_digest_script = self.redis_client.register_script(VALUE_DIGEST_SCRIPT)
+            try:
+                return parse_digest_reply(await self.value_digest_script(keys=[key]))
+            except aioredis.ResponseError as e:
+                print(f"无法用Lua脚本计算摘要，不再缓存值: {e}")
+                self.value_digest_mode = DIGEST_OFF
+        return None
+    
+    async def get_stream_groups(self, key):
+        """XINFO GROUPS及每个组的XPENDING概要"""
+        groups = await self.redis_client.xinfo_groups(key)
+        pendings = await asyncio.gather(
+            *(self.redis_client.xpending(key, group['name']) for group in groups),
+            return_exceptions=True)
+        return merge_stream_groups(groups, pendings)
+    
+    async def get_stream_pending(self, key, group, count=PENDING_PAGE_SIZE):
+        """任务：消费组最早的一批待确认消息"""
+        return await self.redis_client.xpending_range(key, group, '-', '+', count)
+    
+    # ---- 大Key分析 ----
+    
+    async def analyze_memory_page(self, analysis):
+        """任务：所有未完成的节点同时扫描一页并分析抽样到的key"""
+        limit = asyncio.Semaphore(self.MAX_SCAN_WORKERS)
+        
+        async def analyze_node(node_name, cursor):
+            async with limit:
+                cursor, keys = await self.scan_node_keys(node_name, cursor, analysis.pattern)
+                batches = self.iter_key_batches(analysis.sample(keys), group_by_node=node_name is not None)
+                await asyncio.gather(*(self.measure_keys_async(batch, analysis.report)
+                                       for batch in batches))
+            if not analysis.stopped:
+                analysis.advance(node_name, cursor, len(keys))
+        
+        await asyncio.gather(*(analyze_node(node_name, cursor)
+                               for node_name, cursor in list(analysis.cursors.items())))
+        return analysis.snapshot()
+    
+    async def measure_keys_async(self, batch, report):
+        """批量脚本一次往返；脚本不可用时两次pipeline往返，先取类型、内存和编码，再取元素个数"""
+        key_data = {}
+        if await self.fetch_key_info_async(batch, MEMORY_FIELDS, key_data):
+            self.report_key_info(key_data, report)
+            return
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        self.queue_memory_commands(pipe, batch)
+        measured = self.parse_memory_replies(batch, await pipe.execute(raise_on_error=False))
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        self.queue_size_commands(pipe, measured)
+        self.report_measured_keys(measured, await pipe.execute(raise_on_error=False), report)
+    
+    # ---- 导入导出 ----
+    
+    async def export_page(self, job):
+        """任务：每个未完成的节点导出一页key，返回进度"""
+        for node_name, cursor in list(job.cursors.items()):
+            if job.stopped:
+                break
+            cursor, keys = await self.scan_node_keys(node_name, cursor, job.pattern)
+            for batch in self.iter_key_batches(keys):
+                pipe = self.redis_client.pipeline(transaction=False)
+                job.queue_entry_commands(pipe, batch)
+                entries = job.parse_entry_replies(batch, await pipe.execute(raise_on_error=False))
+                if job.needs_values():
+                    entries = await self.export_values(job, entries)
+                job.write_entries(entries)
+            job.advance(node_name, cursor, len(keys))
+        return job.progress()
+    
+    async def export_values(self, job, entries):
+        """可读格式：先探测大小，小值用pipeline完整读取后返回，大值逐个分块读取直接写入文件"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        job.queue_size_commands(pipe, entries)
+        small, large = job.split_large(entries, await pipe.execute(raise_on_error=False))
+        
+        for entry, size in large:
+            offset = job.file_size()
+            written = False
+            try:
+                async for chunk in iter_value_chunks_async(self.redis_client, entry['key'], entry['type'], size):
+                    if chunk:
+                        job.write_chunk(entry, chunk, not written)
+                        written = True
+            except aioredis.ResponseError as e:
+                print(f"分块读取 {entry['key']} 失败: {e}")
+                job.finish_large(written, offset)
+                continue
+            job.finish_large(written)
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        job.queue_value_commands(pipe, small)
+        return job.parse_value_replies(small, await pipe.execute(raise_on_error=False))
+    
+    async def import_page(self, job):
+        """任务：从文件读取一批key写入Redis，返回进度"""
+        entries = job.read_entries()
+        for batch in self.iter_key_batches(entries, key=lambda entry: entry['key']):
+            if not job.replace:
+                pipe = self.redis_client.pipeline(transaction=False)
+                job.queue_exists_commands(pipe, batch)
+                batch = job.filter_existing(batch, await pipe.execute(raise_on_error=False))
+            pipe = self.redis_client.pipeline(transaction=False)
+            counts = job.queue_write_commands(pipe, batch)
+            job.record_replies(batch, counts, await pipe.execute(raise_on_error=False))
+        job.commit()
+        return job.progress()
+    
+    # ---- 批量操作 ----
+    
+    async def bulk_page(self, operation):
+        """任务：每个未完成的节点扫描一页，按槽位分批pipeline执行操作，返回进度"""
+        keyslot = self.redis_client.keyslot if self.cluster_mode else None
+        size = operation.batch_size(self.pipeline_batch_size)
+        for node_name, cursor in list(operation.cursors.items()):
+            if operation.stopped:
+                break
+            cursor, keys = await self.scan_node_keys(node_name, cursor, operation.pattern)
+            if not operation.dry_run:
+                for batch in operation.iter_batches(keys, size, keyslot):
+                    # 限速等待可以被任务取消立即打断
+                    await asyncio.sleep(operation.limiter.delay(sum(len(group) for group in batch)))
+                    if operation.stopped:
+                        return operation.progress()
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    operation.queue_commands(pipe, batch)
+                    done = operation.record_replies(batch, await pipe.execute(raise_on_error=False))
+                    operation.update_cache(self.key_cache, done)
+            operation.advance(node_name, cursor, len(keys))
+        return operation.progress()
+    
+    # ---- 监控指标 ----
+    
+    async def poll_metrics(self, sampler):
+        """任务：并发获取各节点INFO，记录到采样器并返回快照"""
+        if self.cluster_mode:
+            nodes = [(node.name, node) for node in self.redis_client.get_nodes()]
+        else:
+            nodes = [(f"{self.host}:{self.port}", self.redis_client)]
+        replies = await asyncio.gather(*(self.fetch_node_info_async(client) for _, client in nodes),
+                                       return_exceptions=True)
+        return sampler.record({name: reply for (name, _), reply in zip(nodes, replies)})
+    
+    async def fetch_node_info_async(self, client):
+        """获取节点所需的INFO段，集群节点逐段并发请求"""
+        if self.cluster_mode:
+            replies = await asyncio.gather(*(client.execute_command('INFO', section)
+                                             for section in INFO_SECTIONS))
+            return merge_info_sections(replies)
+        pipe = client.pipeline(transaction=False)
+        for section in INFO_SECTIONS:
+            pipe.info(section)
+        return merge_info_sections(await pipe.execute(raise_on_error=False))
+    
+    # ---- 慢查询 ----
+    
+    async def fetch_slowlog(self, collector, count):
+        """任务：并发获取各主节点的慢查询和延迟事件，合并到收集器，返回新增条目数"""
+        if self.cluster_mode:
+            nodes = [(node.name, node) for node in self.redis_client.get_primaries()]
+        else:
+            nodes = [(f"{self.host}:{self.port}", self.redis_client)]
+        replies = await asyncio.gather(*(self.fetch_node_slowlog_async(client, count)
+                                         for _, client in nodes), return_exceptions=True)
+        added = 0
+        collector.errors = {}
+        for (name, _), reply in zip(nodes, replies):
+            if isinstance(reply, Exception):
+                collector.errors[name] = str(reply)
+                continue
+            items, latest, histories = reply
+            added += collector.add_slowlog(name, items)
+            collector.set_latency(name, latest, histories)
+        return added
+    
+    async def fetch_node_slowlog_async(self, client, count):
+        """获取节点的SLOWLOG GET、LATENCY LATEST及各延迟事件的HISTORY"""
+        items = parse_slowlog_entries(await client.execute_command('SLOWLOG', 'GET', count))
+        try:
+            latest = await client.execute_command('LATENCY', 'LATEST')
+        except Exception:
+            # 未开启延迟监控或不支持LATENCY
+            latest = []
+        
+        histories = {}
+        events = [row[0] for row in latest or []]
+        results = await asyncio.gather(*(client.execute_command('LATENCY', 'HISTORY', event)
+                                         for event in events), return_exceptions=True)
+        for event, history in zip(events, results):
+            if not isinstance(history, Exception):
+                histories[to_text(event)] = history
+        return items, latest, histories
+    
+    # ---- 热Key分析 ----
+    
+    async def hot_key_page(self, profile):
+        """任务：MONITOR模式读取一段命令流，FREQ模式扫描各节点一页，返回排行快照"""
+        if profile.mode == HotKeyProfile.MODE_MONITOR:
+            await self.monitor_slice_async(profile)
+        else:
+            await self.hot_key_freq_page_async(profile)
+        if not profile.has_more():
+            await self.close_hot_key_monitors(profile)
+        return profile.snapshot()
+    
+    async def monitor_slice_async(self, profile):
+        """在各主节点上执行MONITOR，轮流读取已到达的命令直到本段时间结束"""
+        if not profile.monitors:
+            if self.cluster_mode:
+                # 集群节点没有独立的连接池，为每个主节点建立MONITOR专用客户端
+                for node in self.redis_client.get_primaries():
+                    client = aioredis.Redis(host=node.host, port=node.port, password=self.password,
+                                            decode_responses=True, socket_connect_timeout=10)
+                    profile.monitor_clients.append(client)
+                    profile.monitors[node.name] = await client.monitor().__aenter__()
+            else:
+                profile.monitors[f"{self.host}:{self.port}"] = await self.redis_client.monitor().__aenter__()
+        
+        deadline = profile.slice_deadline()
+        connections = [monitor.connection for monitor in profile.monitors.values()]
+        while time.monotonic() < deadline and not profile.stopped:
+            idle = True
+            for connection in connections:
+                for _ in range(self.MONITOR_READ_BATCH):
+                    if not await connection.can_read_destructive():
+                        break
+                    profile.record_line(await connection.read_response())
+                    idle = False
+            if idle:
+                await asyncio.sleep(0.01)
+    
+    async def close_hot_key_monitors(self, profile):
+        """任务：退出MONITOR并关闭专用客户端"""
+        monitors = list(profile.monitors.values())
+        clients = list(profile.monitor_clients)
+        profile.monitors.clear()
+        profile.monitor_clients.clear()
+        for monitor in monitors:
+            try:
+                await monitor.__aexit__(None, None, None)
+            except Exception as e:
+                print(f"关闭MONITOR失败: {e}")
+        for client in clients:
+            try:
+                await client.close()
+            except Exception:
+                pass
+        if profile in self.hot_key_profiles:
+            self.hot_key_profiles.remove(profile)
+    
+    async def hot_key_freq_page_async(self, profile):
+        """每个未完成的节点扫描一页，并发获取OBJECT FREQ"""
+        for node_name, cursor in list(profile.cursors.items()):
+            if profile.stopped:
+                break
+            if not profile.policy_checked:
+                await self.check_lfu_policy_async(node_name, profile)
+            cursor, keys = await self.scan_node_keys(node_name, cursor, profile.pattern)
+            if node_name is None:
+                for batch in self.iter_key_batches(keys, group_by_node=False):
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    for key in batch:
+                        pipe.object('freq', key)
+                    profile.record_freqs(batch, await pipe.execute(raise_on_error=False))
+            else:
+                # key都来自该节点的SCAN，直接发往该节点
+                node = self.redis_client.get_node(node_name=node_name)
+                for batch in self.iter_key_batches(keys, group_by_node=False):
+                    replies = await asyncio.gather(*(node.execute_command('OBJECT', 'FREQ', key)
+                                                     for key in batch), return_exceptions=True)
+                    profile.record_freqs(batch, replies)
+            profile.advance(node_name, cursor, len(keys))
+    
+    async def check_lfu_policy_async(self, node_name, profile):
+        """OBJECT FREQ只在LFU淘汰策略下可用，CONFIG被禁用时跳过检查"""
+        profile.policy_checked = True
+        try:
+            if node_name is None:
+                policy = (await self.redis_client.config_get('maxmemory-policy')).get('maxmemory-policy', '')
+            else:
+                node = self.redis_client.get_node(node_name=node_name)
+                reply = await node.execute_command('CONFIG', 'GET', 'maxmemory-policy')
+                policy = reply[1] if isinstance(reply, list) and len(reply) > 1 else ''
+        except Exception:
+            return
+        if 'lfu' not in policy:
+            raise Exception(f"当前淘汰策略为 {policy}，OBJECT FREQ需要LFU策略，请改用MONITOR采样")
+    
+    # ---- Stream/Pub/Sub实时跟踪 ----
+    
+    async def tail_slice(self, tail):
+        """任务：读取一段时间内到达的消息写入跟踪缓冲"""
+        if tail.mode == StreamTail.MODE_STREAM:
+            await self.read_stream_tail_async(tail)
+        else:
+            await self.read_channel_tail_async(tail)
+    
+    async def read_stream_tail_async(self, tail):
+        """XREAD BLOCK直到本段结束；集群中多个key可能不在同一槽位，逐个非阻塞读取"""
+        if not tail.last_ids:
+            for key in tail.targets:
+                last = await self.redis_client.xrevrange(key, '+', '-', count=1)
+                tail.last_ids[key] = last[0][0] if last else '0-0'
+        
+        deadline = tail.slice_deadline()
+        blocking = not self.cluster_mode or len(tail.targets) == 1
+        while not tail.stopped:
+            block = int((deadline - time.monotonic()) * 1000)
+            if block <= 0:
+                break
+            if blocking:
+                tail.push_stream_replies(await self.redis_client.xread(
+                    dict(tail.last_ids), count=TAIL_READ_COUNT, block=block))
+                continue
+            replies = await asyncio.gather(
+                *(self.redis_client.xread({key: last_id}, count=TAIL_READ_COUNT)
+                  for key, last_id in list(tail.last_ids.items())))
+            for reply in replies:
+                tail.push_stream_replies(reply)
+            if not any(replies):
+                await asyncio.sleep(0.01)
+    
+    async def read_channel_tail_async(self, tail):
+        """SUBSCRIBE/PSUBSCRIBE后读取消息直到本段结束"""
+        if tail.pubsub is None:
+            if self.cluster_mode:
+                # 异步集群客户端不支持订阅，普通频道的消息会广播到所有节点，连接任一主节点即可
+                node = self.redis_client.get_primaries()[0]
+                tail.pubsub_client = aioredis.Redis(host=node.host, port=node.port, password=self.password,
+                                                    decode_responses=True, socket_connect_timeout=10)
+                tail.pubsub = tail.pubsub_client.pubsub(ignore_subscribe_messages=True)
+            else:
+                tail.pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            channels, patterns = tail.channels()
+            if channels:
+                await tail.pubsub.subscribe(*channels)
+            if patterns:
+                await tail.pubsub.psubscribe(*patterns)
+        
+        deadline = tail.slice_deadline()
+        while not tail.stopped:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            tail.push_message(await tail.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=min(remaining, 0.1)))
+    
+    async def close_stream_tail(self, tail):
+        """任务：取消订阅并关闭专用客户端"""
+        pubsub, client = tail.pubsub, tail.pubsub_client
+        tail.pubsub = tail.pubsub_client = None
+        if pubsub is not None:
+            try:
+                await pubsub.close()
+            except Exception as e:
+                print(f"关闭订阅失败: {e}")
+        if client is not None:
+            try:
+                await client.close()
+            except Exception:
+                pass
+        if tail in self.stream_tails:
+            self.stream_tails.remove(tail)
+    
+    # ---- keyspace通知 ----
+    
+    def primary_nodes(self):
+        """[(节点名, 可执行命令的对象)]：集群为各主节点，单机为客户端本身"""
+        if self.cluster_mode:
+            return [(node.name, node) for node in self.redis_client.get_primaries()]
+        return [(f"{self.host}:{self.port}", self.redis_client)]
+    
+    async def check_keyspace_events(self):
+        """任务：各主节点notify-keyspace-events缺少的通知类型 {节点名: (当前配置, 缺少的类型)}"""
+        nodes = self.primary_nodes()
+        replies = await asyncio.gather(*(client.execute_command('CONFIG', 'GET', 'notify-keyspace-events')
+                                         for _, client in nodes))
+        missing = {}
+        for (name, _), reply in zip(nodes, replies):
+            flags = parse_notify_config(reply)
+            if missing_notify_flags(flags):
+                missing[name] = (flags, missing_notify_flags(flags))
+        return missing
+    
+    async def enable_keyspace_events(self, missing):
+        """任务：在缺少通知类型的节点上补齐notify-keyspace-events，保留原有的类型"""
+        for name, client in self.primary_nodes():
+            if name in missing:
+                flags, lacking = missing[name]
+                await client.execute_command('CONFIG', 'SET', 'notify-keyspace-events', flags + lacking)
+    
+    async def key_watch_slice(self, watch):
+        """任务：监听一段时间的通知，合并后重新获取变化key的类型和TTL，返回本段的变更"""
+        if not watch.pubsubs:
+            if self.cluster_mode:
+                # 异步集群客户端不支持订阅，为每个主节点建立订阅专用客户端
+                for node in self.redis_client.get_primaries():
+                    client = aioredis.Redis(host=node.host, port=node.port, password=self.password,
+                                            decode_responses=True, socket_connect_timeout=10)
+                    watch.pubsub_clients.append(client)
+                    watch.pubsubs[node.name] = client.pubsub(ignore_subscribe_messages=True)
+            else:
+                watch.pubsubs[f"{self.host}:{self.port}"] = self.redis_client.pubsub(
+                    ignore_subscribe_messages=True)
+            for pubsub in watch.pubsubs.values():
+                await pubsub.psubscribe(watch.channel_pattern())
+        
+        deadline = watch.slice_deadline()
+        pubsubs = list(watch.pubsubs.values())
+        while not watch.stopped:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            messages = await asyncio.gather(*(
+                pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 0.1))
+                for pubsub in pubsubs))
+            for message in messages:
+                watch.push_message(message)
+        
+        removed, changed = watch.drain()
+        key_data = await self.fetch_key_metadata_async(changed) if changed else {}
+        changes = watch.build_changes(removed, changed, key_data)
+        self.cache_key_changes(changes)
+        return changes
+    
+    async def close_key_watch(self, watch):
+        """任务：取消订阅并关闭专用客户端"""
+        pubsubs = list(watch.pubsubs.values())
+        clients = list(watch.pubsub_clients)
+        watch.pubsubs.clear()
+        watch.pubsub_clients.clear()
+        for pubsub in pubsubs:
+            try:
+                await pubsub.close()
+            except Exception as e:
+                print(f"关闭订阅失败: {e}")
+        for client in clients:
+            try:
+                await client.close()
+            except Exception:
+                pass
+        if watch in self.key_watches:
+            self.key_watches.remove(watch)
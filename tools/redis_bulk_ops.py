@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis批量操作
+按模式扫描key，分批pipeline执行UNLINK/EXPIRE/PERSIST，支持限速、预览数量和取消
+"""
+
+import time
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QComboBox, QSpinBox, QMessageBox)
+
+
+class RateLimiter:
+    """令牌桶限速：每秒最多rate个操作，rate为0表示不限速"""
+    
+    def __init__(self, rate=0):
+        self.rate = max(0, int(rate))
+        self.allowance = self.rate
+        self.last = time.monotonic()
+    
+    def delay(self, count):
+        """申请count个操作，返回执行前需要等待的秒数"""
+        if self.rate <= 0:
+            return 0
+        now = time.monotonic()
+        self.allowance = min(self.rate, self.allowance + (now - self.last) * self.rate)
+        self.last = now
+        self.allowance -= count
+        if self.allowance >= 0:
+            return 0
+        return -self.allowance / self.rate
+
+
+class BulkKeyOperation:
+    """批量操作状态
+    
+    每个节点维护独立游标，每个工作线程任务推进一页。集群模式下同一批次的key按槽位分组，
+    UNLINK一次删除同一槽位的多个key；dry_run只统计匹配数量，不修改数据。
+    限速时任务遇到需要等待的批次就返回，未执行的批次留到下一个任务，工作线程不因等待被占用。
+    """
+    
+    ACTION_DELETE = 'delete'
+    ACTION_EXPIRE = 'expire'
+    ACTION_PERSIST = 'persist'
+    
+    ACTION_NAMES = {
+        ACTION_DELETE: "删除",
+        ACTION_EXPIRE: "设置过期时间",
+        ACTION_PERSIST: "移除过期时间",
+    }
+    
+    def __init__(self, action, pattern, cursors, ttl=0, rate=0, dry_run=False):
+        self.action = action
+        self.pattern = pattern
+        # 节点名 -> 游标（单机模式节点名为None）
+        self.cursors = cursors
+        self.ttl = ttl
+        self.limiter = RateLimiter(rate)
+        self.dry_run = dry_run
+        self.scanned = 0
+        self.affected = 0
+        self.failed = 0
+        # 上次进度快照之后删除的key，由界面从本地搜索索引中移除
+        self.removed = []
+        # 已扫描、尚未执行的批次 [(节点名, 批次)]；reserved表示第一个批次已申请过令牌
+        self.pending = []
+        self.reserved = False
+        # 下一个任务之前需要等待的秒数
+        self.wait = 0
+        self.stopped = False
+    
+    def has_more(self):
+        """是否还有未扫描完的节点或未执行的批次"""
+        return bool(self.cursors or self.pending) and not self.stopped
+    
+    def advance(self, node_name, cursor, scanned):
+        """记录一个节点的一页扫描"""
+        self.scanned += scanned
+        if cursor == 0:
+            self.cursors.pop(node_name, None)
+        else:
+            self.cursors[node_name] = cursor
+    
+    def batch_size(self, pipeline_batch_size):
+        """每个pipeline的key数量，限速较低时缩小批次使执行更平滑"""
+        if self.limiter.rate:
+            return max(1, min(pipeline_batch_size, self.limiter.rate))
+        return pipeline_batch_size
+    
+    def iter_batches(self, keys, size, keyslot=None):
+        """把一页key切分为pipeline批次，每个批次是若干同槽位key组成的列表"""
+        if keyslot is None:
+            groups = [keys]
+        else:
+            slots = {}
+            for key in keys:
+                slots.setdefault(keyslot(key), []).append(key)
+            groups = slots.values()
+        
+        batch = []
+        count = 0
+        for group in groups:
+            for start in range(0, len(group), size):
+                part = group[start:start + size]
+                if batch and count + len(part) > size:
+                    yield batch
+                    batch = []
+                    count = 0
+                batch.append(part)
+                count += len(part)
+        if batch:
+            yield batch
+    
+    def take_batch(self):
+        """取出下一个可以立即执行的批次 (节点名, 批次)，没有批次或限速需要等待时返回None"""
+        if not self.pending:
+            return None
+        if not self.reserved:
+            self.reserved = True
+            self.wait = self.limiter.delay(sum(len(group) for group in self.pending[0][1]))
+            if self.wait > 0:
+                return None
+        self.reserved = False
+        self.wait = 0
+        return self.pending.pop(0)
+    
+    def queue_commands(self, pipe, batch):
+        """向pipeline中加入一批命令"""
+        for group in batch:
+            if self.action == self.ACTION_DELETE:
+                pipe.unlink(*group)
+            elif self.action == self.ACTION_EXPIRE:
+                for key in group:
+                    pipe.expire(key, self.ttl)
+            else:
+                for key in group:
+                    pipe.persist(key)
+    
+    def record_replies(self, batch, replies):
+        """统计执行结果，返回执行成功的key"""
+        done = []
+        if self.action == self.ACTION_DELETE:
+            for group, reply in zip(batch, replies):
+                if isinstance(reply, Exception):
+                    self.failed += len(group)
+                    continue
+                self.affected += reply
+                done.extend(group)
+            self.removed.extend(done)
+            return done
+        
+        keys = [key for group in batch for key in group]
+        for key, reply in zip(keys, replies):
+            if isinstance(reply, Exception):
+                self.failed += 1
+            elif reply:
+                self.affected += 1
+                done.append(key)
+        return done
+    
+    def update_cache(self, key_cache, keys):
+        """让key元数据缓存与执行结果保持一致"""
+        if key_cache is None:
+            return
+        for key in keys:
+            if self.action == self.ACTION_DELETE:
+                key_cache.invalidate_key(key)
+            else:
+                key_cache.set_ttl(key, self.ttl if self.action == self.ACTION_EXPIRE else -1)
+    
+    def progress(self):
+        """进度快照"""
+        removed, self.removed = self.removed, []
+        return {
+            'removed': removed,
+            'scanned': self.scanned,
+            'affected': self.affected,
+            'failed': self.failed,
+            'finished': not (self.cursors or self.pending),
+            'wait': self.wait,
+        }
+
+
+class BulkOperationDialog(QDialog):
+    """批量操作对话框
+    
+    对当前搜索模式匹配的key执行批量操作，先预览匹配数量，执行前再次确认。
+    """
+    
+    def __init__(self, tool, pattern, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.pattern = pattern
+        self.operation = None
+        self.task_id = None
+        self.matched = None
+        # 限速等待结束后提交下一个任务
+        self.rate_timer = QTimer(self)
+        self.rate_timer.setSingleShot(True)
+        self.rate_timer.timeout.connect(self.submit_next_page)
+        self.setWindowTitle("批量操作")
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        
+        pattern_label = QLabel(f"匹配模式: {self.pattern}")
+        pattern_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(pattern_label)
+        
+        options_layout = QHBoxLayout()
+        self.action_combo = QComboBox()
+        for action, name in BulkKeyOperation.ACTION_NAMES.items():
+            self.action_combo.addItem(name, action)
+        self.action_combo.currentIndexChanged.connect(self.update_controls)
+        
+        self.ttl_input = QSpinBox()
+        self.ttl_input.setRange(1, 365 * 24 * 3600)
+        self.ttl_input.setValue(3600)
+        self.ttl_input.setSuffix(" 秒")
+        
+        self.rate_input = QSpinBox()
+        self.rate_input.setRange(0, 1000000)
+        self.rate_input.setValue(1000)
+        self.rate_input.setSuffix(" 个/秒")
+        self.rate_input.setSpecialValueText("不限速")
+        self.rate_input.setToolTip("每秒最多处理的key数量，保护生产环境")
+        
+        options_layout.addWidget(QLabel("操作:"))
+        options_layout.addWidget(self.action_combo)
+        options_layout.addWidget(QLabel("过期时间:"))
+        options_layout.addWidget(self.ttl_input)
+        options_layout.addWidget(QLabel("限速:"))
+        options_layout.addWidget(self.rate_input)
+        layout.addLayout(options_layout)
+        
+        self.status_label = QLabel("建议先预览匹配的key数量")
+        self.status_label.setStyleSheet("color: #6c757d;")
+        layout.addWidget(self.status_label)
+        
+        button_layout = QHBoxLayout()
+        self.preview_btn = QPushButton("🔢 预览数量")
+        self.preview_btn.clicked.connect(lambda: self.start_operation(dry_run=True))
+        self.execute_btn = QPushButton("⚠ 执行")
+        self.execute_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #dc3545;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #c82333;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.execute_btn.clicked.connect(lambda: self.start_operation(dry_run=False))
+        self.stop_btn = QPushButton("⏹ 停止")
+        self.stop_btn.clicked.connect(self.stop_operation)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(self.preview_btn)
+        button_layout.addWidget(self.execute_btn)
+        button_layout.addWidget(self.stop_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        
+        self.update_controls()
+    
+    def start_operation(self, dry_run):
+        """开始预览或执行"""
+        thread = self.tool.connection_thread
+        if not (thread and thread.redis_client):
+            self.tool.show_message("警告", "请先连接到Redis", "warning")
+            return
+        
+        action = self.action_combo.currentData()
+        if not dry_run:
+            count = f"约 {self.matched} 个" if self.matched is not None else "所有"
+            reply = QMessageBox.question(
+                self, "确认",
+                f"将对匹配 {self.pattern} 的{count}key执行「{BulkKeyOperation.ACTION_NAMES[action]}」，"
+                f"此操作不可撤销，确定继续吗？",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        
+        self.operation = thread.create_bulk_operation(
+            action, self.pattern, self.ttl_input.value(), self.rate_input.value(), dry_run)
+        self.status_label.setText("扫描中..." if dry_run else "执行中...")
+        self.submit_next_page()
+    
+    def submit_next_page(self):
+        """提交下一页任务"""
+        operation = self.operation
+        self.task_id = self.tool.submit_task(
+            self.tool.connection_thread.bulk_page, operation,
+            on_success=lambda progress: self.on_page_done(operation, progress),
+            on_error=self.on_operation_error)
+        self.update_controls()
+    
+    def on_page_done(self, operation, progress):
+        """一页完成：更新进度，未结束时继续"""
+        # 已删除的key不应再出现在本地搜索结果中
+        self.tool.key_index.remove(progress['removed'])
+        if operation is not self.operation:
+            return
+        self.task_id = None
+        self.show_progress(progress)
+        if operation.has_more() and self.tool.connection_thread:
+            if progress['wait'] > 0:
+                self.rate_timer.start(int(progress['wait'] * 1000) + 1)
+            else:
+                self.submit_next_page()
+            return
+        
+        self.update_controls()
+        if progress['finished'] and operation.dry_run:
+            self.matched = progress['scanned']
+        if not operation.dry_run and progress['affected']:
+            # 刷新key列表
+            self.tool.load_keys()
+    
+    def show_progress(self, progress):
+        """显示进度"""
+        operation = self.operation
+        if operation.dry_run:
+            text = f"匹配 {progress['scanned']} 个key"
+        else:
+            name = BulkKeyOperation.ACTION_NAMES[operation.action]
+            text = f"已扫描 {progress['scanned']} 个key，{name} {progress['affected']} 个"
+            if progress['failed']:
+                text += f"，失败 {progress['failed']} 个"
+        if progress['finished']:
+            text = "完成：" + text
+        elif operation.stopped:
+            text = "已停止：" + text
+        self.status_label.setText(text)
+    
+    def on_operation_error(self, error):
+        """任务失败"""
+        self.task_id = None
+        if self.operation is not None:
+            # 失败前已经删除的key
+            self.tool.key_index.remove(self.operation.progress()['removed'])
+        self.status_label.setText(f"操作失败: {error}")
+        self.update_controls()
+    
+    def stop_operation(self):
+        """取消正在进行的操作"""
+        if self.operation is not None:
+            self.operation.stopped = True
+        self.tool.cancel_task(self.task_id)
+        if self.task_id is not None or self.rate_timer.isActive():
+            self.rate_timer.stop()
+            self.task_id = None
+            self.status_label.setText("已停止")
+        self.update_controls()
+    
+    def update_controls(self):
+        """根据状态更新控件"""
+        running = self.task_id is not None or self.rate_timer.isActive()
+        self.preview_btn.setEnabled(not running)
+        self.execute_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.action_combo.setEnabled(not running)
+        self.ttl_input.setEnabled(not running and
+                                  self.action_combo.currentData() == BulkKeyOperation.ACTION_EXPIRE)
+        self.rate_input.setEnabled(not running)
+    
+    def closeEvent(self, event):
+        """关闭对话框时停止操作"""
+        self.stop_operation()
+        super().closeEvent(event)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis集群拓扑服务
+解析CLUSTER NODES得到完整的节点/槽位映射，按会话持久化到用户目录，
+连接时直接用已知的全部主节点作为启动节点，遇到MOVED/ASK重定向时在后台刷新
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+
+# 与~/.redis_sessions.json同目录
+TOPOLOGY_FILE_NAME = ".redis_cluster_topology.json"
+# 两次后台刷新的最小间隔（秒），避免迁移期间大量重定向触发重复刷新
+MIN_REFRESH_INTERVAL = 5
+# 连接时拓扑超过该时间则在后台刷新（秒）
+STALE_AFTER = 3600
+
+
+def parse_cluster_nodes(text):
+    """解析CLUSTER NODES的输出，返回节点列表
+    
+    每行格式: <id> <ip:port@cport[,hostname]> <flags> <master> <ping-sent> <pong-recv>
+    <config-epoch> <link-state> <slot> <slot> ...
+    """
+    nodes = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 8:
+            continue
+        
+        address = parts[1].split(',')[0].split('@')[0]
+        host, _, port = address.rpartition(':')
+        if not host or not port.isdigit():
+            continue
+        flags = parts[2].split(',')
+        
+        slots = []
+        for item in parts[8:]:
+            # [slot->-node] / [slot-<-node] 表示正在迁移的槽位，归属仍以区间为准
+            if item.startswith('['):
+                continue
+            start, _, end = item.partition('-')
+            slots.append([int(start), int(end or start)])
+        
+        nodes.append({
+            'id': parts[0],
+            'host': host,
+            'port': int(port),
+            'role': 'master' if 'master' in flags else 'replica',
+            'master_id': parts[3] if parts[3] != '-' else None,
+            'failed': 'fail' in flags or 'fail?' in flags or 'noaddr' in flags,
+            'connected': parts[7] == 'connected',
+            'slots': slots,
+        })
+    return nodes
+
+
+class ClusterTopology:
+    """集群拓扑快照：节点列表和槽位区间"""
+    
+    def __init__(self, nodes, updated_at=None):
+        self.nodes = nodes
+        self.updated_at = updated_at if updated_at is not None else time.time()
+        # 按起始槽位排序的(起始, 结束, 节点)，用于二分查找
+        self.ranges = sorted(
+            ((start, end, node) for node in nodes if node['role'] == 'master'
+             for start, end in node['slots']),
+            key=lambda entry: entry[0])
+        self.range_starts = [start for start, _, _ in self.ranges]
+    
+    @classmethod
+    def from_dict(cls, data):
+        """从持久化数据恢复"""
+        return cls(data.get('nodes', []), data.get('updated_at'))
+    
+    def to_dict(self):
+        """持久化数据"""
+        return {'nodes': self.nodes, 'updated_at': self.updated_at}
+    
+    def masters(self):
+        """健康的主节点，按槽位数量从多到少"""
+        masters = [node for node in self.nodes if node['role'] == 'master' and not node['failed']]
+        masters.sort(key=lambda node: -sum(end - start + 1 for start, end in node['slots']))
+        return masters
+    
+    def replicas_of(self, node_id):
+        """某个主节点的从节点"""
+        return [node for node in self.nodes if node['master_id'] == node_id]
+    
+    def node_for_slot(self, slot):
+        """槽位所在的主节点，未覆盖返回None"""
+        i = bisect.bisect_right(self.range_starts, slot) - 1
+        if i >= 0:
+            start, end, node = self.ranges[i]
+            if start <= slot <= end:
+                return node
+        return None
+    
+    def covered_slots(self):
+        """已分配的槽位数量"""
+        return sum(end - start + 1 for start, end, _ in self.ranges)
+    
+    def startup_nodes(self):
+        """连接用的启动节点：所有健康主节点，其后是从节点"""
+        nodes = self.masters()
+        nodes += [node for node in self.nodes if node['role'] != 'master' and not node['failed']]
+        return [(node['host'], node['port']) for node in nodes]
+    
+    def is_stale(self):
+        """拓扑是否过旧"""
+        return time.time() - self.updated_at > STALE_AFTER
+    
+    def summary(self):
+        """概要信息"""
+        return (f"{len(self.masters())} 个主节点, "
+                f"{len(self.nodes) - len(self.masters())} 个其他节点, "
+                f"覆盖 {self.covered_slots()}/16384 个槽位")
+
+
+def topology_file_path():
+    """拓扑持久化文件路径"""
+    return os.path.join(os.path.expanduser("~"), TOPOLOGY_FILE_NAME)
+
+
+_file_lock = threading.Lock()
+
+
+def load_topology(scope):
+    """读取会话的持久化拓扑，不存在返回None"""
+    path = topology_file_path()
+    try:
+        with _file_lock:
+            if not os.path.exists(path):
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        entry = data.get(scope)
+        return ClusterTopology.from_dict(entry) if entry else None
+    except Exception as e:
+        print(f"读取集群拓扑失败: {e}")
+        return None
+
+
+def save_topology(scope, topology):
+    """保存会话的拓扑，其他会话的记录保持不变"""
+    path = topology_file_path()
+    try:
+        with _file_lock:
+            data = {}
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except ValueError:
+                    data = {}
+            data[scope] = topology.to_dict()
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"保存集群拓扑失败: {e}")
+
+
+class TopologyService:
+    """单个集群会话的拓扑服务
+    
+    首次使用时从磁盘读取上次保存的拓扑；refresh执行一次CLUSTER NODES并持久化，
+    request_refresh在后台线程中刷新，同一时间最多一个刷新且有最小间隔。
+    """
+    
+    def __init__(self, host, port):
+        self.host = host
+        self.port = int(port)
+        self.scope = f"{host}:{self.port}"
+        self.topology = load_topology(self.scope)
+        self.lock = threading.Lock()
+        self.refreshing = False
+        self.last_refresh = None
+    
+    def startup_nodes(self):
+        """启动节点(host, port)列表：已知拓扑的全部节点，入口地址放在最后兜底"""
+        nodes = self.topology.startup_nodes() if self.topology else []
+        seed = (self.host, self.port)
+        if seed not in nodes:
+            nodes.append(seed)
+        return nodes
+    
+    def refresh(self, fetch):
+        """执行fetch()获取CLUSTER NODES输出，解析并持久化，返回新拓扑"""
+        nodes = parse_cluster_nodes(fetch())
+        if not nodes:
+            raise ValueError("CLUSTER NODES 没有返回节点信息")
+        topology = ClusterTopology(nodes)
+        self.topology = topology
+        save_topology(self.scope, topology)
+        return topology
+    
+    def request_refresh(self, fetch):
+        """在后台线程中刷新拓扑，刷新中或距上次刷新太近时忽略"""
+        with self.lock:
+            recent = (self.last_refresh is not None
+                      and time.monotonic() - self.last_refresh < MIN_REFRESH_INTERVAL)
+            if self.refreshing or recent:
+                return False
+            self.refreshing = True
+            self.last_refresh = time.monotonic()
+        threading.Thread(target=self._refresh_in_background, args=(fetch,),
+                         name="redis-topology-refresh", daemon=True).start()
+        return True
+    
+    def _refresh_in_background(self, fetch):
+        """后台刷新"""
+        try:
+            topology = self.refresh(fetch)
+            print(f"集群拓扑已刷新 {self.scope}: {topology.summary()}")
+        except Exception as e:
+            print(f"刷新集群拓扑失败 {self.scope}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing = False
+    
+    def watch(self, client):
+        """监听RedisCluster客户端的重定向：MOVED修正槽位或重新初始化时在后台刷新拓扑
+        
+        redis-py 5.x及以下通过update_moved_exception记录MOVED，新版本改为move_slot（ASK也会调用），
+        两者都没有时只监听重新初始化
+        """
+        nodes_manager = client.nodes_manager
+        fetch = lambda: cluster_nodes_text(client)
+        
+        for name in ('update_moved_exception', 'move_slot'):
+            moved_handler = getattr(nodes_manager, name, None)
+            if moved_handler is not None:
+                break
+        if moved_handler is not None:
+            def on_moved(exception, *args, **kwargs):
+                result = moved_handler(exception, *args, **kwargs)
+                if type(exception).__name__ != 'AskError':
+                    self.request_refresh(fetch)
+                return result
+            setattr(nodes_manager, name, on_moved)
+        
+        initialize = nodes_manager.initialize
+        
+        def on_initialize(*args, **kwargs):
+            result = initialize(*args, **kwargs)
+            self.request_refresh(fetch)
+            return result
+        
+        nodes_manager.initialize = on_initialize
+    
+    def report_redirects(self, replies, fetch):
+        """检查直接发往节点的pipeline结果，出现MOVED/ASK时在后台刷新拓扑"""
+        for reply in replies:
+            if isinstance(reply, Exception) and is_redirect(reply):
+                self.request_refresh(fetch)
+                return True
+        return False
+
+
+def is_redirect(error):
+    """是否为集群重定向错误"""
+    message = str(error)
+    return type(error).__name__ in ('MovedError', 'AskError') or message.startswith(('MOVED ', 'ASK '))
+
+
+def cluster_nodes_text(client):
+    """通过RedisCluster客户端已有的连接池获取CLUSTER NODES原始输出"""
+    node = client.get_random_node()
+    return client.get_redis_connection(node).execute_command('CLUSTER', 'NODES')
+
+
+# 进程内的拓扑服务：入口地址 -> TopologyService
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_topology_service(host, port):
+    """获取(或创建)集群会话对应的拓扑服务"""
+    scope = f"{host}:{int(port)}"
+    with _services_lock:
+        service = _services.get(scope)
+        if service is None:
+            service = TopologyService(host, port)
+            _services[scope] = service
+        return service
@@ -0,0 +1,717 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis会话对比
+打开两个已保存的会话，各用一个工作线程并行扫描；key按哈希分桶溢写到临时文件，
+扫描结束后逐桶比较key集合和值摘要，内存占用只与单个桶的大小有关。
+差异（缺失/多余/不同）逐行写入报告文件，界面只显示前面一部分
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from .redis_streams import next_stream_id
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QLineEdit, QComboBox, QProgressBar, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QAbstractItemView, QFileDialog)
+
+
+SOURCE = 'source'
+TARGET = 'target'
+SIDES = (SOURCE, TARGET)
+SIDE_LABELS = {SOURCE: "源", TARGET: "目标"}
+
+# 源有目标无 / 目标有源无 / 两边都有但类型或值不同
+DIFF_MISSING = 'missing'
+DIFF_EXTRA = 'extra'
+DIFF_CHANGED = 'changed'
+DIFF_LABELS = {DIFF_MISSING: "缺失", DIFF_EXTRA: "多余", DIFF_CHANGED: "不同"}
+
+# 分桶数量：比较时每次只把一个桶（约总key数的1/COMPARE_BUCKETS）读入内存
+COMPARE_BUCKETS = 128
+# 每个桶在内存中积攒的行数，超过后追加写入文件
+SPILL_BUFFER_LINES = 2000
+# 界面中最多显示的差异行数，完整结果见报告文件
+REPORT_VIEW_ROWS = 5000
+# 超过该大小（元素个数，字符串按字节）的值单独分块读取，边读边计算摘要
+COMPARE_LARGE_SIZE = 1000
+COMPARE_LARGE_BYTES = 1024 * 1024
+# 分块读取大值时每次读取的元素个数/字节数
+COMPARE_CHUNK_SIZE = 1000
+COMPARE_CHUNK_BYTES = 1024 * 1024
+# 一个pipeline中小值的总容量（元素个数，字符串每64字节计为一个元素）
+COMPARE_PIPELINE_BUDGET = 50000
+STRING_BYTES_PER_ITEM = 64
+
+
+def key_bucket(key, buckets=COMPARE_BUCKETS):
+    """key所在的桶，两侧用同一个哈希保证同名key落在同一个桶"""
+    return zlib.crc32(key.encode('utf-8', 'surrogateescape')) % buckets
+
+
+def queue_value_command(pipe, key, key_type):
+    """向pipeline加入读取完整值的命令，返回值不解码"""
+    if key_type == 'string':
+        pipe.execute_command('GET', key, NEVER_DECODE=True)
+    elif key_type == 'hash':
+        pipe.execute_command('HGETALL', key, NEVER_DECODE=True)
+    elif key_type == 'list':
+        pipe.execute_command('LRANGE', key, 0, -1, NEVER_DECODE=True)
+    elif key_type == 'set':
+        pipe.execute_command('SMEMBERS', key, NEVER_DECODE=True)
+    elif key_type == 'zset':
+        pipe.execute_command('ZRANGE', key, 0, -1, 'WITHSCORES', NEVER_DECODE=True)
+    elif key_type == 'stream':
+        pipe.execute_command('XRANGE', key, '-', '+', NEVER_DECODE=True)
+    else:
+        # 模块类型等无法通用读取，只比较类型
+        pipe.type(key)
+
+
+def is_large_value(key_type, size):
+    """该值是否需要单独分块读取"""
+    return size > (COMPARE_LARGE_BYTES if key_type == 'string' else COMPARE_LARGE_SIZE)
+
+
+def value_weight(key_type, size):
+    """小值在pipeline中占用的容量"""
+    if key_type == 'string':
+        return size // STRING_BYTES_PER_ITEM + 1
+    return max(size, 1)
+
+
+def budget_batches(keys, weights, batch_size, budget=COMPARE_PIPELINE_BUDGET):
+    """按key数量和总容量切分批次"""
+    batch = []
+    total = 0
+    for key in keys:
+        weight = weights.get(key, 1)
+        if batch and (len(batch) >= batch_size or total + weight > budget):
+            yield batch
+            batch = []
+            total = 0
+        batch.append(key)
+        total += weight
+    if batch:
+        yield batch
+
+
+def value_parts(key_type, value):
+    """值的各个部分，哈希字段和集合成员先排序"""
+    if key_type == 'string':
+        parts = [value]
+    elif key_type == 'hash':
+        parts = [part for item in sorted(value.items()) for part in item]
+    elif key_type == 'set':
+        parts = sorted(value)
+    elif key_type == 'stream':
+        parts = []
+        for entry_id, fields in value:
+            parts.append(entry_id)
+            for item in (fields or {}).items():
+                parts.extend(item)
+    elif key_type in ('list', 'zset'):
+        parts = list(value)
+    else:
+        parts = [value]
+    return parts
+
+
+def feed_parts(digest, parts):
+    """每个部分前加长度写入摘要，避免不同的切分拼接出相同的字节串"""
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode('utf-8', 'surrogateescape')
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+
+
+def value_digest(key_type, value):
+    """计算值的摘要，与服务端的内部编码无关；读取失败时返回None"""
+    if value is None or isinstance(value, Exception):
+        return None
+    digest = hashlib.sha1(key_type.encode())
+    feed_parts(digest, value_parts(key_type, value))
+    return digest.hexdigest()
+
+
+class ChunkedDigest:
+    """分块读取的大值的摘要
+    
+    字符串、列表、有序集合和Stream按顺序读取，结果与value_digest相同；
+    哈希和集合用HSCAN/SSCAN读取，顺序不定且可能重复，按元素指纹去重后累加，与顺序无关。
+    同一个值两侧大小相同，总是走同一种方式，摘要可以直接比较。
+    """
+    
+    def __init__(self, key_type, size):
+        self.key_type = key_type
+        self.digest = hashlib.sha1(key_type.encode())
+        self.unordered = key_type in ('hash', 'set')
+        self.members = set()
+        self.total = 0
+        if key_type == 'string':
+            # 与value_digest一致：整个字符串作为一个部分，长度在前
+            self.digest.update(size.to_bytes(8, 'big'))
+    
+    def update(self, items):
+        """写入一块数据"""
+        if self.key_type == 'string':
+            self.digest.update(items)
+        elif not self.unordered:
+            feed_parts(self.digest, value_parts(self.key_type, items))
+        else:
+            for item in (items.items() if isinstance(items, dict) else items):
+                member = hashlib.sha1()
+                feed_parts(member, item if isinstance(item, tuple) else (item,))
+                fingerprint = int.from_bytes(member.digest(), 'big')
+                if fingerprint not in self.members:
+                    self.members.add(fingerprint)
+                    self.total = (self.total + fingerprint) % (1 << 160)
+    
+    def hexdigest(self):
+        """摘要"""
+        if self.unordered:
+            self.digest.update(self.total.to_bytes(20, 'big'))
+        return self.digest.hexdigest()
+
+
+class ValueChunkReader:
+    """大值的分块读取状态，同步和异步客户端共用
+    
+    next_command给出下一条读取命令（读完时为None），feed处理其回复并返回一块数据；
+    每块的格式与queue_value_command读取的完整值一致
+    """
+    
+    def __init__(self, key, key_type, size):
+        self.key = key
+        self.key_type = key_type
+        self.size = size
+        # 字符串/列表/有序集合为偏移，哈希/集合为游标，Stream为起始ID
+        self.position = '-' if key_type == 'stream' else 0
+        self.done = key_type == 'string' and size <= 0
+    
+    def next_command(self):
+        """下一条读取命令的参数"""
+        if self.done:
+            return None
+        key, position = self.key, self.position
+        if self.key_type == 'string':
+            return ('GETRANGE', key, position, position + COMPARE_CHUNK_BYTES - 1)
+        if self.key_type == 'list':
+            return ('LRANGE', key, position, position + COMPARE_CHUNK_SIZE - 1)
+        if self.key_type == 'zset':
+            return ('ZRANGE', key, position, position + COMPARE_CHUNK_SIZE - 1, 'WITHSCORES')
+        if self.key_type in ('hash', 'set'):
+            command = 'HSCAN' if self.key_type == 'hash' else 'SSCAN'
+            return (command, key, position, 'COUNT', COMPARE_CHUNK_SIZE)
+        if self.key_type == 'stream':
+            return ('XRANGE', key, position, '+', 'COUNT', COMPARE_CHUNK_SIZE)
+        return None
+    
+    def feed(self, reply):
+        """处理一条命令的回复，返回这一块数据，没有数据时返回None"""
+        if self.key_type == 'string':
+            if not reply:
+                self.done = True
+                return None
+            self.position += len(reply)
+            self.done = self.position >= self.size
+            return reply
+        if self.key_type in ('list', 'zset'):
+            width = 1 if self.key_type == 'list' else 2
+            self.done = len(reply) < COMPARE_CHUNK_SIZE * width
+            self.position += COMPARE_CHUNK_SIZE
+            return reply
+        if self.key_type in ('hash', 'set'):
+            self.position, items = reply
+            self.done = not self.position
+            return items
+        self.done = len(reply) < COMPARE_CHUNK_SIZE
+        if reply:
+            last_id = reply[-1][0]
+            self.position = next_stream_id(last_id.decode() if isinstance(last_id, bytes) else last_id)
+        return reply
+
+
+def iter_value_chunks(client, key, key_type, size):
+    """分块读取大值，每块的格式与queue_value_command读取的完整值一致，返回值不解码"""
+    reader = ValueChunkReader(key, key_type, size)
+    command = reader.next_command()
+    while command is not None:
+        chunk = reader.feed(client.execute_command(*command, NEVER_DECODE=True))
+        if chunk is not None:
+            yield chunk
+        command = reader.next_command()
+
+
+async def iter_value_chunks_async(client, key, key_type, size):
+    """iter_value_chunks的异步版本，用于redis.asyncio客户端"""
+    reader = ValueChunkReader(key, key_type, size)
+    command = reader.next_command()
+    while command is not None:
+        chunk = reader.feed(await client.execute_command(*command, NEVER_DECODE=True))
+        if chunk is not None:
+            yield chunk
+        command = reader.next_command()
+
+
+class CompareJob:
+    """会话对比任务状态
+    
+    扫描阶段两侧各自推进游标，把{key, 类型}按桶写入临时目录；
+    比较阶段每次读入一个桶的两侧内容，先比较key集合和类型，类型相同的key再比较值摘要。
+    """
+    
+    def __init__(self, pattern="*", buckets=COMPARE_BUCKETS):
+        self.pattern = pattern
+        self.buckets = buckets
+        # 每一侧：节点名 -> 游标（单机模式节点名为None），连接后由工作线程填入
+        self.cursors = {side: None for side in SIDES}
+        self.scanned = {side: 0 for side in SIDES}
+        self.spill_buffers = {side: {} for side in SIDES}
+        self.workdir = tempfile.mkdtemp(prefix='redis_compare_')
+        self.report_path = os.path.join(self.workdir, 'report.jsonl')
+        # 比较阶段
+        self.next_bucket = 0
+        self.counts = {status: 0 for status in DIFF_LABELS}
+        self.identical = 0
+        self.pending_rows = []
+        self.stopped = False
+    
+    def bucket_path(self, side, bucket):
+        """一侧某个桶的溢写文件"""
+        return os.path.join(self.workdir, f"{side}_{bucket:03d}.jsonl")
+    
+    def spill(self, side, key_types):
+        """把一页{key: 类型}按桶放入缓冲，缓冲满的桶追加写入文件"""
+        buffers = self.spill_buffers[side]
+        for key, key_type in key_types.items():
+            bucket = key_bucket(key, self.buckets)
+            lines = buffers.setdefault(bucket, [])
+            lines.append(json.dumps([key, key_type]) + '\n')
+            if len(lines) >= SPILL_BUFFER_LINES:
+                self.write_bucket(side, bucket)
+    
+    def write_bucket(self, side, bucket):
+        """把一个桶的缓冲追加到文件"""
+        lines = self.spill_buffers[side].pop(bucket, None)
+        if lines:
+            with open(self.bucket_path(side, bucket), 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+    
+    def advance(self, side, node_name, cursor, scanned):
+        """记录一侧一个节点的扫描进度，该侧全部结束时写出剩余缓冲"""
+        cursors = self.cursors[side]
+        if cursor == 0:
+            cursors.pop(node_name, None)
+        else:
+            cursors[node_name] = cursor
+        self.scanned[side] += scanned
+        if not cursors:
+            for bucket in list(self.spill_buffers[side]):
+                self.write_bucket(side, bucket)
+    
+    def scan_finished(self, side):
+        """一侧是否已扫描完"""
+        return self.cursors[side] is not None and not self.cursors[side]
+    
+    def has_more_buckets(self):
+        """比较阶段是否还有桶"""
+        return not self.stopped and self.next_bucket < self.buckets
+    
+    def load_bucket(self, side, bucket):
+        """读取一侧一个桶的{key: 类型}，SCAN重复返回的key在这里去重"""
+        key_types = {}
+        try:
+            with open(self.bucket_path(side, bucket), 'r', encoding='utf-8') as f:
+                for line in f:
+                    key, key_type = json.loads(line)
+                    key_types[key] = key_type
+        except FileNotFoundError:
+            pass
+        return key_types
+    
+    def diff_bucket(self, bucket):
+        """比较一个桶的key集合，记录缺失、多余和类型不同的key，返回需要比较值的{key: 类型}"""
+        source = self.load_bucket(SOURCE, bucket)
+        target = self.load_bucket(TARGET, bucket)
+        common = {}
+        with open(self.report_path, 'a', encoding='utf-8') as report:
+            for key, key_type in source.items():
+                other_type = target.pop(key, None)
+                if other_type is None:
+                    self.record(report, DIFF_MISSING, key, key_type)
+                elif other_type != key_type:
+                    self.record(report, DIFF_CHANGED, key, f"类型 {key_type} → {other_type}")
+                else:
+                    common[key] = key_type
+            for key, key_type in target.items():
+                self.record(report, DIFF_EXTRA, key, key_type)
+        return common
+    
+    def record_digests(self, common, source_digests, target_digests):
+        """比较一个桶中类型相同的key的值摘要，完成该桶"""
+        with open(self.report_path, 'a', encoding='utf-8') as report:
+            for key, key_type in common.items():
+                source_digest = source_digests.get(key)
+                target_digest = target_digests.get(key)
+                if source_digest is not None and source_digest == target_digest:
+                    self.identical += 1
+                elif source_digest is None or target_digest is None:
+                    self.record(report, DIFF_CHANGED, key, f"{key_type}，值读取失败或已被删除")
+                else:
+                    self.record(report, DIFF_CHANGED, key, f"{key_type}，值不同")
+        self.next_bucket += 1
+    
+    def record(self, report, status, key, detail):
+        """写入一条差异"""
+        self.counts[status] += 1
+        report.write(json.dumps({'status': status, 'key': key, 'detail': detail},
+                                ensure_ascii=False) + '\n')
+        self.pending_rows.append((status, key, detail))
+    
+    def take_rows(self):
+        """取出上次之后新增的差异行"""
+        rows, self.pending_rows = self.pending_rows, []
+        return rows
+    
+    def cleanup(self):
+        """删除临时目录（溢写文件和报告）"""
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class ComparePanel(QWidget):
+    """会话对比页面
+    
+    与当前连接无关：为两个已保存的会话各启动一个工作线程，两侧的扫描和取值并行执行，
+    分桶比较由源会话的线程完成。
+    """
+    
+    HEADERS = ["状态", "Key", "说明"]
+    
+    def __init__(self, tool, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.job = None
+        self.threads = {}
+        # (侧, 任务ID) -> (成功回调, 失败回调)；两个线程的任务ID各自编号
+        self.callbacks = {}
+        # 已扫描完的一侧，以各自任务的返回值为准，不读取另一个线程仍在修改的游标
+        self.scanned_sides = set()
+        self.pending_digests = {}
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 10, 0, 0)
+        
+        options_layout = QHBoxLayout()
+        self.session_combos = {}
+        for side in SIDES:
+            combo = QComboBox()
+            combo.setMinimumWidth(160)
+            self.session_combos[side] = combo
+            label = QLabel(f"{SIDE_LABELS[side]}会话:")
+            label.setStyleSheet("font-weight: bold;")
+            options_layout.addWidget(label)
+            options_layout.addWidget(combo)
+        pattern_label = QLabel("模式:")
+        pattern_label.setStyleSheet("font-weight: bold;")
+        self.pattern_input = QLineEdit("*")
+        self.pattern_input.setFixedWidth(140)
+        options_layout.addWidget(pattern_label)
+        options_layout.addWidget(self.pattern_input)
+        
+        self.start_btn = self.create_button("🔀 对比", "#007bff", "#0056b3")
+        self.start_btn.clicked.connect(self.start_compare)
+        self.stop_btn = self.create_button("⏹ 停止", "#6c757d", "#5a6268")
+        self.stop_btn.clicked.connect(self.stop_compare)
+        self.export_btn = self.create_button("💾 报告", "#28a745", "#218838")
+        self.export_btn.setToolTip("把完整的差异列表保存为JSONL文件")
+        self.export_btn.clicked.connect(self.export_report)
+        options_layout.addWidget(self.start_btn)
+        options_layout.addWidget(self.stop_btn)
+        options_layout.addWidget(self.export_btn)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.status_label = QLabel("选择两个已保存的会话，比较key集合和值；源有目标无为缺失，目标有源无为多余")
+        self.status_label.setStyleSheet("color: #6c757d;")
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table, 1)
+        
+        # 会话列表在切换到本页时读取
+        self.update_controls()
+    
+    def create_button(self, text, color, hover_color):
+        """创建操作按钮"""
+        button = QPushButton(text)
+        button.setFixedWidth(80)
+        button.setStyleSheet(f"""
+            QPushButton {{
+                font-weight: bold;
+                background-color: {color};
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }}
+            QPushButton:hover {{
+                background-color: {hover_color};
+            }}
+            QPushButton:disabled {{
+                background-color: #adb5bd;
+            }}
+        """)
+        return button
+    
+    def showEvent(self, event):
+        """切换到本页时重新读取会话，保持原来的选择"""
+        super().showEvent(event)
+        if not self.threads:
+            self.reload_sessions()
+    
+    def reload_sessions(self):
+        """从会话文件读取已保存的会话"""
+        try:
+            with open(self.tool.session_file, 'r', encoding='utf-8') as f:
+                sessions = json.load(f)
+        except (OSError, ValueError):
+            sessions = []
+        for index, combo in enumerate(self.session_combos.values()):
+            current = combo.currentText()
+            combo.clear()
+            for session in sessions:
+                combo.addItem(session.get('name', f"{session['host']}:{session['port']}"), session)
+            selected = combo.findText(current) if current else -1
+            combo.setCurrentIndex(selected if selected >= 0 else min(index, combo.count() - 1))
+    
+    def start_compare(self):
+        """为两个会话启动工作线程并开始扫描"""
+        sessions = {side: combo.currentData() for side, combo in self.session_combos.items()}
+        if not all(sessions.values()):
+            self.tool.show_message("警告", "请先保存两个会话", "warning")
+            return
+        
+        # 延迟导入，避免与redis_tool循环导入
+        from .redis_tool import RedisConnectionThread
+        self.stop_compare()
+        self.discard_job()
+        self.job = CompareJob(self.pattern_input.text() or "*")
+        self.table.setRowCount(0)
+        self.progress_bar.setRange(0, 0)
+        self.status_label.setText("连接中...")
+        for side, session in sessions.items():
+            thread = RedisConnectionThread(
+                session.get('host', 'localhost'), int(session.get('port', 6379)),
+                session.get('password') or None, session.get('db', 0),
+                session.get('cluster_mode', False))
+            thread.connection_result.connect(
+                lambda success, message, side=side: self.on_connection_result(side, success, message))
+            thread.task_finished.connect(
+                lambda task_id, result, side=side: self.on_task_finished(side, task_id, result))
+            thread.task_failed.connect(
+                lambda task_id, error, side=side: self.on_task_failed(side, task_id, error))
+            self.threads[side] = thread
+            thread.start()
+        self.update_controls()
+    
+    def submit(self, side, func, *args, on_success=None):
+        """提交任务到一侧的工作线程"""
+        task_id = self.threads[side].submit(func, *args)
+        self.callbacks[(side, task_id)] = (on_success, self.on_compare_error)
+    
+    def on_task_finished(self, side, task_id, result):
+        """任务完成"""
+        on_success, _ = self.callbacks.pop((side, task_id), (None, None))
+        if on_success:
+            on_success(result)
+    
+    def on_task_failed(self, side, task_id, error):
+        """任务失败"""
+        callbacks = self.callbacks.pop((side, task_id), None)
+        if callbacks is not None:
+            callbacks[1](f"{SIDE_LABELS[side]}会话: {error}")
+    
+    def on_connection_result(self, side, success, message):
+        """一侧连接完成后立即开始扫描，两侧互不等待"""
+        if side not in self.threads:
+            return
+        if not success:
+            self.on_compare_error(f"{SIDE_LABELS[side]}会话连接失败: {message}")
+            return
+        self.submit_scan_page(side)
+    
+    def submit_scan_page(self, side):
+        """提交一侧的下一页扫描"""
+        job = self.job
+        self.submit(side, self.threads[side].compare_scan_page, job, side,
+                    on_success=lambda finished: self.on_scan_page(job, side, finished))
+    
+    def on_scan_page(self, job, side, finished):
+        """一页扫描完成：未结束时继续，两侧都结束后进入比较阶段"""
+        if job is not self.job or job.stopped:
+            return
+        self.show_progress()
+        if not finished:
+            self.submit_scan_page(side)
+            return
+        self.scanned_sides.add(side)
+        if len(self.scanned_sides) == len(SIDES):
+            self.progress_bar.setRange(0, job.buckets)
+            self.submit_next_bucket()
+    
+    def submit_next_bucket(self):
+        """在源会话线程中比较下一个桶的key集合"""
+        job = self.job
+        if not job.has_more_buckets():
+            self.finish_compare()
+            return
+        self.submit(SOURCE, job.diff_bucket, job.next_bucket,
+                    on_success=lambda common: self.on_bucket_diffed(job, common))
+    
+    def on_bucket_diffed(self, job, common):
+        """key集合比较完成：两侧同时计算同类型key的值摘要"""
+        if job is not self.job or job.stopped:
+            return
+        self.show_rows(job.take_rows())
+        self.pending_digests = {}
+        if not common:
+            job.record_digests(common, {}, {})
+            self.on_bucket_done()
+            return
+        for side in SIDES:
+            self.submit(side, self.threads[side].compare_digests, common,
+                        on_success=lambda digests, side=side: self.on_digests(job, side, common, digests))
+    
+    def on_digests(self, job, side, common, digests):
+        """一侧的值摘要返回，两侧都返回后比较"""
+        if job is not self.job or job.stopped:
+            return
+        self.pending_digests[side] = digests
+        if len(self.pending_digests) < len(SIDES):
+            return
+        job.record_digests(common, self.pending_digests[SOURCE], self.pending_digests[TARGET])
+        self.pending_digests = {}
+        self.show_rows(job.take_rows())
+        self.on_bucket_done()
+    
+    def on_bucket_done(self):
+        """一个桶完成"""
+        self.progress_bar.setValue(self.job.next_bucket)
+        self.show_progress()
+        self.submit_next_bucket()
+    
+    def show_rows(self, rows):
+        """追加差异行，超过上限的只写入报告"""
+        start = self.table.rowCount()
+        rows = rows[:max(0, REPORT_VIEW_ROWS - start)]
+        if not rows:
+            return
+        self.table.setRowCount(start + len(rows))
+        for offset, (status, key, detail) in enumerate(rows):
+            for column, value in enumerate((DIFF_LABELS[status], key, detail)):
+                item = QTableWidgetItem(value)
+                if column == 1:
+                    item.setToolTip(key)
+                self.table.setItem(start + offset, column, item)
+    
+    def show_progress(self, prefix=""):
+        """显示进度"""
+        job = self.job
+        text = "，".join(f"{SIDE_LABELS[side]}已扫描 {job.scanned[side]} 个key" for side in SIDES)
+        if len(self.scanned_sides) == len(SIDES):
+            text += (f"；已比较 {job.next_bucket}/{job.buckets} 个桶："
+                     + "，".join(f"{DIFF_LABELS[status]} {count}" for status, count in job.counts.items())
+                     + f"，相同 {job.identical}")
+        self.status_label.setText(prefix + text)
+    
+    def finish_compare(self):
+        """比较完成"""
+        self.show_progress("完成：")
+        self.close_threads()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(100)
+        if self.table.rowCount() >= REPORT_VIEW_ROWS:
+            self.status_label.setText(self.status_label.text() + f"（仅显示前 {REPORT_VIEW_ROWS} 条，完整结果请保存报告）")
+        self.update_controls()
+    
+    def on_compare_error(self, error):
+        """对比失败"""
+        if self.job is not None:
+            self.job.stopped = True
+        self.close_threads()
+        self.progress_bar.setRange(0, 100)
+        self.status_label.setText(f"对比失败: {error}")
+        self.update_controls()
+    
+    def stop_compare(self):
+        """停止对比，保留已有结果"""
+        if self.job is not None and self.threads:
+            self.job.stopped = True
+            self.progress_bar.setRange(0, 100)
+            self.show_progress("已停止：")
+        self.close_threads()
+        self.update_controls()
+    
+    def close_threads(self):
+        """停止两侧的工作线程，客户端在线程退出时归还连接池；仍在执行命令的线程结束后自行释放"""
+        for thread in self.threads.values():
+            thread.retire()
+        self.threads = {}
+        self.callbacks.clear()
+        self.scanned_sides.clear()
+        self.pending_digests = {}
+    
+    def export_report(self):
+        """保存完整的差异报告"""
+        job = self.job
+        if job is None or not os.path.exists(job.report_path):
+            self.tool.show_message("提示", "没有可保存的差异", "info")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "保存报告", "redis_compare.jsonl",
+                                              "JSONL (*.jsonl);;所有文件 (*)")
+        if not path:
+            return
+        try:
+            shutil.copyfile(job.report_path, path)
+        except OSError as e:
+            self.tool.show_message("错误", f"保存报告失败: {e}", "error")
+    
+    def discard_job(self):
+        """丢弃上一次的结果和临时文件"""
+        if self.job is not None:
+            self.job.cleanup()
+            self.job = None
+    
+    def reset(self):
+        """关闭时停止对比并删除临时文件"""
+        self.stop_compare()
+        self.discard_job()
+    
+    def update_controls(self):
+        """根据状态更新控件"""
+        running = bool(self.threads)
+        self.start_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.export_btn.setEnabled(not running and self.job is not None)
+        for combo in self.session_combos.values():
+            combo.setEnabled(not running)
+        self.pattern_input.setEnabled(not running)
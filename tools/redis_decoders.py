@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis值解码
+按原始字节开头的魔数选择解码链（解压 -> 格式化），字符串按页增量解码，
+解码在工作线程中进行，可通过register_decoder注册新的解码器
+"""
+
+import codecs
+import json
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+# 嗅探格式时查看的开头字节数
+SNIFF_SIZE = 256
+# 解压时每次输出的上限（字节），超出部分留到下一页，避免高压缩比数据一次撑满内存
+DECOMPRESS_OUTPUT_LIMIT = 1024 * 1024
+# 需要完整数据才能格式化（JSON缩进、protobuf解析）的最大字节数
+STRUCTURED_LIMIT = 4 * 1024 * 1024
+# 十六进制每行字节数
+HEX_LINE_WIDTH = 16
+# 解压嵌套的最大层数
+MAX_TRANSFORM_DEPTH = 3
+# 解码结果缓存的总字符数上限
+DECODE_CACHE_CHARS = 32 * 1024 * 1024
+
+
+def is_printable_text(text):
+    """控制字符（制表符和换行除外）不超过2%视为文本"""
+    if not text:
+        return True
+    controls = sum(1 for char in text if char < ' ' and char not in '\t\r\n')
+    return controls * 50 <= len(text)
+
+
+def jsonable(value):
+    """msgpack/protobuf解出的对象 -> 可JSON序列化的对象（bytes和非字符串key转为文本）"""
+    if isinstance(value, dict):
+        return {key if isinstance(key, str) else repr(key): jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    if isinstance(value, bytes):
+        text = value.decode('utf-8', errors='replace')
+        return text if is_printable_text(text) else value.hex()
+    return value
+
+
+def dump_json(value, compact=False):
+    """格式化为JSON文本"""
+    if compact:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=repr)
+    return json.dumps(value, ensure_ascii=False, indent=2, default=repr)
+
+
+# ---- 解码器 ----
+
+class PayloadDecoder:
+    """解码器基类
+    
+    sniff根据开头的字节判断能否处理；feed增量处理一段数据，final表示输入结束。
+    解压类(transform=True)输出字节交给链上的下一级，格式化类输出文本。
+    priority越小越先嗅探。
+    """
+    
+    name = ""
+    transform = False
+    priority = 50
+    
+    def __init__(self, compact=False):
+        self.compact = compact
+    
+    @classmethod
+    def available(cls):
+        """依赖的第三方库是否已安装"""
+        return True
+    
+    @classmethod
+    def sniff(cls, head):
+        """开头的字节是否为本格式"""
+        return False
+    
+    def feed(self, data, final):
+        """处理一段数据"""
+        raise NotImplementedError
+    
+    def has_backlog(self):
+        """是否还有受输出上限限制、尚未输出的数据"""
+        return False
+    
+    def pending_bytes(self):
+        """尚未输出的缓冲数据，解码失败时改用十六进制显示"""
+        return b""
+
+
+# 已注册的解码器类，按priority排序
+DECODERS = []
+_decoders_lock = threading.Lock()
+
+
+def register_decoder(cls):
+    """注册解码器，可作为类装饰器使用；同名的解码器被替换"""
+    with _decoders_lock:
+        DECODERS[:] = [decoder for decoder in DECODERS if decoder.name != cls.name]
+        DECODERS.append(cls)
+        DECODERS.sort(key=lambda decoder: decoder.priority)
+    return cls
+
+
+def find_decoder(name):
+    """按名称查找已注册的解码器类"""
+    for decoder in DECODERS:
+        if decoder.name == name:
+            return decoder
+    return None
+
+
+def formatter_names():
+    """可手动选择的格式化解码器名称"""
+    return [decoder.name for decoder in DECODERS if not decoder.transform and decoder.available()]
+
+
+@register_decoder
+class GzipDecoder(PayloadDecoder):
+    """gzip"""
+    
+    name = "gzip"
+    transform = True
+    priority = 10
+    WBITS = 16 + zlib.MAX_WBITS
+    
+    def __init__(self, compact=False):
+        super().__init__(compact)
+        self.inflater = zlib.decompressobj(self.WBITS)
+    
+    @classmethod
+    def sniff(cls, head):
+        return head[:2] == b'\x1f\x8b'
+    
+    def feed(self, data, final):
+        data = self.inflater.unconsumed_tail + data
+        return self.inflater.decompress(data, DECOMPRESS_OUTPUT_LIMIT)
+    
+    def has_backlog(self):
+        return bool(self.inflater.unconsumed_tail)
+
+
+@register_decoder
+class ZlibDecoder(GzipDecoder):
+    """zlib（deflate带zlib头）"""
+    
+    name = "zlib"
+    priority = 11
+    WBITS = zlib.MAX_WBITS
+    
+    @classmethod
+    def sniff(cls, head):
+        # CMF低4位为8(deflate)，CMF*256+FLG是31的倍数
+        return len(head) >= 2 and head[0] & 0x0F == 8 and head[0] >> 4 <= 7 \
+            and (head[0] << 8 | head[1]) % 31 == 0
+
+
+@register_decoder
+class Lz4FrameDecoder(PayloadDecoder):
+    """LZ4 frame（需要lz4库）"""
+    
+    name = "lz4"
+    transform = True
+    priority = 12
+    
+    def __init__(self, compact=False):
+        super().__init__(compact)
+        self.decompressor = lz4_frame.LZ4FrameDecompressor()
+    
+    @classmethod
+    def available(cls):
+        return lz4_frame is not None
+    
+    @classmethod
+    def sniff(cls, head):
+        return head[:4] == b'\x04\x22\x4d\x18'
+    
+    def feed(self, data, final):
+        if self.decompressor.eof:
+            return b""
+        return self.decompressor.decompress(data, max_length=DECOMPRESS_OUTPUT_LIMIT)
+    
+    def has_backlog(self):
+        return not (self.decompressor.eof or self.decompressor.needs_input)
+
+
+@register_decoder
+class MsgpackDecoder(PayloadDecoder):
+    """MessagePack（需要msgpack库），每个完整的顶层对象输出为JSON"""
+    
+    name = "msgpack"
+    priority = 20
+    
+    def __init__(self, compact=False):
+        super().__init__(compact)
+        self.unpacker = msgpack.Unpacker(raw=False, strict_map_key=False, unicode_errors='replace',
+                                         max_buffer_size=STRUCTURED_LIMIT)
+    
+    @classmethod
+    def available(cls):
+        return msgpack is not None
+    
+    @classmethod
+    def sniff(cls, head):
+        # fixmap/fixarray/array16/array32/map16/map32，这些字节不可能是UTF-8文本的开头
+        return bool(head) and (0x80 <= head[0] <= 0x9F or 0xDC <= head[0] <= 0xDF)
+    
+    def feed(self, data, final):
+        self.unpacker.feed(data)
+        parts = [dump_json(jsonable(obj), self.compact) for obj in self.unpacker]
+        if final and self.unpacker.tell() == 0:
+            raise ValueError("不是完整的msgpack数据")
+        text = "\n".join(parts)
+        return text + "\n" if text and not self.compact else text
+
+
+@register_decoder
+class JsonDecoder(PayloadDecoder):
+    """JSON，完整数据不超过上限时缩进显示，否则按文本流式输出"""
+    
+    name = "JSON"
+    priority = 30
+    
+    def __init__(self, compact=False):
+        super().__init__(compact)
+        self.buffer = bytearray()
+        self.text = None
+    
+    @classmethod
+    def sniff(cls, head):
+        head = head.lstrip()
+        if head[:3] == b'\xef\xbb\xbf':
+            head = head[3:].lstrip()
+        return head[:1] in (b'{', b'[') and TextDecoder.sniff(head)
+    
+    def feed(self, data, final):
+        if self.text is not None:
+            return self.text.feed(data, final)
+        self.buffer += data
+        if final:
+            raw = bytes(self.buffer)
+            self.buffer = bytearray()
+            try:
+                return dump_json(json.loads(raw.decode('utf-8-sig')), self.compact)
+            except ValueError:
+                return raw.decode('utf-8', errors='replace')
+        if len(self.buffer) > STRUCTURED_LIMIT:
+            # 太大，不再整体格式化
+            self.text = TextDecoder(self.compact)
+            raw = bytes(self.buffer)
+            self.buffer = bytearray()
+            return self.text.feed(raw, final)
+        return ""
+    
+    def pending_bytes(self):
+        return bytes(self.buffer)
+
+
+@register_decoder
+class TextDecoder(PayloadDecoder):
+    """UTF-8文本，跨页的多字节字符由增量解码器拼接"""
+    
+    name = "文本"
+    priority = 40
+    
+    def __init__(self, compact=False):
+        super().__init__(compact)
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    
+    @classmethod
+    def sniff(cls, head):
+        try:
+            # 末尾可能截断了一个多字节字符，不作为最终输入
+            text = codecs.getincrementaldecoder('utf-8')().decode(head[:SNIFF_SIZE], False)
+        except UnicodeDecodeError:
+            return False
+        return is_printable_text(text)
+    
+    def feed(self, data, final):
+        return self.decoder.decode(data, final)
+
+
+def read_varint(data, pos):
+    """读取protobuf varint，返回(值, 新位置)"""
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("varint不完整")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 64:
+            raise ValueError("varint过长")
+
+
+def parse_protobuf(data, partial=False):
+    """无schema解析protobuf线格式，返回[(字段号, 线类型, 值)]；partial为True时允许末尾截断"""
+    fields = []
+    pos = 0
+    while pos < len(data):
+        start = pos
+        try:
+            tag, pos = read_varint(data, pos)
+            number, wire_type = tag >> 3, tag & 7
+            if number == 0:
+                raise ValueError("字段号为0")
+            if wire_type == 0:
+                value, pos = read_varint(data, pos)
+            elif wire_type == 1 or wire_type == 5:
+                size = 8 if wire_type == 1 else 4
+                if pos + size > len(data):
+                    raise ValueError("定长字段不完整")
+                value = int.from_bytes(data[pos:pos + size], 'little')
+                pos += size
+            elif wire_type == 2:
+                size, pos = read_varint(data, pos)
+                if pos + size > len(data):
+                    raise ValueError("长度字段不完整")
+                value = data[pos:pos + size]
+                pos += size
+            else:
+                raise ValueError(f"不支持的线类型 {wire_type}")
+        except ValueError:
+            if partial and fields and start > 0:
+                break
+            raise
+        fields.append((number, wire_type, value))
+    return fields
+
+
+def protobuf_value(wire_type, value):
+    """长度字段依次尝试嵌套消息、文本，否则为十六进制"""
+    if wire_type != 2:
+        return value
+    try:
+        nested = parse_protobuf(value) if value else None
+    except ValueError:
+        nested = None
+    if nested:
+        return protobuf_tree(nested)
+    text = value.decode('utf-8', errors='replace')
+    return text if is_printable_text(text) and '�' not in text else value.hex()
+
+
+def protobuf_tree(fields):
+    """字段列表 -> {字段号: 值}，重复出现的字段为值列表"""
+    tree = {}
+    for number, wire_type, value in fields:
+        tree.setdefault(str(number), []).append(protobuf_value(wire_type, value))
+    return {number: values[0] if len(values) == 1 else values for number, values in tree.items()}
+
+
+@register_decoder
+class ProtobufDecoder(PayloadDecoder):
+    """protobuf（无schema），显示字段号和推断的值"""
+    
+    name = "protobuf"
+    priority = 45
+    
+    def __init__(self, compact=False):
+        super().__init__(compact)
+        self.buffer = bytearray()
+    
+    @classmethod
+    def sniff(cls, head):
+        try:
+            return bool(parse_protobuf(head[:SNIFF_SIZE], partial=True))
+        except ValueError:
+            return False
+    
+    def feed(self, data, final):
+        self.buffer += data
+        if len(self.buffer) > STRUCTURED_LIMIT:
+            raise ValueError("数据过大，无法按protobuf整体解析")
+        if not final:
+            return ""
+        return dump_json(protobuf_tree(parse_protobuf(bytes(self.buffer))), self.compact)
+    
+    def pending_bytes(self):
+        return bytes(self.buffer)
+
+
+@register_decoder
+class HexDecoder(PayloadDecoder):
+    """十六进制（兜底），每行带偏移和可打印字符"""
+    
+    name = "十六进制"
+    priority = 100
+    
+    def __init__(self, compact=False):
+        super().__init__(compact)
+        self.offset = 0
+        self.remainder = b""
+    
+    @classmethod
+    def sniff(cls, head):
+        return True
+    
+    def feed(self, data, final):
+        if self.compact:
+            return data.hex()
+        data = self.remainder + data
+        end = len(data) if final else len(data) - len(data) % HEX_LINE_WIDTH
+        self.remainder = data[end:]
+        lines = []
+        for pos in range(0, end, HEX_LINE_WIDTH):
+            line = data[pos:pos + HEX_LINE_WIDTH]
+            ascii_text = ''.join(chr(byte) if 0x20 <= byte < 0x7F else '.' for byte in line)
+            lines.append(f"{self.offset + pos:08x}  {line.hex(' '):<{HEX_LINE_WIDTH * 3 - 1}}  |{ascii_text}|")
+        self.offset += end
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+# ---- 解码会话 ----
+
+class DecodeSession:
+    """一个值的增量解码状态
+    
+    每一级解码器在收到第一段非空数据时按魔数选择，解压级的输出交给下一级，
+    某一级出错时改为十六进制显示该级剩余的数据。forced指定格式化器时直接作用于原始字节。
+    对象在界面线程创建，之后只在工作线程中使用。
+    """
+    
+    def __init__(self, forced=None, compact=False):
+        self.forced = forced
+        self.compact = compact
+        self.chain = []
+        self.input_done = False
+        self.cached = False
+    
+    def describe(self):
+        """解码链描述，如 gzip → JSON"""
+        names = " → ".join(decoder.name for decoder in self.chain)
+        return f"{names}（缓存）" if self.cached and names else names
+    
+    def has_backlog(self):
+        """解压级是否还有待输出的数据"""
+        return any(decoder.has_backlog() for decoder in self.chain if decoder.transform)
+    
+    def finished(self):
+        """输入已读完且没有积压"""
+        return self.input_done and not self.has_backlog()
+    
+    def pick(self, head, level):
+        """为第level级选择解码器"""
+        if self.forced and level == 0:
+            decoder = find_decoder(self.forced)
+            if decoder is not None and decoder.available():
+                return decoder(self.compact)
+        for decoder in DECODERS:
+            if decoder.transform and level >= MAX_TRANSFORM_DEPTH:
+                continue
+            if decoder.available() and decoder.sniff(head[:SNIFF_SIZE]):
+                return decoder(self.compact)
+        return HexDecoder(self.compact)
+    
+    def feed(self, data, final):
+        """喂入一段原始字节（没有新数据时传b""以输出积压部分），返回本段文本"""
+        self.input_done = final
+        return self.feed_level(0, data, final)
+    
+    def feed_level(self, level, data, final):
+        """把数据交给第level级"""
+        if level == len(self.chain):
+            if not data and not final:
+                return ""
+            self.chain.append(self.pick(data, level))
+        decoder = self.chain[level]
+        try:
+            output = decoder.feed(data, final)
+        except Exception as e:
+            return self.fall_back(level, decoder, data, final, e)
+        if decoder.transform:
+            return self.feed_level(level + 1, output, final and not decoder.has_backlog())
+        return output
+    
+    def fall_back(self, level, decoder, data, final, error):
+        """第level级解码失败：之后的数据以十六进制显示"""
+        del self.chain[level:]
+        hex_decoder = HexDecoder(self.compact)
+        self.chain.append(hex_decoder)
+        pending = decoder.pending_bytes() or data
+        note = "" if self.compact else f"[{decoder.name}解码失败: {error}，以下为十六进制]\n"
+        return note + hex_decoder.feed(pending, final)
+    
+    def restore(self, entry):
+        """从缓存恢复：解码链和完整文本"""
+        names, text = entry
+        self.chain = [find_decoder(name)(self.compact) for name in names if find_decoder(name)]
+        self.input_done = True
+        self.cached = True
+        return text
+
+
+def decode_value(data, compact=True):
+    """一次性解码一个元素（列表/集合/哈希的值），普通文本直接返回"""
+    if data is None:
+        return ""
+    if isinstance(data, str):
+        return data
+    try:
+        text = data.decode('utf-8')
+        if is_printable_text(text):
+            return text
+    except UnicodeDecodeError:
+        pass
+    return DecodeSession(compact=compact).feed(data, True)
+
+
+def decode_text(data):
+    """字段名等只需要文本的场合"""
+    if isinstance(data, bytes):
+        return data.decode('utf-8', errors='replace')
+    return str(data)
+
+
+class DecodedValueCache:
+    """解码结果缓存：(key, 版本, 强制解码器) -> (解码链名称, 文本)，按总字符数LRU淘汰
+    
+    版本为原始字节的长度和CRC32，内容不变时重复查看不再解压/格式化。
+    """
+    
+    def __init__(self, capacity=DECODE_CACHE_CHARS):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def version(data):
+        """原始字节的版本标识"""
+        return len(data), zlib.crc32(data)
+    
+    def get(self, key, version, forced=None):
+        """命中返回(解码链名称, 文本)"""
+        with self.lock:
+            entry = self.entries.get((key, version, forced))
+            if entry is not None:
+                self.entries.move_to_end((key, version, forced))
+            return entry
+    
+    def put(self, key, version, forced, session, text):
+        """缓存一次完整的解码结果，超过容量的一半不缓存"""
+        if len(text) * 2 > self.capacity:
+            return
+        names = tuple(decoder.name for decoder in session.chain)
+        with self.lock:
+            old = self.entries.pop((key, version, forced), None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[(key, version, forced)] = (names, text)
+            self.size += len(text)
+            while self.size > self.capacity:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
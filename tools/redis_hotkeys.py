@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis热Key分析
+在限定时间窗口内用MONITOR采样命令流，或在LFU淘汰策略下扫描OBJECT FREQ，
+用Space-Saving算法在固定内存内统计访问最多的key
+"""
+
+import heapq
+import re
+import time
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QLineEdit, QComboBox, QSpinBox, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QAbstractItemView)
+from .redis_memory_analyzer import push_top
+
+
+# MONITOR输出中每个参数都用双引号包围，内部的双引号和反斜杠被转义
+MONITOR_ARG_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+MONITOR_ESCAPE_RE = re.compile(r'\\(x[0-9a-fA-F]{2}|.)')
+MONITOR_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', 'a': '\a', 'b': '\b'}
+
+# 不带key参数的命令
+KEYLESS_COMMANDS = frozenset((
+    'PING', 'ECHO', 'INFO', 'SCAN', 'CLUSTER', 'CLIENT', 'CONFIG', 'SLOWLOG', 'LATENCY',
+    'MONITOR', 'SELECT', 'AUTH', 'HELLO', 'COMMAND', 'DBSIZE', 'TIME', 'MULTI', 'EXEC',
+    'DISCARD', 'UNWATCH', 'READONLY', 'READWRITE', 'ASKING', 'KEYS', 'RANDOMKEY', 'FLUSHDB',
+    'FLUSHALL', 'PUBLISH', 'SUBSCRIBE', 'PSUBSCRIBE', 'UNSUBSCRIBE', 'PUNSUBSCRIBE', 'QUIT',
+    'SCRIPT', 'FUNCTION', 'MEMORY', 'OBJECT', 'DEBUG', 'ROLE', 'LASTSAVE', 'SAVE', 'BGSAVE',
+    'WAIT', 'SWAPDB', 'ACL', 'MODULE', 'SHUTDOWN', 'REPLCONF', 'PSYNC', 'SYNC',
+))
+# 所有参数都是key的命令
+ALL_KEYS_COMMANDS = frozenset(('MGET', 'DEL', 'UNLINK', 'EXISTS', 'TOUCH', 'WATCH'))
+# key和值交替出现的命令
+KEY_VALUE_COMMANDS = frozenset(('MSET', 'MSETNX'))
+
+
+def unescape_monitor_arg(text):
+    """还原MONITOR参数中的转义字符
+    
+    MONITOR把0x80及以上的每个字节都写成\\xNN，先还原为原始字节，再按UTF-8解码，中文key才能还原
+    """
+    if '\\' not in text:
+        return text
+    data = bytearray()
+    position = 0
+    for match in MONITOR_ESCAPE_RE.finditer(text):
+        data += text[position:match.start()].encode('utf-8')
+        escaped = match.group(1)
+        if escaped[0] == 'x' and len(escaped) == 3:
+            data.append(int(escaped[1:], 16))
+        else:
+            data += MONITOR_ESCAPES.get(escaped, escaped).encode('utf-8')
+        position = match.end()
+    data += text[position:].encode('utf-8')
+    return data.decode('utf-8', 'replace')
+
+
+def parse_monitor_line(line):
+    """解析一行MONITOR输出，返回命令参数列表
+    
+    格式: 1700000000.123456 [0 127.0.0.1:6379] "GET" "user:1"
+    """
+    if isinstance(line, bytes):
+        line = line.decode('utf-8', errors='replace')
+    start = line.find('] ')
+    if start < 0:
+        return []
+    return [unescape_monitor_arg(arg) for arg in MONITOR_ARG_RE.findall(line, start)]
+
+
+def command_keys(args):
+    """命令访问的key，按常见命令的参数位置提取"""
+    if not args:
+        return []
+    command = args[0].upper()
+    if command in KEYLESS_COMMANDS or len(args) < 2:
+        return []
+    if command in ALL_KEYS_COMMANDS:
+        return args[1:]
+    if command in KEY_VALUE_COMMANDS:
+        return args[1::2]
+    if command in ('EVAL', 'EVALSHA', 'EVAL_RO', 'EVALSHA_RO', 'FCALL', 'FCALL_RO'):
+        try:
+            return args[3:3 + int(args[2])]
+        except (IndexError, ValueError):
+            return []
+    return args[1:2]
+
+
+class SpaceSaving:
+    """Space-Saving频繁项统计
+    
+    最多保存capacity个计数器，新key在满员时替换计数最小的key并继承其计数，
+    继承的部分记为误差上限；计数器满员时任何真实频率超过 总数/capacity 的key都一定在表中。
+    最小计数器用懒删除的最小堆查找，堆中的过期条目超过一定数量时重建。
+    """
+    
+    def __init__(self, capacity):
+        self.capacity = max(1, capacity)
+        # key -> [计数, 误差上限]
+        self.counters = {}
+        # (计数, key)，计数与counters不一致的条目已过期
+        self.heap = []
+        self.total = 0
+    
+    def offer(self, key, weight=1):
+        """记录一次访问"""
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            counter = self.counters[key] = [weight, 0]
+        else:
+            floor, victim = self.pop_min()
+            del self.counters[victim]
+            counter = self.counters[key] = [floor + weight, floor]
+        heapq.heappush(self.heap, (counter[0], key))
+        if len(self.heap) > 4 * self.capacity:
+            self.compact()
+    
+    def pop_min(self):
+        """弹出计数最小的有效条目"""
+        while True:
+            count, key = heapq.heappop(self.heap)
+            counter = self.counters.get(key)
+            if counter is not None and counter[0] == count:
+                return count, key
+    
+    def compact(self):
+        """丢弃堆中的过期条目"""
+        self.heap = [(counter[0], key) for key, counter in self.counters.items()]
+        heapq.heapify(self.heap)
+    
+    def top(self, n):
+        """计数最多的n个key：[(key, 计数, 误差上限)]"""
+        items = heapq.nlargest(n, self.counters.items(), key=lambda item: item[1][0])
+        return [(key, count, error) for key, (count, error) in items]
+
+
+class HotKeyProfile:
+    """热Key分析状态
+    
+    MONITOR模式：每个工作线程任务读取一小段时间的命令流，直到时间窗口结束；
+    OBJECT FREQ模式：每个任务扫描各节点一页key，用最小堆保留LFU计数最高的key。
+    """
+    
+    MODE_MONITOR = 'monitor'
+    MODE_FREQ = 'freq'
+    
+    # 每个任务读取MONITOR的时长（秒），结束后刷新界面
+    SLICE_SECONDS = 1.0
+    # Space-Saving计数器数量为Top K的倍数，倍数越大排名越准确
+    CAPACITY_FACTOR = 20
+    
+    def __init__(self, mode, top_k, duration=30, pattern="*", cursors=None):
+        self.mode = mode
+        self.top_k = top_k
+        self.pattern = pattern
+        self.counter = SpaceSaving(top_k * self.CAPACITY_FACTOR)
+        # OBJECT FREQ模式的(频率, key)最小堆
+        self.freq_top = []
+        self.cursors = cursors or {}
+        self.started = time.monotonic()
+        self.deadline = self.started + duration
+        # 节点名 -> MONITOR对象，只在工作线程中使用
+        self.monitors = {}
+        # 为MONITOR单独建立的客户端，关闭MONITOR时一并关闭
+        self.monitor_clients = []
+        self.policy_checked = False
+        self.commands = 0
+        self.scanned = 0
+        self.stopped = False
+    
+    def has_more(self):
+        """是否还需要继续采样"""
+        if self.stopped:
+            return False
+        if self.mode == self.MODE_MONITOR:
+            return time.monotonic() < self.deadline
+        return bool(self.cursors)
+    
+    def slice_deadline(self):
+        """本次任务的结束时间"""
+        return min(time.monotonic() + self.SLICE_SECONDS, self.deadline)
+    
+    def record_line(self, line):
+        """记录一行MONITOR输出"""
+        args = parse_monitor_line(line)
+        if not args:
+            return
+        self.commands += 1
+        for key in command_keys(args):
+            self.counter.offer(key)
+    
+    def record_freqs(self, keys, replies):
+        """记录一批OBJECT FREQ结果"""
+        for key, freq in zip(keys, replies):
+            if isinstance(freq, Exception) or freq is None:
+                continue
+            push_top(self.freq_top, (int(freq), key), self.top_k)
+    
+    def advance(self, node_name, cursor, scanned):
+        """记录一个节点的一页扫描"""
+        self.scanned += scanned
+        if cursor == 0:
+            self.cursors.pop(node_name, None)
+        else:
+            self.cursors[node_name] = cursor
+    
+    def snapshot(self):
+        """当前排行：[(key, 计数, 误差)]，FREQ模式误差为None"""
+        elapsed = time.monotonic() - self.started
+        if self.mode == self.MODE_MONITOR:
+            rows = self.counter.top(self.top_k)
+        else:
+            rows = [(key, freq, None) for freq, key in sorted(self.freq_top, reverse=True)]
+        return {
+            'rows': rows,
+            'total': self.counter.total,
+            'commands': self.commands,
+            'scanned': self.scanned,
+            'elapsed': elapsed,
+            'finished': not self.has_more() and not self.stopped,
+        }
+
+
+class HotKeyPanel(QWidget):
+    """热Key分析页面"""
+    
+    HEADERS = ["排名", "Key", "访问次数", "误差上限", "占比"]
+    
+    def __init__(self, tool, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.profile = None
+        self.task_id = None
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 10, 0, 0)
+        
+        options_layout = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItem("MONITOR采样", HotKeyProfile.MODE_MONITOR)
+        self.mode_combo.addItem("OBJECT FREQ扫描(LFU)", HotKeyProfile.MODE_FREQ)
+        self.mode_combo.currentIndexChanged.connect(self.update_controls)
+        
+        self.duration_input = QSpinBox()
+        self.duration_input.setRange(5, 3600)
+        self.duration_input.setValue(30)
+        self.duration_input.setSuffix(" 秒")
+        self.duration_input.setToolTip("MONITOR会降低Redis吞吐，请控制采样时长")
+        
+        self.top_k_input = QSpinBox()
+        self.top_k_input.setRange(10, 1000)
+        self.top_k_input.setValue(50)
+        
+        self.pattern_input = QLineEdit("*")
+        self.pattern_input.setPlaceholderText("key模式")
+        self.pattern_input.setFixedWidth(160)
+        
+        self.start_btn = QPushButton("▶ 开始")
+        self.start_btn.setFixedWidth(80)
+        self.start_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #dc3545;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #c82333;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.start_btn.clicked.connect(self.start_profile)
+        
+        self.stop_btn = QPushButton("⏹ 停止")
+        self.stop_btn.setFixedWidth(80)
+        self.stop_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.stop_btn.clicked.connect(self.stop_profile)
+        
+        for label_text, widget in (("方式:", self.mode_combo), ("时长:", self.duration_input),
+                                   ("Top K:", self.top_k_input), ("模式:", self.pattern_input)):
+            label = QLabel(label_text)
+            label.setStyleSheet("font-weight: bold;")
+            options_layout.addWidget(label)
+            options_layout.addWidget(widget)
+        options_layout.addWidget(self.start_btn)
+        options_layout.addWidget(self.stop_btn)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6c757d;")
+        layout.addWidget(self.status_label)
+        
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table, 1)
+        
+        self.update_controls()
+    
+    def start_profile(self):
+        """开始采样"""
+        thread = self.tool.connection_thread
+        if not (thread and thread.redis_client):
+            self.tool.show_message("警告", "请先连接到Redis", "warning")
+            return
+        
+        self.stop_profile()
+        self.profile = thread.create_hot_key_profile(
+            self.mode_combo.currentData(), self.top_k_input.value(),
+            self.duration_input.value(), self.pattern_input.text() or "*")
+        self.table.setRowCount(0)
+        monitor = self.profile.mode == HotKeyProfile.MODE_MONITOR
+        self.table.horizontalHeaderItem(2).setText("访问次数" if monitor else "LFU计数")
+        self.status_label.setText("采样中...")
+        self.submit_next_page()
+    
+    def submit_next_page(self):
+        """提交下一段采样任务"""
+        profile = self.profile
+        self.task_id = self.tool.submit_task(
+            self.tool.connection_thread.hot_key_page, profile,
+            on_success=lambda snapshot: self.on_page_done(profile, snapshot),
+            on_error=lambda error: self.on_profile_error(profile, error))
+        self.update_controls()
+    
+    def on_page_done(self, profile, snapshot):
+        """一段采样完成：刷新排行，未结束时继续"""
+        if profile is not self.profile:
+            return
+        self.task_id = None
+        self.show_snapshot(snapshot)
+        if profile.has_more() and self.tool.connection_thread:
+            self.submit_next_page()
+            return
+        self.close_monitors()
+        self.update_controls()
+    
+    def on_profile_error(self, profile, error):
+        """采样失败"""
+        self.task_id = None
+        self.status_label.setText(f"热Key分析失败: {error}")
+        if profile is self.profile:
+            profile.stopped = True
+            self.close_monitors()
+        self.update_controls()
+    
+    def show_snapshot(self, snapshot):
+        """显示排行和进度"""
+        profile = self.profile
+        rows = snapshot['rows']
+        total = snapshot['total']
+        self.table.setRowCount(len(rows))
+        for row, (key, count, error) in enumerate(rows):
+            share = f"{count / total:.2%}" if total and error is not None else "-"
+            values = (str(row + 1), key, str(count), str(error) if error is not None else "-", share)
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 1:
+                    item.setToolTip(key)
+                self.table.setItem(row, column, item)
+        
+        if profile.mode == HotKeyProfile.MODE_MONITOR:
+            elapsed = max(snapshot['elapsed'], 0.001)
+            text = (f"已采样 {snapshot['commands']} 条命令（{snapshot['commands'] / elapsed:.0f}/秒），"
+                    f"key访问 {total} 次，用时 {snapshot['elapsed']:.0f} 秒")
+        else:
+            text = f"已扫描 {snapshot['scanned']} 个key，列出LFU计数最高的 {len(rows)} 个"
+        if snapshot['finished']:
+            text = "完成：" + text
+        elif profile.stopped:
+            text = "已停止：" + text
+        self.status_label.setText(text)
+    
+    def stop_profile(self):
+        """停止采样，保留已有排行"""
+        if self.profile is not None:
+            self.profile.stopped = True
+        self.tool.cancel_task(self.task_id)
+        if self.task_id is not None:
+            self.task_id = None
+            self.status_label.setText("已停止：" + self.status_label.text())
+        self.close_monitors()
+        self.update_controls()
+    
+    def close_monitors(self):
+        """提交任务关闭MONITOR连接并注销采样状态"""
+        profile = self.profile
+        thread = self.tool.connection_thread
+        if profile is not None and thread:
+            self.tool.submit_task(thread.close_hot_key_monitors, profile)
+    
+    def reset(self):
+        """断开连接时清空"""
+        self.stop_profile()
+        self.profile = None
+        self.status_label.setText("")
+        self.table.setRowCount(0)
+    
+    def update_controls(self):
+        """根据状态更新控件"""
+        running = self.task_id is not None
+        monitor = self.mode_combo.currentData() == HotKeyProfile.MODE_MONITOR
+        self.start_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.mode_combo.setEnabled(not running)
+        self.duration_input.setEnabled(not running and monitor)
+        self.pattern_input.setEnabled(not running and not monitor)
+        self.top_k_input.setEnabled(not running)
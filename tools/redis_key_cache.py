@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis key元数据缓存
+按会话/数据库缓存key的类型和过期时间，支持本地过滤更窄的搜索模式
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def glob_to_regex(pattern):
+    """将Redis glob模式转换为正则表达式（支持 * ? [abc] [^a] [a-z] 和 \\ 转义）"""
+    i = 0
+    n = len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == '*':
+            parts.append('.*')
+        elif c == '?':
+            parts.append('.')
+        elif c == '\\' and i < n:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+        elif c == '[':
+            end = pattern.find(']', i + 1 if i < n and pattern[i] == '^' else i)
+            if end < 0:
+                parts.append(re.escape(c))
+                continue
+            body = pattern[i:end]
+            i = end + 1
+            negate = body.startswith('^')
+            if negate:
+                body = body[1:]
+            if not body:
+                parts.append(re.escape('[^]' if negate else '[]'))
+                continue
+            body = body.replace('\\', '\\\\')
+            parts.append(f"[{'^' if negate else ''}{body}]")
+        else:
+            parts.append(re.escape(c))
+    return re.compile(''.join(parts) + r'\Z', re.DOTALL)
+
+
+def literal_prefix(pattern):
+    """模式中第一个通配符之前的字面前缀"""
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c in '*?[':
+            break
+        if c == '\\':
+            i += 1
+            if i >= len(pattern):
+                break
+            c = pattern[i]
+        prefix.append(c)
+        i += 1
+    return ''.join(prefix)
+
+
+def pattern_covers(wide, narrow):
+    """判断模式wide匹配的key集合是否一定包含narrow匹配的集合"""
+    if wide == narrow or wide == '*':
+        return True
+    # 仅支持"前缀*"形式的宽模式
+    if not wide.endswith('*'):
+        return False
+    head = wide[:-1]
+    if any(c in head for c in '*?[\\'):
+        return False
+    return literal_prefix(narrow).startswith(head)
+
+
+class KeyMetadataCache:
+    """key元数据缓存
+    
+    每个条目保存类型和绝对过期时间，读取时再换算成剩余TTL，无需重新查询。
+    完整扫描过的模式会被记录下来，之后更窄的模式直接在本地过滤。
+    超出容量时按LRU淘汰，淘汰后缓存不再视为完整。
+    每次失去完整性（淘汰、标记过时、清空）时generation加一，扫描开始时记下它，
+    结束时如已变化则不记录完整，避免扫描期间被淘汰的key让模式被误认为完整。
+    """
+    
+    # 默认最多缓存的key数量
+    DEFAULT_MAX_ENTRIES = 1000000
+    # 完整扫描结果的有效期（秒），超过后重新扫描
+    DEFAULT_MAX_AGE = 600
+    
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_age=DEFAULT_MAX_AGE, persist_path=None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.persist_path = persist_path
+        # key -> (类型, 绝对过期时间；-1表示永久)
+        self.entries = OrderedDict()
+        # 完整扫描过的模式 -> 完成时间
+        self.complete_patterns = {}
+        self.generation = 0
+        self.lock = threading.RLock()
+        if persist_path:
+            self.load()
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def update(self, key_data, now=None):
+        """写入一批扫描结果 {key: {'type': ..., 'ttl': ...}}"""
+        now = now or time.time()
+        with self.lock:
+            for key, info in key_data.items():
+                ttl = info['ttl']
+                expire_at = now + ttl if ttl > 0 else -1
+                self.entries[key] = (info['type'], expire_at)
+                self.entries.move_to_end(key)
+            
+            evicted = False
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                evicted = True
+            if evicted:
+                self.complete_patterns.clear()
+                self.generation += 1
+    
+    def mark_complete(self, pattern, generation=None, now=None):
+        """记录某个模式已完整扫描；generation为扫描开始时的值，之后缓存失去过完整性时不记录"""
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.complete_patterns[pattern] = now or time.time()
+    
+    def covers(self, pattern, now=None):
+        """缓存是否包含该模式的全部key"""
+        now = now or time.time()
+        with self.lock:
+            for wide, completed_at in self.complete_patterns.items():
+                if now - completed_at <= self.max_age and pattern_covers(wide, pattern):
+                    return True
+        return False
+    
+    def iter_matching(self, pattern, batch_size=1000, now=None):
+        """按批次产出匹配模式的key数据，TTL由绝对过期时间换算，已过期的条目被丢弃"""
+        regex = None if pattern == '*' else glob_to_regex(pattern)
+        now = now or time.time()
+        with self.lock:
+            snapshot = list(self.entries.items())
+        
+        batch = {}
+        expired = []
+        for key, (key_type, expire_at) in snapshot:
+            if regex is not None and not regex.match(key):
+                continue
+            if expire_at == -1:
+                ttl = -1
+            else:
+                ttl = int(expire_at - now + 0.999)
+                if ttl <= 0:
+                    expired.append(key)
+                    continue
+            batch[key] = {'type': key_type, 'ttl': ttl}
+            if len(batch) >= batch_size:
+                yield batch
+                batch = {}
+        if batch:
+            yield batch
+        
+        with self.lock:
+            for key in expired:
+                self.entries.pop(key, None)
+    
+    def invalidate_key(self, key):
+        """删除单个key的缓存（例如收到键空间通知时）"""
+        with self.lock:
+            self.entries.pop(key, None)
+    
+    def set_ttl(self, key, ttl, now=None):
+        """更新已缓存key的过期时间（-1表示永久），未缓存的key忽略"""
+        now = now or time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries[key] = (entry[0], now + ttl if ttl > 0 else -1)
+    
+    def mark_stale(self):
+        """缓存可能缺少新写入的key，不再视为完整"""
+        with self.lock:
+            self.complete_patterns.clear()
+            self.generation += 1
+    
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.entries.clear()
+            self.complete_patterns.clear()
+            self.generation += 1
+        if self.persist_path and os.path.exists(self.persist_path):
+            try:
+                os.remove(self.persist_path)
+            except OSError as e:
+                print(f"删除key缓存文件失败: {e}")
+    
+    def load(self):
+        """从磁盘加载缓存"""
+        try:
+            if not os.path.exists(self.persist_path):
+                return
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            with self.lock:
+                for key, key_type, expire_at in data.get('entries', []):
+                    if expire_at == -1 or expire_at > now:
+                        self.entries[key] = (key_type, expire_at)
+                self.complete_patterns = dict(data.get('complete_patterns', {}))
+            print(f"已加载 {len(self.entries)} 条key缓存")
+        except Exception as e:
+            print(f"加载key缓存失败: {e}")
+    
+    def save(self):
+        """保存缓存到磁盘"""
+        if not self.persist_path:
+            return
+        try:
+            with self.lock:
+                data = {
+                    'entries': [[key, key_type, expire_at]
+                                for key, (key_type, expire_at) in self.entries.items()],
+                    'complete_patterns': dict(self.complete_patterns),
+                }
+            os.makedirs(os.path.dirname(self.persist_path), exist_ok=True)
+            tmp_path = self.persist_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"保存key缓存失败: {e}")
+
+
+# 进程内的缓存实例：会话/数据库标识 -> KeyMetadataCache
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def cache_scope(host, port, db=0, cluster_mode=False):
+    """会话/数据库标识"""
+    return f"{host}_{port}_cluster" if cluster_mode else f"{host}_{port}_db{db}"
+
+
+def cache_file_path(scope):
+    """磁盘缓存文件路径"""
+    cache_dir = os.path.join(os.path.expanduser("~"), ".redis_key_cache")
+    return os.path.join(cache_dir, re.sub(r'[^\w.-]', '_', scope) + ".json")
+
+
+def get_key_cache(host, port, db=0, cluster_mode=False, persist=False):
+    """获取(或创建)会话对应的缓存，断开重连后仍复用同一个实例"""
+    scope = cache_scope(host, port, db, cluster_mode)
+    with _caches_lock:
+        cache = _caches.get(scope)
+        if cache is None:
+            cache = KeyMetadataCache(persist_path=cache_file_path(scope) if persist else None)
+            _caches[scope] = cache
+        elif persist and not cache.persist_path:
+            cache.persist_path = cache_file_path(scope)
+        return cache
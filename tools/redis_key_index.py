@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis key本地索引
+用流式扫描得到的key建立三元组（trigram）倒排索引，子串、正则和模糊搜索在本地完成，
+不必为每次搜索重新SCAN；新的扫描批次到达时增量加入索引
+"""
+
+import heapq
+import re
+from array import array
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    # Python 3.10及以下
+    import sre_parse
+
+
+# 搜索方式：Glob交给服务端SCAN，其余在本地索引中搜索
+SEARCH_GLOB = 'glob'
+SEARCH_SUBSTRING = 'substring'
+SEARCH_REGEX = 'regex'
+SEARCH_FUZZY = 'fuzzy'
+
+# 三元组长度，字面串短于该长度时逐个匹配
+GRAM_SIZE = 3
+# 单次搜索最多展示的key数量
+SEARCH_RESULT_LIMIT = 100000
+
+
+def key_grams(text):
+    """文本（转为小写）中不重复的三元组"""
+    text = text.lower()
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def regex_literal(pattern):
+    """正则中必须出现的最长字面串，只看顶层连续的字面字符，取不到时返回空串"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return ''
+    best = ''
+    run = []
+    for op, arg in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg))
+            continue
+        best = max(best, ''.join(run), key=len)
+        run = []
+    return max(best, ''.join(run), key=len)
+
+
+class KeyQuery:
+    """一次本地搜索的条件，正则无效时构造抛出re.error"""
+    
+    MODE_NAMES = {SEARCH_SUBSTRING: "子串", SEARCH_REGEX: "正则", SEARCH_FUZZY: "模糊"}
+    
+    def __init__(self, mode, text):
+        self.mode = mode
+        self.text = text
+        if mode == SEARCH_SUBSTRING:
+            self.pattern = re.compile(re.escape(text), re.IGNORECASE)
+            self.literal = text
+        elif mode == SEARCH_REGEX:
+            self.pattern = re.compile(text)
+            self.literal = regex_literal(text)
+        else:
+            # 模糊：查询中的字符按顺序出现即可；用排除字符类代替.*?，不会回溯
+            chars = [c for c in text if not c.isspace()]
+            parts = [re.escape(chars[0])] if chars else []
+            parts.extend(f"[^{re.escape(c)}]*{re.escape(c)}" for c in chars[1:])
+            self.pattern = re.compile(''.join(parts), re.IGNORECASE)
+            self.literal = ''
+    
+    def rank(self, key):
+        """模糊搜索的排序依据：匹配跨度越小、key越短越靠前"""
+        match = self.pattern.search(key)
+        return match.end() - match.start(), len(key)
+    
+    def filter(self, key_data):
+        """筛选一批扫描结果 {key: info}"""
+        return {key: info for key, info in key_data.items() if self.pattern.search(key)}
+    
+    def describe(self):
+        """条件描述"""
+        return f"{self.MODE_NAMES[self.mode]} \"{self.text}\""
+
+
+class KeyIndex:
+    """key本地索引
+    
+    key、类型、TTL按列存放（与key列表模型一致），另以三元组 -> key编号的倒排表加速查找；
+    编号按加入顺序递增，倒排表天然有序。删除的key只做标记，搜索时跳过，再次扫描到时恢复。
+    TTL与列表中的一样是扫描时的快照。
+    """
+    
+    def __init__(self):
+        self.clear()
+    
+    def __len__(self):
+        return len(self.keys) - len(self.deleted)
+    
+    def clear(self):
+        """清空索引"""
+        self.keys = []
+        self.types = array('B')
+        self.ttls = array('q')
+        self.type_names = []
+        self.type_codes = {}
+        # key -> 编号
+        self.ids = {}
+        # 三元组 -> 包含它的key编号
+        self.postings = {}
+        self.deleted = set()
+    
+    def type_code(self, key_type):
+        """类型名 -> 紧凑编码"""
+        code = self.type_codes.get(key_type)
+        if code is None:
+            code = len(self.type_names)
+            self.type_names.append(key_type)
+            self.type_codes[key_type] = code
+        return code
+    
+    def add(self, key_data):
+        """加入一批扫描结果 {key: {'type': ..., 'ttl': ...}}，已有的key更新类型和TTL"""
+        for key, info in key_data.items():
+            key_id = self.ids.get(key)
+            if key_id is not None:
+                self.types[key_id] = self.type_code(info['type'])
+                self.ttls[key_id] = info['ttl']
+                self.deleted.discard(key_id)
+                continue
+            
+            key_id = len(self.keys)
+            self.ids[key] = key_id
+            self.keys.append(key)
+            self.types.append(self.type_code(info['type']))
+            self.ttls.append(info['ttl'])
+            for gram in key_grams(key):
+                postings = self.postings.get(gram)
+                if postings is None:
+                    postings = self.postings[gram] = array('I')
+                postings.append(key_id)
+    
+    def remove(self, keys):
+        """标记已删除的key"""
+        for key in keys:
+            key_id = self.ids.get(key)
+            if key_id is not None:
+                self.deleted.add(key_id)
+    
+    def info(self, key_id):
+        """编号对应的元数据"""
+        return {'type': self.type_names[self.types[key_id]], 'ttl': self.ttls[key_id]}
+    
+    def candidates(self, literal):
+        """包含literal全部三元组的key编号（升序），literal过短无法预筛时返回None"""
+        grams = key_grams(literal)
+        if not grams:
+            return None
+        lists = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        result = set(lists[0])
+        for postings in lists[1:]:
+            if not result:
+                break
+            result.intersection_update(postings)
+        return sorted(result)
+    
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        """返回(最多limit个匹配的key数据, 匹配总数)；模糊搜索按匹配跨度、key长度排序"""
+        candidates = self.candidates(query.literal)
+        if candidates is None:
+            candidates = range(len(self.keys))
+        
+        keys = self.keys
+        deleted = self.deleted
+        search = query.pattern.search
+        matched = [key_id for key_id in candidates if key_id not in deleted and search(keys[key_id])]
+        
+        if query.mode == SEARCH_FUZZY:
+            shown = heapq.nsmallest(limit, matched, key=lambda key_id: query.rank(keys[key_id]))
+        else:
+            shown = matched[:limit]
+        return {keys[key_id]: self.info(key_id) for key_id in shown}, len(matched)
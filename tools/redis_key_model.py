@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis key列表模型
+列式存储key/类型/TTL，配合视图按需渲染海量key
+"""
+
+import bisect
+from array import array
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+def descending_ranges(indices):
+    """升序下标 -> 从后往前的连续区间[(first, last)]，删除时前面的下标不受影响"""
+    ranges = []
+    for i in indices:
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return [(first, last) for first, last in reversed(ranges)]
+
+
+class RedisKeyModel(QAbstractTableModel):
+    """key列表模型
+    
+    数据按列存放：key字符串列表、类型编码数组、TTL数组，不为每行创建对象。
+    视图滚动到底部时通过canFetchMore/fetchMore逐批暴露行，排序只重排行号索引。
+    实时更新时按key更新或删除行，key到存储下标的映射在第一次需要时才建立；
+    删除的key在存储中留空（key为None），只从行顺序中移除，空位超过一半时才压缩存储。
+    """
+    
+    HEADERS = ["Key", "Type", "TTL"]
+    # 每次fetchMore暴露给视图的行数
+    FETCH_BATCH_SIZE = 500
+    # 一次删除涉及的可见连续区间超过该数量时整体重置视图，不逐段发信号
+    REMOVE_SIGNAL_LIMIT = 100
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.keys = []
+        self.types = array('B')
+        self.ttls = array('q')
+        self.type_names = []
+        self.type_codes = {}
+        # 行号 -> 存储下标；None表示按加载顺序且存储中没有空位
+        self.order = None
+        # 存储中已删除的空位数
+        self.holes = 0
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+        # 已暴露给视图的行数
+        self.visible_rows = 0
+        # key -> 存储下标，实时更新开启后才维护
+        self.positions = None
+    
+    # ---- 存储 ----
+    
+    def type_code(self, key_type):
+        """类型名 -> 紧凑编码"""
+        code = self.type_codes.get(key_type)
+        if code is None:
+            code = len(self.type_names)
+            self.type_names.append(key_type)
+            self.type_codes[key_type] = code
+        return code
+    
+    def total_count(self):
+        """已加载的key总数（包括尚未暴露给视图的行）"""
+        return len(self.keys) - self.holes
+    
+    def storage_index(self, row):
+        """视图行号 -> 存储下标"""
+        return self.order[row] if self.order is not None else row
+    
+    def key_at(self, row):
+        """获取行对应的key"""
+        return self.keys[self.storage_index(row)]
+    
+    def type_at(self, row):
+        """获取行对应的类型"""
+        return self.type_names[self.types[self.storage_index(row)]]
+    
+    def ttl_at(self, row):
+        """获取行对应的TTL"""
+        return self.ttls[self.storage_index(row)]
+    
+    def clear(self):
+        """清空所有数据"""
+        self.beginResetModel()
+        self.keys = []
+        self.types = array('B')
+        self.ttls = array('q')
+        self.order = None if self.sort_column < 0 else array('q')
+        self.holes = 0
+        self.visible_rows = 0
+        if self.positions is not None:
+            self.positions = {}
+        self.endResetModel()
+    
+    def append_keys(self, data):
+        """追加一批key数据 {key: {'type': ..., 'ttl': ...}}"""
+        if not data:
+            return
+        
+        positions = self.positions
+        if positions is not None:
+            # 实时更新可能已经加入了这些key，扫描到时只更新
+            data = self.update_keys(data)
+        start = len(self.keys)
+        for key, info in data.items():
+            if positions is not None:
+                positions[key] = len(self.keys)
+            self.keys.append(key)
+            self.types.append(self.type_code(info['type']))
+            self.ttls.append(info['ttl'])
+        
+        if self.sort_column >= 0 and start < len(self.keys):
+            # 已排序：只排序新的一批，再按二分位置并入现有行顺序
+            self.apply_order(self.merged_order(self.order, range(start, len(self.keys))))
+        elif self.order is not None:
+            # 按加载顺序但存储有空位：新行接在末尾
+            self.order.extend(range(start, len(self.keys)))
+        
+        # 视图尚未填满首屏时直接暴露新行，其余等待fetchMore
+        if self.visible_rows < self.FETCH_BATCH_SIZE:
+            self.expose_rows(self.FETCH_BATCH_SIZE - self.visible_rows)
+    
+    def key_positions(self):
+        """key -> 存储下标，第一次调用时建立，之后随追加和删除维护"""
+        if self.positions is None:
+            self.positions = {key: i for i, key in enumerate(self.keys) if key is not None}
+        return self.positions
+    
+    def update_keys(self, data):
+        """更新已加载key的类型和TTL，返回不在列表中的key数据
+        
+        按类型或TTL排序时，取值变化的行先移出行顺序，更新后再并回去
+        """
+        positions = self.key_positions()
+        missing = {}
+        moved = []
+        reorder = self.sort_column in (1, 2)
+        for key, info in data.items():
+            i = positions.get(key)
+            if i is None:
+                missing[key] = info
+                continue
+            code = self.type_code(info['type'])
+            if reorder and (code != self.types[i] or info['ttl'] != self.ttls[i]):
+                moved.append((i, code, info['ttl']))
+                continue
+            self.types[i] = code
+            self.ttls[i] = info['ttl']
+        if moved:
+            self.move_rows(moved)
+        if len(missing) < len(data) and self.visible_rows:
+            self.dataChanged.emit(self.index(0, 1), self.index(self.visible_rows - 1, 2))
+        return missing
+    
+    def move_rows(self, moved):
+        """排序列取值变化的行[(存储下标, 类型编码, TTL)]移到新位置，行数不变，按布局变化通知视图"""
+        rows = sorted(self.find_row(i) for i, _, _ in moved)
+        order = self.without_rows(self.order, rows)
+        for i, code, ttl in moved:
+            self.types[i] = code
+            self.ttls[i] = ttl
+        self.apply_order(self.merged_order(order, [i for i, _, _ in moved]))
+    
+    def remove_keys(self, keys):
+        """删除一批key对应的行，返回删除的行数
+        
+        存储中只留空位，行号通过二分查找定位后从行顺序中整段复制剔除；
+        已暴露的行按连续区间从后往前发出删除信号，选中和滚动位置由视图保持，
+        区间过多时整体重置视图。
+        """
+        positions = self.key_positions()
+        doomed = [positions.pop(key) for key in set(keys) if key in positions]
+        if not doomed:
+            return 0
+        
+        if self.order is None:
+            self.order = array('q', range(len(self.keys)))
+        rows = sorted(self.find_row(i) for i in doomed)
+        for i in doomed:
+            self.keys[i] = None
+        self.holes += len(doomed)
+        
+        split = bisect.bisect_left(rows, self.visible_rows)
+        shown = descending_ranges(rows[:split])
+        if len(shown) > self.REMOVE_SIGNAL_LIMIT:
+            self.beginResetModel()
+            self.order = self.without_rows(self.order, rows)
+            self.visible_rows -= split
+            self.endResetModel()
+        else:
+            # 先剔除未暴露的行（不影响可见行号），再逐段删除可见行
+            self.order = self.without_rows(self.order, rows[split:])
+            for first, last in shown:
+                self.beginRemoveRows(QModelIndex(), first, last)
+                del self.order[first:last + 1]
+                self.visible_rows -= last - first + 1
+                self.endRemoveRows()
+        
+        if self.holes * 2 > len(self.keys):
+            self.compact()
+        return len(doomed)
+    
+    @staticmethod
+    def without_rows(order, rows):
+        """去掉升序行号rows后的行顺序，保留的行整段复制"""
+        kept = array('q')
+        previous = 0
+        for row in rows:
+            kept.extend(order[previous:row])
+            previous = row + 1
+        kept.extend(order[previous:])
+        return kept
+    
+    def compact(self):
+        """回收存储空位并重新映射行顺序，行号不变"""
+        keep = [i for i, key in enumerate(self.keys) if key is not None]
+        new_index = array('q', bytes(8 * len(self.keys)))
+        for new, old in enumerate(keep):
+            new_index[old] = new
+        self.keys = [self.keys[i] for i in keep]
+        self.types = array('B', (self.types[i] for i in keep))
+        self.ttls = array('q', (self.ttls[i] for i in keep))
+        self.holes = 0
+        if self.sort_column < 0:
+            self.order = None
+        else:
+            self.order = array('q', (new_index[i] for i in self.order))
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+    
+    def expose_rows(self, count):
+        """向视图暴露更多已加载的行"""
+        count = min(count, self.total_count() - self.visible_rows)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.visible_rows, self.visible_rows + count - 1)
+        self.visible_rows += count
+        self.endInsertRows()
+    
+    # ---- 排序 ----
+    
+    def sort_key(self, column):
+        """返回按列排序使用的取值函数（参数为存储下标）"""
+        if column == 1:
+            return lambda i: self.type_names[self.types[i]]
+        if column == 2:
+            return self.ttls.__getitem__
+        return self.keys.__getitem__
+    
+    def order_key(self):
+        """当前排序的完整比较键：取值相同时按存储下标升序，行顺序因此是全序，可以二分查找"""
+        value = self.sort_key(self.sort_column)
+        if self.sort_order == Qt.DescendingOrder:
+            return lambda i: (value(i), -i)
+        return lambda i: (value(i), i)
+    
+    def sorted_indices(self, indices):
+        """按当前排序列对存储下标排序"""
+        reverse = self.sort_order == Qt.DescendingOrder
+        return array('q', sorted(indices, key=self.order_key(), reverse=reverse))
+    
+    def search_row(self, order, i, lo=0):
+        """存储下标i在已排序的行顺序order中应处的行号（第一个不排在它前面的行）"""
+        key = self.order_key()
+        target = key(i)
+        descending = self.sort_order == Qt.DescendingOrder
+        hi = len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = key(order[mid])
+            if (value > target) if descending else (value < target):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def merged_order(self, order, indices):
+        """把一批存储下标排序后并入已排序的行顺序，原有的行整段复制"""
+        merged = array('q')
+        previous = 0
+        for i in self.sorted_indices(indices):
+            row = self.search_row(order, i, previous)
+            merged.extend(order[previous:row])
+            merged.append(i)
+            previous = row
+        merged.extend(order[previous:])
+        return merged
+    
+    def find_row(self, i):
+        """存储下标 -> 当前行号"""
+        order = self.order
+        if order is None:
+            return i
+        if self.sort_column < 0:
+            # 按加载顺序时行顺序是升序的存储下标
+            row = bisect.bisect_left(order, i)
+        else:
+            row = self.search_row(order, i)
+        if row < len(order) and order[row] == i:
+            return row
+        return order.index(i)
+    
+    def apply_order(self, order):
+        """替换行顺序，同时保持选中等持久索引指向原来的key"""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        old_indices = [self.storage_index(index.row()) for index in persistent]
+        self.order = order
+        if persistent:
+            # 持久索引通常只有选中的几行，逐个二分查找新行号
+            new_indexes = []
+            for index, i in zip(persistent, old_indices):
+                row = self.find_row(i)
+                if row < self.visible_rows:
+                    new_indexes.append(self.index(row, index.column()))
+                else:
+                    new_indexes.append(QModelIndex())
+            self.changePersistentIndexList(persistent, new_indexes)
+        self.layoutChanged.emit()
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        """在模型中排序，不触碰视图控件"""
+        self.sort_column = column
+        self.sort_order = order
+        if column < 0:
+            # 取消排序：恢复加载顺序
+            self.apply_order(None if self.order is None or not self.holes else array('q', sorted(self.order)))
+            return
+        indices = self.order if self.order is not None else range(len(self.keys))
+        self.apply_order(self.sorted_indices(indices))
+    
+    # ---- QAbstractItemModel接口 ----
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.visible_rows
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self.visible_rows < self.total_count()
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        self.expose_rows(self.FETCH_BATCH_SIZE)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        row = index.row()
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return self.key_at(row)
+            if column == 1:
+                return self.type_at(row)
+            ttl = self.ttl_at(row)
+            return str(ttl) if ttl > 0 else '永久'
+        if role == Qt.UserRole and column == 0:
+            return self.type_at(row)
+        return None
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis keyspace通知监听
+订阅__keyevent@<db>__（集群中每个主节点各订阅一次），工作线程把一段时间内的事件按key合并：
+同一个key只保留最后一次是删除还是变化，变化的key批量重新获取类型和TTL，
+界面每段只应用一次增删改，写入风暴时刷新频率不随事件速率增长
+"""
+
+import threading
+import time
+
+
+# 每段监听的时长（秒），界面每段应用一次变更
+WATCH_SLICE_SECONDS = 0.5
+# 一段内最多记录的key数，超出的事件只计数，由界面提示重新扫描
+WATCH_PENDING_LIMIT = 10000
+# 需要开启的通知类型：E为keyevent频道，其余为通用、各数据类型、过期和淘汰事件
+NOTIFY_FLAGS = 'Eg$lshzxet'
+# A是g$lshzxet的别名
+NOTIFY_ALIAS = 'g$lshzxet'
+
+# key已不存在的事件，其余事件都需要重新获取类型和TTL
+REMOVE_EVENTS = frozenset(('del', 'expired', 'evicted', 'rename_from', 'move_from'))
+KEY_REMOVED = 'removed'
+KEY_CHANGED = 'changed'
+
+
+def missing_notify_flags(flags):
+    """notify-keyspace-events中缺少的通知类型"""
+    flags = (flags or '').replace('A', NOTIFY_ALIAS)
+    return ''.join(flag for flag in NOTIFY_FLAGS if flag not in flags)
+
+
+def parse_notify_config(reply):
+    """CONFIG GET notify-keyspace-events的返回值，兼容字典和[名称, 值]列表"""
+    if isinstance(reply, dict):
+        return reply.get('notify-keyspace-events', '')
+    if isinstance(reply, (list, tuple)) and len(reply) > 1:
+        return reply[1]
+    return ''
+
+
+class KeyspaceWatch:
+    """一次keyspace通知监听的状态
+    
+    工作线程调用push_message写入事件，每段结束时drain取走合并后的变更；
+    订阅对象按节点保存，异步集群模式下还保存各节点的专用客户端。
+    """
+    
+    def __init__(self, db, limit=WATCH_PENDING_LIMIT):
+        self.db = db
+        self.limit = limit
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.received = 0
+        self.coalesced = 0
+        self.overflow = 0
+        self.started = time.monotonic()
+        # 节点名 -> 订阅对象
+        self.pubsubs = {}
+        self.pubsub_clients = []
+        self.stopped = False
+    
+    def channel_pattern(self):
+        """订阅的频道模式"""
+        return f"__keyevent@{self.db}__:*"
+    
+    def push_message(self, message):
+        """记录一条通知，频道为__keyevent@<db>__:<事件>，内容为key"""
+        if not message or message.get('type') != 'pmessage':
+            return
+        event = message['channel'].rpartition(':')[2]
+        key = message['data']
+        state = KEY_REMOVED if event in REMOVE_EVENTS else KEY_CHANGED
+        with self.lock:
+            self.received += 1
+            if key in self.pending:
+                self.coalesced += 1
+            elif len(self.pending) >= self.limit:
+                self.overflow += 1
+                return
+            self.pending[key] = state
+    
+    def drain(self):
+        """取走合并后的变更：(删除的key列表, 变化的key列表)"""
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+        removed = [key for key, state in pending.items() if state == KEY_REMOVED]
+        changed = [key for key, state in pending.items() if state == KEY_CHANGED]
+        return removed, changed
+    
+    def slice_deadline(self):
+        """本段监听的截止时间"""
+        return time.monotonic() + WATCH_SLICE_SECONDS
+    
+    def build_changes(self, removed, changed, key_data):
+        """组合一段的变更：变化后已不存在的key计为删除"""
+        removed = removed + [key for key in changed if key not in key_data]
+        return {
+            'removed': removed,
+            'updated': key_data,
+            'received': self.received,
+            'coalesced': self.coalesced,
+            'overflow': self.overflow,
+        }
+    
+    def rate(self):
+        """平均每秒事件数"""
+        elapsed = time.monotonic() - self.started
+        return self.received / elapsed if elapsed > 0 else 0
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis大Key分析
+流式扫描key，用MEMORY USAGE和元素计数统计内存占用，按类型和前缀保留有界的Top N排行
+"""
+
+import heapq
+import random
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QLineEdit, QSpinBox, QComboBox, QSplitter, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import Qt
+
+
+def format_bytes(size):
+    """字节数转换为易读的单位"""
+    size = float(size or 0)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def push_top(heap, entry, limit):
+    """把(内存, key, ...)放入容量为limit的最小堆，只保留内存最大的limit项"""
+    if len(heap) < limit:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+class KeyGroupStats:
+    """一组key（同类型或同前缀）的汇总：数量、总内存、内存最大的若干个key"""
+    
+    __slots__ = ('count', 'memory', 'top')
+    
+    def __init__(self):
+        self.count = 0
+        self.memory = 0
+        self.top = []
+    
+    def add(self, entry, limit):
+        """加入一个(内存, key, 类型, 元素数, 编码)条目"""
+        self.count += 1
+        self.memory += entry[0]
+        push_top(self.top, entry, limit)
+    
+    def to_dict(self):
+        """按内存从大到小输出"""
+        return {
+            'count': self.count,
+            'memory': self.memory,
+            'top': sorted(self.top, reverse=True),
+        }
+
+
+class BigKeyReport:
+    """大Key排行
+    
+    只保存汇总值和有界堆：全局/每个类型保留Top N，每个前缀保留较小的Top列表，
+    前缀数量超过上限后新前缀计入"(其他)"，内存占用与数据库的key总数无关。
+    """
+    
+    DEFAULT_TOP_N = 50
+    # 每个前缀保留的最大key数量
+    PREFIX_TOP_N = 10
+    # 单独统计的前缀数量上限
+    MAX_PREFIXES = 5000
+    NO_PREFIX = "(无前缀)"
+    OTHER_PREFIX = "(其他)"
+    
+    def __init__(self, top_n=DEFAULT_TOP_N, delimiter=":", prefix_depth=1,
+                 max_prefixes=MAX_PREFIXES):
+        self.top_n = max(1, int(top_n))
+        self.delimiter = delimiter
+        self.prefix_depth = max(1, int(prefix_depth))
+        self.max_prefixes = max_prefixes
+        self.total = KeyGroupStats()
+        self.types = {}
+        self.prefixes = {}
+    
+    def key_prefix(self, key):
+        """key的前缀：按分隔符取前prefix_depth段（保留末尾分隔符）"""
+        if not self.delimiter:
+            return self.NO_PREFIX
+        parts = key.split(self.delimiter, self.prefix_depth)
+        if len(parts) == 1:
+            return self.NO_PREFIX
+        depth = min(self.prefix_depth, len(parts) - 1)
+        return self.delimiter.join(parts[:depth]) + self.delimiter
+    
+    def add(self, key, key_type, memory, elements=None, encoding=None):
+        """记录一个key的分析结果"""
+        entry = (memory or 0, key, key_type, elements, encoding)
+        self.total.add(entry, self.top_n)
+        
+        stats = self.types.get(key_type)
+        if stats is None:
+            stats = self.types[key_type] = KeyGroupStats()
+        stats.add(entry, self.top_n)
+        
+        prefix = self.key_prefix(key)
+        stats = self.prefixes.get(prefix)
+        if stats is None:
+            if len(self.prefixes) >= self.max_prefixes:
+                prefix = self.OTHER_PREFIX
+                stats = self.prefixes.get(prefix)
+            if stats is None:
+                stats = self.prefixes[prefix] = KeyGroupStats()
+        stats.add(entry, min(self.PREFIX_TOP_N, self.top_n))
+    
+    def snapshot(self):
+        """当前排行的快照（可安全地交给GUI线程）；前缀按总内存取前top_n个"""
+        prefixes = heapq.nlargest(self.top_n, self.prefixes.items(),
+                                  key=lambda item: item[1].memory)
+        return {
+            'total': self.total.to_dict(),
+            'types': {key_type: stats.to_dict() for key_type, stats in self.types.items()},
+            'prefixes': [dict(stats.to_dict(), prefix=prefix) for prefix, stats in prefixes],
+            'prefix_count': len(self.prefixes),
+        }
+
+
+class MemoryAnalysis:
+    """一次大Key分析的扫描状态
+    
+    每个节点维护独立游标，与key浏览的扫描互不影响；每个任务只推进一页，
+    分析过程中工作线程仍可处理浏览、取值等其他请求。
+    """
+    
+    def __init__(self, pattern, cursors, sample_rate=1.0, report=None):
+        self.pattern = pattern
+        # 节点名 -> 游标（单机模式节点名为None）
+        self.cursors = cursors
+        self.sample_rate = min(1.0, max(0.0001, float(sample_rate)))
+        self.report = report or BigKeyReport()
+        self.scanned = 0
+        self.stopped = False
+        self.random = random.Random()
+    
+    def has_more(self):
+        """是否还有未扫描完的节点"""
+        return bool(self.cursors) and not self.stopped
+    
+    def sample(self, keys):
+        """按采样率抽取要分析的key"""
+        if self.sample_rate >= 1.0:
+            return list(keys)
+        return [key for key in keys if self.random.random() < self.sample_rate]
+    
+    def advance(self, node_name, cursor, scanned):
+        """记录一个节点的一页扫描"""
+        self.scanned += scanned
+        if cursor == 0:
+            self.cursors.pop(node_name, None)
+        else:
+            self.cursors[node_name] = cursor
+    
+    def snapshot(self):
+        """报告快照，附带扫描进度"""
+        data = self.report.snapshot()
+        data['scanned'] = self.scanned
+        data['sample_rate'] = self.sample_rate
+        data['finished'] = not self.cursors
+        return data
+
+
+class MemoryAnalyzerPanel(QWidget):
+    """大Key分析页面
+    
+    通过RedisTool的任务队列逐页提交分析任务，每页返回后刷新排行。
+    """
+    
+    ALL_TYPES = "全部类型"
+    
+    def __init__(self, tool, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.analysis = None
+        self.task_id = None
+        self.snapshot = None
+        # 当前排行过滤：('all', None) / ('type', 类型) / ('prefix', 前缀)
+        self.key_filter = ('all', None)
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 10, 0, 0)
+        
+        options_layout = QHBoxLayout()
+        self.pattern_input = QLineEdit("*")
+        self.pattern_input.setPlaceholderText("key模式")
+        self.pattern_input.setFixedWidth(160)
+        
+        self.top_n_input = QSpinBox()
+        self.top_n_input.setRange(10, 1000)
+        self.top_n_input.setValue(BigKeyReport.DEFAULT_TOP_N)
+        
+        self.sample_input = QSpinBox()
+        self.sample_input.setRange(1, 100)
+        self.sample_input.setValue(100)
+        self.sample_input.setSuffix(" %")
+        self.sample_input.setToolTip("只分析部分key，生产环境可降低采样率减少开销")
+        
+        self.delimiter_input = QLineEdit(":")
+        self.delimiter_input.setFixedWidth(40)
+        self.depth_input = QSpinBox()
+        self.depth_input.setRange(1, 10)
+        self.depth_input.setValue(1)
+        
+        self.start_btn = QPushButton("▶ 开始分析")
+        self.start_btn.setFixedWidth(100)
+        self.start_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #6f42c1;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #5e2e8c;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.start_btn.clicked.connect(self.start_analysis)
+        
+        self.stop_btn = QPushButton("⏹ 停止")
+        self.stop_btn.setFixedWidth(80)
+        self.stop_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.stop_btn.clicked.connect(self.stop_analysis)
+        self.stop_btn.setEnabled(False)
+        
+        for label_text, widget in (("模式:", self.pattern_input), ("Top N:", self.top_n_input),
+                                   ("采样率:", self.sample_input), ("分隔符:", self.delimiter_input),
+                                   ("前缀层级:", self.depth_input)):
+            label = QLabel(label_text)
+            label.setStyleSheet("font-weight: bold;")
+            options_layout.addWidget(label)
+            options_layout.addWidget(widget)
+        options_layout.addWidget(self.start_btn)
+        options_layout.addWidget(self.stop_btn)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6c757d;")
+        layout.addWidget(self.status_label)
+        
+        splitter = QSplitter(Qt.Horizontal)
+        
+        # 左侧：前缀汇总
+        self.prefix_table = self.create_table(["前缀", "Key数", "内存", "平均"])
+        self.prefix_table.cellClicked.connect(self.on_prefix_clicked)
+        
+        # 右侧：大Key排行
+        keys_panel = QWidget()
+        keys_layout = QVBoxLayout(keys_panel)
+        keys_layout.setContentsMargins(0, 0, 0, 0)
+        filter_layout = QHBoxLayout()
+        self.type_combo = QComboBox()
+        self.type_combo.addItem(self.ALL_TYPES)
+        self.type_combo.activated.connect(self.on_type_selected)
+        self.filter_label = QLabel("")
+        self.filter_label.setStyleSheet("color: #6c757d;")
+        filter_layout.addWidget(self.type_combo)
+        filter_layout.addWidget(self.filter_label)
+        filter_layout.addStretch()
+        self.key_table = self.create_table(["Key", "类型", "内存", "元素数", "编码"])
+        keys_layout.addLayout(filter_layout)
+        keys_layout.addWidget(self.key_table)
+        
+        splitter.addWidget(self.prefix_table)
+        splitter.addWidget(keys_panel)
+        splitter.setSizes([300, 500])
+        layout.addWidget(splitter, 1)
+    
+    def create_table(self, headers):
+        """创建只读的排行表格"""
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().setVisible(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        return table
+    
+    def start_analysis(self):
+        """开始新的分析"""
+        thread = self.tool.connection_thread
+        if not (thread and thread.redis_client):
+            self.tool.show_message("警告", "请先连接到Redis", "warning")
+            return
+        
+        self.stop_analysis()
+        report = BigKeyReport(self.top_n_input.value(), self.delimiter_input.text(),
+                              self.depth_input.value())
+        self.analysis = thread.create_memory_analysis(
+            self.pattern_input.text() or "*", self.sample_input.value() / 100.0, report)
+        self.snapshot = None
+        self.key_filter = ('all', None)
+        self.prefix_table.setRowCount(0)
+        self.key_table.setRowCount(0)
+        self.status_label.setText("分析中...")
+        self.submit_next_page()
+    
+    def submit_next_page(self):
+        """提交下一页分析任务"""
+        analysis = self.analysis
+        self.task_id = self.tool.submit_task(
+            self.tool.connection_thread.analyze_memory_page, analysis,
+            on_success=lambda snapshot: self.on_page_done(analysis, snapshot),
+            on_error=self.on_analysis_error)
+        self.update_controls()
+    
+    def on_page_done(self, analysis, snapshot):
+        """一页分析完成：刷新排行，未结束时继续下一页"""
+        if analysis is not self.analysis:
+            return
+        self.task_id = None
+        self.snapshot = snapshot
+        self.update_status()
+        self.refresh_tables()
+        if analysis.has_more() and self.tool.connection_thread:
+            self.submit_next_page()
+        else:
+            self.update_controls()
+    
+    def on_analysis_error(self, error):
+        """分析任务失败"""
+        self.task_id = None
+        self.status_label.setText(f"分析失败: {error}")
+        self.update_controls()
+    
+    def stop_analysis(self):
+        """停止当前分析，保留已有结果"""
+        if self.analysis is not None:
+            self.analysis.stopped = True
+        self.tool.cancel_task(self.task_id)
+        self.task_id = None
+        if self.snapshot is not None:
+            self.update_status()
+        elif self.analysis is not None:
+            self.status_label.setText("已停止")
+        self.update_controls()
+    
+    def reset(self):
+        """断开连接时清空分析状态"""
+        self.stop_analysis()
+        self.analysis = None
+        self.snapshot = None
+        self.status_label.setText("")
+        self.prefix_table.setRowCount(0)
+        self.key_table.setRowCount(0)
+    
+    def update_controls(self):
+        """根据分析状态更新按钮"""
+        running = self.task_id is not None
+        self.start_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+    
+    def update_status(self):
+        """更新进度与汇总"""
+        snapshot = self.snapshot
+        total = snapshot['total']
+        rate = snapshot['sample_rate']
+        if snapshot['finished']:
+            text = "分析完成"
+        elif self.analysis is not None and self.analysis.stopped:
+            text = "已停止"
+        else:
+            text = "分析中"
+        text += f"：已扫描 {snapshot['scanned']} 个key，分析 {total['count']} 个，内存 {format_bytes(total['memory'])}"
+        if rate < 1.0:
+            text += (f"（采样率 {rate:.0%}，估算共 {int(total['count'] / rate)} 个key，"
+                     f"{format_bytes(total['memory'] / rate)}）")
+        self.status_label.setText(text)
+    
+    def refresh_tables(self):
+        """用最新快照刷新前缀表、类型选项和大Key排行"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+        
+        prefixes = snapshot['prefixes']
+        self.prefix_table.setRowCount(len(prefixes))
+        for row, stats in enumerate(prefixes):
+            average = stats['memory'] / stats['count'] if stats['count'] else 0
+            values = (stats['prefix'], str(stats['count']), format_bytes(stats['memory']),
+                      format_bytes(average))
+            for column, value in enumerate(values):
+                self.prefix_table.setItem(row, column, QTableWidgetItem(value))
+        
+        current = self.type_combo.currentText()
+        types = sorted(snapshot['types'])
+        if [self.type_combo.itemText(i) for i in range(1, self.type_combo.count())] != types:
+            self.type_combo.clear()
+            self.type_combo.addItem(self.ALL_TYPES)
+            self.type_combo.addItems(types)
+            index = self.type_combo.findText(current)
+            self.type_combo.setCurrentIndex(max(0, index))
+        
+        self.refresh_key_table()
+    
+    def refresh_key_table(self):
+        """按当前过滤条件显示大Key排行"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+        
+        kind, value = self.key_filter
+        if kind == 'type':
+            stats = snapshot['types'].get(value)
+            self.filter_label.setText(f"类型 {value} 内存最大的key")
+        elif kind == 'prefix':
+            stats = next((p for p in snapshot['prefixes'] if p['prefix'] == value), None)
+            self.filter_label.setText(f"前缀 {value} 内存最大的key")
+        else:
+            stats = snapshot['total']
+            self.filter_label.setText("内存最大的key")
+        top = stats['top'] if stats else []
+        
+        self.key_table.setRowCount(len(top))
+        for row, (memory, key, key_type, elements, encoding) in enumerate(top):
+            values = (key, key_type, format_bytes(memory),
+                      "" if elements is None else str(elements), encoding or "")
+            for column, value in enumerate(values):
+                self.key_table.setItem(row, column, QTableWidgetItem(value))
+    
+    def on_type_selected(self, index):
+        """按类型查看排行"""
+        if index <= 0:
+            self.key_filter = ('all', None)
+        else:
+            self.key_filter = ('type', self.type_combo.itemText(index))
+        self.refresh_key_table()
+    
+    def on_prefix_clicked(self, row, column):
+        """查看某个前缀下的大Key"""
+        item = self.prefix_table.item(row, 0)
+        if item is None:
+            return
+        self.key_filter = ('prefix', item.text())
+        self.type_combo.setCurrentIndex(0)
+        self.refresh_key_table()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis监控指标
+后台定时并发拉取各节点INFO，固定长度环形缓冲保存采样，增量计算QPS、命中率和复制延迟
+"""
+
+import time
+from collections import deque
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView,
+                             QAbstractItemView)
+from .redis_memory_analyzer import format_bytes
+
+
+# 只拉取需要的INFO段，每个节点一次pipeline往返
+INFO_SECTIONS = ('stats', 'memory', 'clients', 'replication')
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+# 趋势列显示的最近采样数
+SPARK_WIDTH = 40
+
+
+def sparkline(values):
+    """用字符画出数值趋势"""
+    values = [value for value in values if value is not None]
+    if not values:
+        return ""
+    low = min(values)
+    span = max(values) - low
+    if span <= 0:
+        return SPARK_CHARS[0] * len(values)
+    top = len(SPARK_CHARS) - 1
+    return ''.join(SPARK_CHARS[int((value - low) / span * top)] for value in values)
+
+
+def replication_lag(info):
+    """复制延迟：(延迟秒数, 落后字节数)
+    
+    主节点取各从节点中最大的lag和偏移量差；从节点取距上次收到主节点数据的秒数，
+    与主节点断开时返回-1。无从节点的主节点返回(None, None)。
+    """
+    if info.get('role') == 'slave':
+        if info.get('master_link_status') != 'up':
+            return -1, None
+        return info.get('master_last_io_seconds_ago'), None
+    
+    master_offset = info.get('master_repl_offset', 0)
+    lag = None
+    behind = None
+    for i in range(info.get('connected_slaves', 0)):
+        replica = info.get(f'slave{i}')
+        if not isinstance(replica, dict):
+            continue
+        lag = max(lag or 0, int(replica.get('lag', 0)))
+        behind = max(behind or 0, master_offset - int(replica.get('offset', 0)))
+    return lag, behind
+
+
+class NodeMetrics:
+    """单个节点的采样历史
+    
+    每个指标一个deque(maxlen)环形缓冲，超过容量自动丢弃最旧的采样；
+    QPS和命中率由相邻两次的累计计数器差值计算，只保留上一次的计数器。
+    """
+    
+    SERIES = ('ops', 'memory', 'hit_ratio', 'clients', 'repl_lag')
+    
+    __slots__ = ('name', 'role', 'history', 'times', 'counters', 'latest', 'error')
+    
+    def __init__(self, name, capacity):
+        self.name = name
+        self.role = ""
+        self.history = {series: deque(maxlen=capacity) for series in self.SERIES}
+        self.times = deque(maxlen=capacity)
+        # 上一次采样的(时间, 已处理命令数, 命中数, 未命中数)
+        self.counters = None
+        self.latest = {}
+        self.error = None
+    
+    def add_sample(self, info, now):
+        """加入一次INFO采样"""
+        commands = info.get('total_commands_processed', 0)
+        hits = info.get('keyspace_hits', 0)
+        misses = info.get('keyspace_misses', 0)
+        
+        ops = info.get('instantaneous_ops_per_sec', 0)
+        hit_ratio = None
+        previous = self.counters
+        # 计数器回退说明节点重启过，本次只作为新的基准
+        if previous is not None and commands >= previous[1] and now > previous[0]:
+            elapsed = now - previous[0]
+            ops = (commands - previous[1]) / elapsed
+            lookups = (hits - previous[2]) + (misses - previous[3])
+            if lookups > 0:
+                hit_ratio = (hits - previous[2]) / lookups
+        elif hits + misses > 0:
+            hit_ratio = hits / (hits + misses)
+        self.counters = (now, commands, hits, misses)
+        
+        lag, behind = replication_lag(info)
+        self.role = info.get('role', '')
+        self.latest = {
+            'ops': ops,
+            'memory': info.get('used_memory', 0),
+            'hit_ratio': hit_ratio,
+            'clients': info.get('connected_clients', 0),
+            'repl_lag': lag,
+            'repl_behind': behind,
+            'max_memory': info.get('maxmemory', 0),
+        }
+        self.times.append(now)
+        for series in self.SERIES:
+            self.history[series].append(self.latest[series])
+        self.error = None
+    
+    def snapshot(self):
+        """节点的当前值和趋势"""
+        return {
+            'name': self.name,
+            'role': self.role,
+            'latest': dict(self.latest),
+            'ops_series': list(self.history['ops']),
+            'memory_series': list(self.history['memory']),
+            'samples': len(self.times),
+            'error': self.error,
+        }
+
+
+class MetricsSampler:
+    """所有节点的采样状态，每次轮询返回快照供界面刷新"""
+    
+    DEFAULT_CAPACITY = 120
+    
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        # 节点名 -> NodeMetrics
+        self.nodes = {}
+        self.polls = 0
+    
+    def node(self, name):
+        """获取(或创建)节点的采样历史"""
+        metrics = self.nodes.get(name)
+        if metrics is None:
+            metrics = NodeMetrics(name, self.capacity)
+            self.nodes[name] = metrics
+        return metrics
+    
+    def record(self, results, now=None):
+        """记录一轮轮询结果：{节点名: INFO字典或异常}，不再出现的节点被移除"""
+        now = time.monotonic() if now is None else now
+        for name in list(self.nodes):
+            if name not in results:
+                del self.nodes[name]
+        for name, info in results.items():
+            metrics = self.node(name)
+            if isinstance(info, Exception):
+                metrics.error = str(info)
+            else:
+                metrics.add_sample(info, now)
+        self.polls += 1
+        return self.snapshot()
+    
+    def snapshot(self):
+        """所有节点的快照及汇总"""
+        nodes = [self.nodes[name].snapshot() for name in sorted(self.nodes)]
+        alive = [node['latest'] for node in nodes if node['latest'] and not node['error']]
+        return {
+            'nodes': nodes,
+            'total_ops': sum(latest['ops'] for latest in alive),
+            'total_memory': sum(latest['memory'] for latest in alive),
+            'total_clients': sum(latest['clients'] for latest in alive),
+            'polls': self.polls,
+        }
+
+
+def merge_info_sections(replies):
+    """合并各INFO段的解析结果"""
+    info = {}
+    for reply in replies:
+        if isinstance(reply, Exception):
+            raise reply
+        info.update(reply)
+    return info
+
+
+class MetricsPanel(QWidget):
+    """监控指标页面
+    
+    QTimer按间隔提交轮询任务，上一轮未完成时跳过本次，慢节点不会让任务堆积。
+    """
+    
+    HEADERS = ["节点", "角色", "QPS", "QPS趋势", "内存", "命中率", "客户端", "复制延迟"]
+    
+    def __init__(self, tool, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.sampler = None
+        self.task_id = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 10, 0, 0)
+        
+        options_layout = QHBoxLayout()
+        self.interval_input = QSpinBox()
+        self.interval_input.setRange(1, 60)
+        self.interval_input.setValue(2)
+        self.interval_input.setSuffix(" 秒")
+        self.interval_input.valueChanged.connect(self.update_interval)
+        
+        self.capacity_input = QSpinBox()
+        self.capacity_input.setRange(10, 3600)
+        self.capacity_input.setValue(MetricsSampler.DEFAULT_CAPACITY)
+        self.capacity_input.setSuffix(" 个采样")
+        self.capacity_input.setToolTip("每个节点保留的采样数量，重新开始监控后生效")
+        
+        self.start_btn = QPushButton("▶ 开始监控")
+        self.start_btn.setFixedWidth(100)
+        self.start_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #17a2b8;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #138496;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.start_btn.clicked.connect(self.start_monitor)
+        
+        self.stop_btn = QPushButton("⏹ 停止")
+        self.stop_btn.setFixedWidth(80)
+        self.stop_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.stop_btn.clicked.connect(self.stop_monitor)
+        self.stop_btn.setEnabled(False)
+        
+        for label_text, widget in (("间隔:", self.interval_input), ("历史:", self.capacity_input)):
+            label = QLabel(label_text)
+            label.setStyleSheet("font-weight: bold;")
+            options_layout.addWidget(label)
+            options_layout.addWidget(widget)
+        options_layout.addWidget(self.start_btn)
+        options_layout.addWidget(self.stop_btn)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6c757d;")
+        layout.addWidget(self.status_label)
+        
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        layout.addWidget(self.table, 1)
+    
+    def start_monitor(self):
+        """开始定时轮询"""
+        thread = self.tool.connection_thread
+        if not (thread and thread.redis_client):
+            self.tool.show_message("警告", "请先连接到Redis", "warning")
+            return
+        
+        self.sampler = MetricsSampler(self.capacity_input.value())
+        self.table.setRowCount(0)
+        self.status_label.setText("监控中...")
+        self.timer.start(self.interval_input.value() * 1000)
+        self.update_controls()
+        self.poll()
+    
+    def update_interval(self, seconds):
+        """修改轮询间隔"""
+        if self.timer.isActive():
+            self.timer.start(seconds * 1000)
+    
+    def poll(self):
+        """提交一轮轮询，上一轮仍在执行时跳过"""
+        if self.task_id is not None or self.sampler is None:
+            return
+        thread = self.tool.connection_thread
+        if not (thread and thread.redis_client):
+            self.stop_monitor()
+            return
+        sampler = self.sampler
+        self.task_id = self.tool.submit_task(
+            thread.poll_metrics, sampler,
+            on_success=lambda snapshot: self.on_poll_done(sampler, snapshot),
+            on_error=self.on_poll_error)
+    
+    def on_poll_done(self, sampler, snapshot):
+        """一轮轮询完成：刷新表格"""
+        if sampler is not self.sampler:
+            return
+        self.task_id = None
+        self.refresh_table(snapshot)
+    
+    def on_poll_error(self, error):
+        """轮询失败，保持定时器继续尝试"""
+        self.task_id = None
+        self.status_label.setText(f"获取指标失败: {error}")
+    
+    def refresh_table(self, snapshot):
+        """用快照刷新表格和汇总"""
+        nodes = snapshot['nodes']
+        self.table.setRowCount(len(nodes))
+        for row, node in enumerate(nodes):
+            latest = node['latest']
+            if node['error'] or not latest:
+                values = (node['name'], node['role'], node['error'] or "-", "", "", "", "", "")
+            else:
+                hit_ratio = latest['hit_ratio']
+                values = (
+                    node['name'],
+                    "主" if node['role'] == 'master' else "从",
+                    f"{latest['ops']:.0f}",
+                    sparkline(node['ops_series'][-SPARK_WIDTH:]),
+                    format_bytes(latest['memory']),
+                    f"{hit_ratio:.1%}" if hit_ratio is not None else "-",
+                    str(latest['clients']),
+                    self.format_lag(latest),
+                )
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 0:
+                    item.setToolTip(node['error'] or f"{node['samples']} 个采样")
+                if node['error'] or (column == 7 and latest.get('repl_lag') == -1):
+                    item.setForeground(QBrush(QColor("#dc3545")))
+                self.table.setItem(row, column, item)
+        
+        self.status_label.setText(
+            f"{len(nodes)} 个节点，总QPS {snapshot['total_ops']:.0f}，"
+            f"总内存 {format_bytes(snapshot['total_memory'])}，"
+            f"客户端 {snapshot['total_clients']}，已采样 {snapshot['polls']} 次")
+    
+    def format_lag(self, latest):
+        """复制延迟显示"""
+        lag = latest['repl_lag']
+        if lag is None:
+            return "-"
+        if lag == -1:
+            return "已断开"
+        text = f"{lag} 秒"
+        if latest['repl_behind']:
+            text += f" / {format_bytes(latest['repl_behind'])}"
+        return text
+    
+    def stop_monitor(self):
+        """停止轮询，保留已有数据"""
+        self.timer.stop()
+        self.tool.cancel_task(self.task_id)
+        self.task_id = None
+        if self.sampler is not None and not self.sampler.polls:
+            self.status_label.setText("已停止")
+        self.update_controls()
+    
+    def reset(self):
+        """断开连接时清空监控状态"""
+        self.stop_monitor()
+        self.sampler = None
+        self.status_label.setText("")
+        self.table.setRowCount(0)
+    
+    def update_controls(self):
+        """根据监控状态更新按钮"""
+        running = self.timer.isActive()
+        self.start_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis命名空间树模型
+按分隔符把key拆分为前缀树，逐批聚合各前缀的key数量，展开时才暴露子节点
+"""
+
+from array import array
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
+
+
+class NamespaceNode:
+    """前缀节点
+    
+    子前缀是节点对象，叶子key只记录其在RedisKeyModel中的存储下标，
+    因此节点数量只与不同前缀的数量有关，不为每个key创建对象。
+    """
+    
+    __slots__ = ('name', 'parent', 'row', 'children', 'child_list', 'key_rows',
+                 'count', 'visible_children', 'visible_keys', 'fetched')
+    
+    def __init__(self, name="", parent=None, row=0):
+        self.name = name
+        self.parent = parent
+        # 在父节点子前缀列表中的位置
+        self.row = row
+        self.children = {}
+        self.child_list = []
+        # 直接位于该前缀下的key（RedisKeyModel存储下标）
+        self.key_rows = array('q')
+        # 该前缀下（含所有子前缀）的key总数
+        self.count = 0
+        # 已暴露给视图的子前缀/key数量，行号先排子前缀再排key
+        self.visible_children = 0
+        self.visible_keys = 0
+        # 视图是否已经展开过该节点
+        self.fetched = False
+    
+    def child(self, name):
+        """获取(或创建)子前缀节点"""
+        node = self.children.get(name)
+        if node is None:
+            node = NamespaceNode(name, self, len(self.child_list))
+            self.children[name] = node
+            self.child_list.append(node)
+        return node
+    
+    def path(self):
+        """从根到该节点的完整前缀"""
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return ''.join(reversed(names))
+
+
+class NamespaceTreeModel(QAbstractItemModel):
+    """命名空间树模型
+    
+    与RedisKeyModel共享key存储：每批扫描结果到达后调用sync，只处理新增的key。
+    每个节点的行在视图展开时通过canFetchMore/fetchMore逐批暴露，
+    千万级key的数据库也只为可见的行创建索引。
+    """
+    
+    HEADERS = ["名称", "Key数", "类型", "TTL"]
+    # 每次fetchMore暴露给视图的行数
+    FETCH_BATCH_SIZE = 500
+    
+    def __init__(self, key_model, delimiter=":", parent=None):
+        super().__init__(parent)
+        self.key_model = key_model
+        self.delimiter = delimiter
+        self.root = None
+        # 已建立索引的key数量
+        self.indexed = 0
+        self.reset_tree()
+        # key列表清空时同步清空前缀树
+        key_model.modelReset.connect(self.rebuild)
+    
+    def reset_tree(self):
+        """重置前缀树"""
+        self.root = NamespaceNode()
+        self.root.fetched = True
+        self.indexed = 0
+    
+    def rebuild(self):
+        """丢弃前缀树，按当前key存储重新建立"""
+        self.invalidate()
+        self.sync()
+    
+    def invalidate(self):
+        """丢弃前缀树（key存储中有行被删除），下次sync时按当前key重新建立"""
+        self.beginResetModel()
+        self.reset_tree()
+        self.endResetModel()
+    
+    def set_delimiter(self, delimiter):
+        """修改分隔符后重新建立前缀树"""
+        if delimiter == self.delimiter:
+            return
+        self.delimiter = delimiter
+        self.rebuild()
+    
+    def split_key(self, key):
+        """key -> (前缀段列表, 叶子名)，前缀段保留末尾分隔符"""
+        if not self.delimiter:
+            return [], key
+        parts = key.split(self.delimiter)
+        return [part + self.delimiter for part in parts[:-1]], parts[-1]
+    
+    def sync(self):
+        """把RedisKeyModel中新增的key合并进前缀树，沿途累加各前缀的key数量"""
+        keys = self.key_model.keys
+        if self.indexed >= len(keys):
+            return
+        
+        touched = set()
+        for i in range(self.indexed, len(keys)):
+            if keys[i] is None:
+                # 已删除的空位
+                continue
+            prefixes, _ = self.split_key(keys[i])
+            node = self.root
+            node.count += 1
+            for name in prefixes:
+                node = node.child(name)
+                node.count += 1
+                touched.add(node)
+            node.key_rows.append(i)
+            touched.add(node)
+        self.indexed = len(keys)
+        
+        for node in touched:
+            parent = node.parent
+            # 可见节点刷新计数
+            if parent is not None and node.row < parent.visible_children:
+                index = self.createIndex(node.row, 1, parent)
+                self.dataChanged.emit(index, index)
+        # 已展开但尚未填满首屏的节点直接暴露新行，其余等待fetchMore
+        touched.add(self.root)
+        for node in touched:
+            if node.fetched:
+                shown = node.visible_children + node.visible_keys
+                if shown < self.FETCH_BATCH_SIZE:
+                    self.expose_rows(node, self.FETCH_BATCH_SIZE - shown)
+    
+    def expose_rows(self, node, count):
+        """向视图暴露节点下更多的行：先子前缀，再key"""
+        parent_index = self.node_index(node)
+        if node.visible_children == 0:
+            # 首次暴露时按名称排列子前缀，之后新出现的前缀追加在末尾
+            node.child_list.sort(key=lambda child: child.name)
+            for row, child in enumerate(node.child_list):
+                child.row = row
+        
+        more = min(count, len(node.child_list) - node.visible_children)
+        if more > 0:
+            start = node.visible_children
+            self.beginInsertRows(parent_index, start, start + more - 1)
+            node.visible_children += more
+            self.endInsertRows()
+            count -= more
+        
+        more = min(count, len(node.key_rows) - node.visible_keys)
+        if more > 0:
+            start = node.visible_children + node.visible_keys
+            self.beginInsertRows(parent_index, start, start + more - 1)
+            node.visible_keys += more
+            self.endInsertRows()
+    
+    # ---- 索引与节点 ----
+    
+    def node_index(self, node):
+        """前缀节点对应的索引，根节点为无效索引"""
+        if node is self.root or node is None:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node.parent)
+    
+    def node_from_index(self, index):
+        """索引对应的前缀节点，叶子key返回None，无效索引返回根节点"""
+        if not index.isValid():
+            return self.root
+        parent = index.internalPointer()
+        if index.row() < parent.visible_children:
+            return parent.child_list[index.row()]
+        return None
+    
+    def storage_index(self, index):
+        """叶子key在RedisKeyModel中的存储下标，前缀节点返回None"""
+        if not index.isValid():
+            return None
+        parent = index.internalPointer()
+        row = index.row() - parent.visible_children
+        if row < 0:
+            return None
+        return parent.key_rows[row]
+    
+    def key_entry(self, index):
+        """叶子key的(key, 类型)，前缀节点返回None"""
+        i = self.storage_index(index)
+        if i is None:
+            return None
+        key_model = self.key_model
+        return key_model.keys[i], key_model.type_names[key_model.types[i]]
+    
+    # ---- QAbstractItemModel接口 ----
+    
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        if node is None or row < 0 or column < 0 or column >= len(self.HEADERS):
+            return QModelIndex()
+        if row >= node.visible_children + node.visible_keys:
+            return QModelIndex()
+        # 内部指针统一指向父节点
+        return self.createIndex(row, column, node)
+    
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.node_index(index.internalPointer())
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() and parent.column() != 0:
+            return 0
+        node = self.node_from_index(parent)
+        if node is None:
+            return 0
+        return node.visible_children + node.visible_keys
+    
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+    
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        if node is None:
+            return False
+        return bool(node.child_list) or bool(node.key_rows)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        if node is None:
+            return False
+        return (node.visible_children < len(node.child_list)
+                or node.visible_keys < len(node.key_rows))
+    
+    def fetchMore(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        if node is None:
+            return
+        node.fetched = True
+        self.expose_rows(node, self.FETCH_BATCH_SIZE)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        column = index.column()
+        node = self.node_from_index(index)
+        if node is not None:
+            if role == Qt.DisplayRole:
+                if column == 0:
+                    return node.name
+                if column == 1:
+                    return str(node.count)
+                return ""
+            if role == Qt.ToolTipRole:
+                return f"{node.path()}  共 {node.count} 个key"
+            return None
+        
+        i = self.storage_index(index)
+        key_model = self.key_model
+        key = key_model.keys[i]
+        if role == Qt.DisplayRole:
+            if column == 0:
+                _, name = self.split_key(key)
+                return name or key
+            if column == 2:
+                return key_model.type_names[key_model.types[i]]
+            if column == 3:
+                ttl = key_model.ttls[i]
+                return str(ttl) if ttl > 0 else '永久'
+            return ""
+        if role == Qt.ToolTipRole:
+            return key
+        return None
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis连接池注册表
+进程内按会话配置共享Redis客户端（连接池与集群槽位映射），断开或切换工具后保留空闲连接，重连时直接复用
+"""
+
+import threading
+import time
+
+
+# 空闲客户端的健康检查间隔（秒）
+HEALTH_CHECK_INTERVAL = 30
+# 空闲超过该时间的客户端被关闭（秒）
+IDLE_TIMEOUT = 600
+
+
+class PooledClient:
+    """注册表中的一个共享客户端"""
+    
+    __slots__ = ('scope', 'client', 'refs', 'last_used', 'last_checked')
+    
+    def __init__(self, scope, client):
+        self.scope = scope
+        self.client = client
+        # 正在使用该客户端的连接线程数量
+        self.refs = 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+    
+    def ping(self):
+        """健康检查，成功返回True"""
+        try:
+            self.client.ping()
+            self.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            print(f"连接池健康检查失败 {self.scope[0]}:{self.scope[1]}: {e}")
+            return False
+    
+    def close(self):
+        """关闭客户端及其连接池"""
+        try:
+            self.client.close()
+        except Exception as e:
+            print(f"关闭连接池失败: {e}")
+
+
+# 进程内的共享客户端：会话配置 -> PooledClient
+_clients = {}
+_clients_lock = threading.Lock()
+_sweeper = None
+
+
+def client_scope(host, port, password=None, db=0, cluster_mode=False):
+    """会话配置标识，集群模式下db无意义"""
+    return (host, int(port), password or None, 0 if cluster_mode else db, bool(cluster_mode))
+
+
+def acquire_client(host, port, password, db, cluster_mode, factory):
+    """获取会话对应的共享客户端，不存在或健康检查失败时调用factory()创建
+    
+    返回(客户端, 是否复用)，用完后通过release_client归还
+    """
+    scope = client_scope(host, port, password, db, cluster_mode)
+    with _clients_lock:
+        entry = _clients.get(scope)
+    
+    if entry is not None and entry.refs == 0:
+        # 空闲较久的客户端先确认连接仍然可用
+        if time.monotonic() - entry.last_checked > HEALTH_CHECK_INTERVAL and not entry.ping():
+            discard_client(entry.client)
+            entry = None
+    
+    reused = entry is not None
+    if entry is None:
+        # 建立连接期间不持有锁，其他会话不受影响
+        entry = PooledClient(scope, factory())
+    
+    with _clients_lock:
+        existing = _clients.get(scope)
+        if existing is None:
+            _clients[scope] = entry
+        elif existing is not entry:
+            # 并发建立了同一会话的连接，保留先注册的
+            entry.close()
+            entry = existing
+            reused = True
+        entry.refs += 1
+        entry.last_used = time.monotonic()
+    ensure_sweeper()
+    return entry.client, reused
+
+
+def release_client(client):
+    """归还客户端：引用计数归零后保持空闲，由后台线程做健康检查"""
+    if client is None:
+        return
+    with _clients_lock:
+        for entry in _clients.values():
+            if entry.client is client:
+                entry.refs = max(0, entry.refs - 1)
+                entry.last_used = time.monotonic()
+                return
+    # 不在注册表中（已被淘汰），直接关闭
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+def discard_client(client):
+    """客户端不可用时从注册表移除并关闭"""
+    with _clients_lock:
+        for scope, entry in list(_clients.items()):
+            if entry.client is client:
+                del _clients[scope]
+                break
+        else:
+            entry = None
+    if entry is not None:
+        entry.close()
+
+
+def sweep_idle_clients():
+    """后台维护：空闲客户端定期ping保活，超时或检查失败的关闭"""
+    now = time.monotonic()
+    with _clients_lock:
+        idle = [entry for entry in _clients.values() if entry.refs == 0]
+    
+    for entry in idle:
+        if now - entry.last_used > IDLE_TIMEOUT or not entry.ping():
+            with _clients_lock:
+                if _clients.get(entry.scope) is entry and entry.refs == 0:
+                    del _clients[entry.scope]
+                else:
+                    continue
+            entry.close()
+
+
+def ensure_sweeper():
+    """按需启动后台维护线程"""
+    global _sweeper
+    with _clients_lock:
+        if _sweeper is not None:
+            return
+        _sweeper = threading.Thread(target=_sweep_loop, name="redis-pool-sweeper", daemon=True)
+        _sweeper.start()
+
+
+def _sweep_loop():
+    """后台维护线程：注册表为空时退出"""
+    global _sweeper
+    while True:
+        time.sleep(HEALTH_CHECK_INTERVAL)
+        sweep_idle_clients()
+        with _clients_lock:
+            if not _clients:
+                _sweeper = None
+                return
+
+
+def close_all_clients():
+    """关闭所有共享客户端，程序退出时调用"""
+    with _clients_lock:
+        entries = list(_clients.values())
+        _clients.clear()
+    for entry in entries:
+        entry.close()
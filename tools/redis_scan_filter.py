@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis扫描过滤
+按类型、TTL、最小大小筛选扫描结果：类型通过SCAN TYPE交给服务端（Redis 6.0+），
+TTL用元数据pipeline已取得的值判断，最小大小再用一轮pipeline探测，筛掉的key不会发往界面
+"""
+
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel, QComboBox, QSpinBox
+
+
+# 可筛选的类型
+FILTER_TYPES = ['string', 'list', 'set', 'zset', 'hash', 'stream']
+
+
+class ScanFilter:
+    """扫描过滤条件"""
+    
+    TTL_ANY = 'any'
+    # 没有设置过期时间（TTL为-1）
+    TTL_PERSISTENT = 'persistent'
+    # 设置了过期时间，可限定剩余秒数范围
+    TTL_EXPIRING = 'expiring'
+    
+    def __init__(self, key_type=None, ttl_mode=TTL_ANY, ttl_min=0, ttl_max=0, min_size=0):
+        self.key_type = key_type
+        self.ttl_mode = ttl_mode
+        self.ttl_min = ttl_min
+        # 0表示不限
+        self.ttl_max = ttl_max
+        self.min_size = min_size
+    
+    def is_active(self):
+        """是否设置了任何条件"""
+        return bool(self.key_type or self.ttl_mode != self.TTL_ANY or self.min_size)
+    
+    def needs_size(self):
+        """是否需要探测大小"""
+        return self.min_size > 0
+    
+    def matches(self, info):
+        """按元数据{'type': ..., 'ttl': ...}判断类型和TTL条件"""
+        if self.key_type and info['type'] != self.key_type:
+            return False
+        ttl = info['ttl']
+        if self.ttl_mode == self.TTL_PERSISTENT:
+            return ttl == -1
+        if self.ttl_mode == self.TTL_EXPIRING:
+            if ttl < 0 or ttl < self.ttl_min:
+                return False
+            return not self.ttl_max or ttl <= self.ttl_max
+        return True
+    
+    def describe(self):
+        """条件描述"""
+        parts = []
+        if self.key_type:
+            parts.append(f"类型={self.key_type}")
+        if self.ttl_mode == self.TTL_PERSISTENT:
+            parts.append("永不过期")
+        elif self.ttl_mode == self.TTL_EXPIRING:
+            upper = f"{self.ttl_max}" if self.ttl_max else "∞"
+            parts.append(f"TTL {self.ttl_min}~{upper}秒")
+        if self.min_size:
+            parts.append(f"大小≥{self.min_size}")
+        return ", ".join(parts)
+
+
+class ScanFilterBar(QWidget):
+    """key浏览的过滤条件栏"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.type_combo = QComboBox()
+        self.type_combo.addItem("全部", None)
+        for key_type in FILTER_TYPES:
+            self.type_combo.addItem(key_type, key_type)
+        self.type_combo.setToolTip("Redis 6.0及以上在服务端按类型过滤(SCAN TYPE)")
+        
+        self.ttl_combo = QComboBox()
+        self.ttl_combo.addItem("不限", ScanFilter.TTL_ANY)
+        self.ttl_combo.addItem("永不过期", ScanFilter.TTL_PERSISTENT)
+        self.ttl_combo.addItem("会过期", ScanFilter.TTL_EXPIRING)
+        self.ttl_combo.currentIndexChanged.connect(self.update_controls)
+        
+        self.ttl_min_input = QSpinBox()
+        self.ttl_min_input.setRange(0, 2 ** 31 - 1)
+        self.ttl_min_input.setSuffix(" 秒")
+        self.ttl_max_input = QSpinBox()
+        self.ttl_max_input.setRange(0, 2 ** 31 - 1)
+        self.ttl_max_input.setSuffix(" 秒")
+        self.ttl_max_input.setSpecialValueText("不限")
+        
+        self.min_size_input = QSpinBox()
+        self.min_size_input.setRange(0, 2 ** 31 - 1)
+        self.min_size_input.setSpecialValueText("不限")
+        self.min_size_input.setToolTip("元素个数，字符串为字节数；需要额外一轮pipeline探测")
+        
+        for label_text, widget in (("类型:", self.type_combo), ("TTL:", self.ttl_combo),
+                                   (None, self.ttl_min_input), ("~", self.ttl_max_input),
+                                   ("最小大小:", self.min_size_input)):
+            if label_text:
+                label = QLabel(label_text)
+                if label_text != "~":
+                    label.setStyleSheet("font-weight: bold;")
+                layout.addWidget(label)
+            layout.addWidget(widget)
+        layout.addStretch()
+        self.update_controls()
+    
+    def update_controls(self):
+        """TTL范围只在"会过期"时可用"""
+        expiring = self.ttl_combo.currentData() == ScanFilter.TTL_EXPIRING
+        self.ttl_min_input.setEnabled(expiring)
+        self.ttl_max_input.setEnabled(expiring)
+    
+    def current_filter(self):
+        """当前条件，未设置任何条件时返回None"""
+        scan_filter = ScanFilter(self.type_combo.currentData(), self.ttl_combo.currentData(),
+                                 self.ttl_min_input.value(), self.ttl_max_input.value(),
+                                 self.min_size_input.value())
+        return scan_filter if scan_filter.is_active() else None
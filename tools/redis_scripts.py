@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis批量脚本
+一次EVALSHA返回一批key的类型、TTL、大小、编码和内存，取代每个key多条命令、
+以及依赖类型的第二轮pipeline；高延迟链路上每批只需一次往返。
+脚本按SHA1调用，NOSCRIPT（重启、故障切换、SCRIPT FLUSH）时SCRIPT LOAD后重发；
+集群中同一次调用的KEYS必须在同一槽位，按槽位分组后放进同一个pipeline；
+服务端禁用脚本或无权限时由调用方改用pipeline
+"""
+
+import hashlib
+from redis.exceptions import NoScriptError, NoPermissionError
+from .redis_cluster_topology import is_redirect
+
+
+# 可请求的字段，类型总是返回
+FIELD_TTL = 'ttl'
+FIELD_SIZE = 'size'
+FIELD_ENCODING = 'encoding'
+FIELD_MEMORY = 'memory'
+
+# key浏览的元数据；按大小过滤时同时取大小
+METADATA_FIELDS = (FIELD_TTL,)
+METADATA_SIZE_FIELDS = (FIELD_TTL, FIELD_SIZE)
+# 大Key分析
+MEMORY_FIELDS = (FIELD_MEMORY, FIELD_SIZE, FIELD_ENCODING)
+
+# KEYS为一批key，ARGV为需要的字段；每个key返回{类型, 各字段的值}，
+# 不存在的key类型为none，取不到的字段为nil
+KEY_INFO_SCRIPT = """
+local size_commands = {string = 'STRLEN', list = 'LLEN', set = 'SCARD', zset = 'ZCARD',
+                       hash = 'HLEN', stream = 'XLEN'}
+local result = {}
+for i, key in ipairs(KEYS) do
+    local key_type = redis.call('TYPE', key)['ok']
+    local entry = {key_type}
+    for j, field in ipairs(ARGV) do
+        local value = false
+        if key_type ~= 'none' then
+            if field == 'ttl' then
+                value = redis.call('TTL', key)
+            elseif field == 'size' then
+                if size_commands[key_type] then
+                    value = redis.call(size_commands[key_type], key)
+                end
+            elseif field == 'encoding' then
+                value = redis.pcall('OBJECT', 'ENCODING', key)
+            elseif field == 'memory' then
+                value = redis.pcall('MEMORY', 'USAGE', key)
+            end
+            if type(value) == 'table' then
+                value = false
+            end
+        end
+        entry[j + 1] = value
+    end
+    result[i] = entry
+end
+return result
+"""
+KEY_INFO_SHA = hashlib.sha1(KEY_INFO_SCRIPT.encode()).hexdigest()
+
+
+class ScriptUnavailable(Exception):
+    """服务端不能执行批量脚本（禁用、无权限、脚本出错）"""
+
+
+def slot_groups(keys, keyslot=None):
+    """按槽位分组，保持组内顺序；keyslot为None（单机）时整批为一组"""
+    if keyslot is None:
+        return [list(keys)] if keys else []
+    groups = {}
+    for key in keys:
+        groups.setdefault(keyslot(key), []).append(key)
+    return list(groups.values())
+
+
+def queue_key_info(pipe, groups, fields):
+    """每个分组一次EVALSHA（RedisCluster的pipeline屏蔽了evalsha方法，直接发送命令）"""
+    for group in groups:
+        pipe.execute_command('EVALSHA', KEY_INFO_SHA, len(group), *group, *fields)
+
+
+def parse_key_info(groups, replies, fields, key_data):
+    """解析脚本返回值写入key_data {key: {'type': ..., 字段: 值}}，跳过不存在的key
+    
+    返回遇到NOSCRIPT需要重发的分组；集群重定向的分组与pipeline一样跳过，
+    脚本本身不可用时抛出ScriptUnavailable
+    """
+    missing = []
+    for group, reply in zip(groups, replies):
+        if isinstance(reply, NoScriptError):
+            missing.append(group)
+            continue
+        if isinstance(reply, Exception):
+            if is_script_error(reply):
+                raise ScriptUnavailable(str(reply))
+            continue
+        for key, entry in zip(group, reply):
+            if entry[0] == 'none':
+                continue
+            info = {'type': entry[0]}
+            info.update(zip(fields, entry[1:]))
+            key_data[key] = info
+    return missing
+
+
+def is_script_error(error):
+    """是否为脚本不可用一类的错误（与重定向、TRYAGAIN等临时错误区分）"""
+    if isinstance(error, NoPermissionError):
+        return True
+    if is_redirect(error):
+        return False
+    message = str(error).lower()
+    return any(text in message for text in ('unknown command', 'script', 'lua', 'not allowed'))
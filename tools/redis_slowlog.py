@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis慢查询与延迟分析
+并发拉取各主节点的SLOWLOG GET和LATENCY LATEST/HISTORY，按节点和ID去重，
+按命令和key前缀聚合并计算耗时分位数
+"""
+
+import math
+from collections import deque
+from datetime import datetime
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QLineEdit, QSpinBox, QSplitter, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QAbstractItemView)
+from .redis_metrics import sparkline
+
+
+def to_text(value):
+    """统一转为字符串"""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+def parse_slowlog_entries(raw):
+    """解析SLOWLOG GET的原始返回值，兼容不同版本的条目格式
+    
+    条目为[ID, 时间戳, 耗时(微秒), [命令参数...], 客户端地址, 客户端名称]，
+    Redis 4.0以前没有客户端字段，部分发行版在参数前多一个复杂度字段
+    """
+    items = []
+    for row in raw or []:
+        args_index = next((i for i in range(3, len(row)) if isinstance(row[i], list)), None)
+        if args_index is None:
+            continue
+        client = row[args_index + 1] if len(row) > args_index + 1 else ""
+        items.append({
+            'id': int(row[0]),
+            'start_time': int(row[1]),
+            'duration': int(row[2]),
+            'args': [to_text(arg) for arg in row[args_index]],
+            'client_address': to_text(client),
+        })
+    return items
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法分位数，sorted_values须已排序"""
+    if not sorted_values:
+        return 0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def format_duration(micros):
+    """微秒耗时显示"""
+    if micros >= 1000000:
+        return f"{micros / 1000000:.2f} s"
+    if micros >= 1000:
+        return f"{micros / 1000:.1f} ms"
+    return f"{micros} µs"
+
+
+class SlowlogCollector:
+    """慢查询收集器
+    
+    每个节点记录已见过的最大ID，只接收更新的条目；节点最新ID变小说明执行过SLOWLOG RESET，
+    重新从头接收。条目保存在有上限的deque中，聚合在快照时按需计算。
+    """
+    
+    MAX_ENTRIES = 20000
+    # 聚合表最多显示的分组数
+    MAX_GROUPS = 500
+    
+    def __init__(self, delimiter=":"):
+        self.delimiter = delimiter
+        self.entries = deque(maxlen=self.MAX_ENTRIES)
+        # 节点名 -> 已接收的最大slowlog ID
+        self.last_ids = {}
+        # 节点名 -> [(事件, 时间戳, 最近耗时ms, 最大耗时ms, [历史耗时ms])]
+        self.latency = {}
+        self.errors = {}
+    
+    def key_prefix(self, key):
+        """key的一级前缀，没有分隔符时返回整个key"""
+        if not key:
+            return ""
+        if self.delimiter and self.delimiter in key:
+            return key.split(self.delimiter, 1)[0] + self.delimiter + "*"
+        return key
+    
+    def add_slowlog(self, node_name, items):
+        """合并一个节点的SLOWLOG GET结果(parse_slowlog_entries)，返回新增条目数"""
+        if not items:
+            return 0
+        newest = max(item['id'] for item in items)
+        last_id = self.last_ids.get(node_name)
+        if last_id is not None and newest < last_id:
+            # 慢日志被重置过
+            last_id = None
+        
+        added = 0
+        # SLOWLOG GET按从新到旧返回，倒序加入保持时间顺序
+        for item in reversed(items):
+            if last_id is not None and item['id'] <= last_id:
+                continue
+            args = item['args'] or [""]
+            self.entries.append({
+                'node': node_name,
+                'id': item['id'],
+                'time': item['start_time'],
+                'duration': item['duration'],
+                'command': args[0].upper(),
+                'key': args[1] if len(args) > 1 else "",
+                'args': ' '.join(args),
+                'client': item['client_address'],
+            })
+            added += 1
+        self.last_ids[node_name] = newest
+        return added
+    
+    def set_latency(self, node_name, latest, histories):
+        """记录一个节点的LATENCY LATEST和各事件的HISTORY"""
+        events = []
+        for row in latest or []:
+            event = to_text(row[0])
+            history = [int(point[1]) for point in histories.get(event, [])]
+            events.append((event, int(row[1]), int(row[2]), int(row[3]), history))
+        self.latency[node_name] = events
+    
+    def groups(self):
+        """按(命令, key前缀)聚合：次数、分位数、最大值、涉及节点"""
+        durations = {}
+        nodes = {}
+        for entry in self.entries:
+            group = (entry['command'], self.key_prefix(entry['key']))
+            durations.setdefault(group, []).append(entry['duration'])
+            nodes.setdefault(group, set()).add(entry['node'])
+        
+        groups = []
+        for (command, prefix), values in durations.items():
+            values.sort()
+            groups.append({
+                'command': command,
+                'prefix': prefix,
+                'count': len(values),
+                'p50': percentile(values, 0.5),
+                'p90': percentile(values, 0.9),
+                'p99': percentile(values, 0.99),
+                'max': values[-1],
+                'total': sum(values),
+                'nodes': len(nodes[(command, prefix)]),
+            })
+        groups.sort(key=lambda group: -group['total'])
+        return groups[:self.MAX_GROUPS]
+    
+    def matching_entries(self, command=None, prefix=None, limit=1000):
+        """某个分组的条目，按耗时从大到小"""
+        entries = [entry for entry in self.entries
+                   if (command is None or entry['command'] == command)
+                   and (prefix is None or self.key_prefix(entry['key']) == prefix)]
+        entries.sort(key=lambda entry: -entry['duration'])
+        return entries[:limit]
+
+
+class SlowlogPanel(QWidget):
+    """慢查询页面"""
+    
+    GROUP_HEADERS = ["命令", "Key前缀", "次数", "P50", "P90", "P99", "最大", "节点数"]
+    ENTRY_HEADERS = ["时间", "节点", "耗时", "命令", "客户端"]
+    LATENCY_HEADERS = ["节点", "事件", "最近", "最大", "历史"]
+    
+    def __init__(self, tool, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.collector = None
+        self.task_id = None
+        self.groups = []
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 10, 0, 0)
+        
+        options_layout = QHBoxLayout()
+        self.count_input = QSpinBox()
+        self.count_input.setRange(10, 10000)
+        self.count_input.setValue(128)
+        self.count_input.setToolTip("每个节点SLOWLOG GET的条数")
+        self.delimiter_input = QLineEdit(":")
+        self.delimiter_input.setFixedWidth(40)
+        self.delimiter_input.editingFinished.connect(self.update_delimiter)
+        
+        self.fetch_btn = QPushButton("🔄 获取慢查询")
+        self.fetch_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #fd7e14;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #e8590c;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.fetch_btn.clicked.connect(self.fetch)
+        clear_btn = QPushButton("清空")
+        clear_btn.setToolTip("只清空本地收集的结果，不执行SLOWLOG RESET")
+        clear_btn.clicked.connect(self.clear)
+        
+        for label_text, widget in (("条数:", self.count_input), ("分隔符:", self.delimiter_input)):
+            label = QLabel(label_text)
+            label.setStyleSheet("font-weight: bold;")
+            options_layout.addWidget(label)
+            options_layout.addWidget(widget)
+        options_layout.addWidget(self.fetch_btn)
+        options_layout.addWidget(clear_btn)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6c757d;")
+        layout.addWidget(self.status_label)
+        
+        splitter = QSplitter(Qt.Vertical)
+        top = QSplitter(Qt.Horizontal)
+        self.group_table = self.create_table(self.GROUP_HEADERS, stretch=1)
+        self.group_table.cellClicked.connect(self.on_group_clicked)
+        self.entry_table = self.create_table(self.ENTRY_HEADERS, stretch=3)
+        top.addWidget(self.group_table)
+        top.addWidget(self.entry_table)
+        top.setSizes([450, 450])
+        self.latency_table = self.create_table(self.LATENCY_HEADERS, stretch=4)
+        splitter.addWidget(top)
+        splitter.addWidget(self.latency_table)
+        splitter.setSizes([400, 150])
+        layout.addWidget(splitter, 1)
+    
+    def create_table(self, headers, stretch):
+        """创建只读表格"""
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().setVisible(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(stretch, QHeaderView.Stretch)
+        return table
+    
+    def fetch(self):
+        """从所有主节点拉取慢查询和延迟事件，结果与已收集的合并"""
+        thread = self.tool.connection_thread
+        if not (thread and thread.redis_client):
+            self.tool.show_message("警告", "请先连接到Redis", "warning")
+            return
+        if self.task_id is not None:
+            return
+        
+        if self.collector is None:
+            self.collector = SlowlogCollector(self.delimiter_input.text())
+        collector = self.collector
+        self.status_label.setText("获取中...")
+        self.fetch_btn.setEnabled(False)
+        self.task_id = self.tool.submit_task(
+            thread.fetch_slowlog, collector, self.count_input.value(),
+            on_success=lambda added: self.on_fetch_done(collector, added),
+            on_error=self.on_fetch_error)
+    
+    def on_fetch_done(self, collector, added):
+        """拉取完成：刷新各表格"""
+        if collector is not self.collector:
+            return
+        self.task_id = None
+        self.fetch_btn.setEnabled(True)
+        text = f"新增 {added} 条，共 {len(collector.entries)} 条慢查询，{len(collector.last_ids)} 个节点"
+        if collector.errors:
+            text += "；失败: " + "，".join(f"{node} {error}" for node, error in collector.errors.items())
+        self.status_label.setText(text)
+        self.refresh_tables()
+    
+    def on_fetch_error(self, error):
+        """拉取失败"""
+        self.task_id = None
+        self.fetch_btn.setEnabled(True)
+        self.status_label.setText(f"获取慢查询失败: {error}")
+    
+    def update_delimiter(self):
+        """修改前缀分隔符后重新聚合"""
+        if self.collector is not None and self.collector.delimiter != self.delimiter_input.text():
+            self.collector.delimiter = self.delimiter_input.text()
+            self.refresh_tables()
+    
+    def refresh_tables(self):
+        """刷新聚合表、条目表和延迟表"""
+        collector = self.collector
+        self.groups = collector.groups()
+        self.group_table.setRowCount(len(self.groups))
+        for row, group in enumerate(self.groups):
+            values = (group['command'], group['prefix'], str(group['count']),
+                      format_duration(group['p50']), format_duration(group['p90']),
+                      format_duration(group['p99']), format_duration(group['max']),
+                      str(group['nodes']))
+            for column, value in enumerate(values):
+                self.group_table.setItem(row, column, QTableWidgetItem(value))
+        self.show_entries(collector.matching_entries())
+        
+        rows = [(node, event) for node in sorted(collector.latency) for event in collector.latency[node]]
+        self.latency_table.setRowCount(len(rows))
+        for row, (node, (event, _, latest_ms, max_ms, history)) in enumerate(rows):
+            values = (node, event, f"{latest_ms} ms", f"{max_ms} ms", sparkline(history))
+            for column, value in enumerate(values):
+                self.latency_table.setItem(row, column, QTableWidgetItem(value))
+    
+    def show_entries(self, entries):
+        """显示慢查询条目"""
+        self.entry_table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            values = (datetime.fromtimestamp(entry['time']).strftime('%Y-%m-%d %H:%M:%S'),
+                      entry['node'], format_duration(entry['duration']), entry['args'],
+                      entry['client'])
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 3:
+                    item.setToolTip(entry['args'])
+                self.entry_table.setItem(row, column, item)
+    
+    def on_group_clicked(self, row, column):
+        """点击聚合行，只显示该分组的条目"""
+        if self.collector is None or row >= len(self.groups):
+            return
+        group = self.groups[row]
+        self.show_entries(self.collector.matching_entries(group['command'], group['prefix']))
+    
+    def clear(self):
+        """清空本地结果"""
+        self.tool.cancel_task(self.task_id)
+        self.task_id = None
+        self.fetch_btn.setEnabled(True)
+        self.collector = None
+        self.groups = []
+        self.status_label.setText("")
+        for table in (self.group_table, self.entry_table, self.latency_table):
+            table.setRowCount(0)
+    
+    def reset(self):
+        """断开连接时清空"""
+        self.clear()
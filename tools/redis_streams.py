@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis Stream与Pub/Sub
+Stream按ID分页浏览、消费组/待确认消息查看，以及XREAD/SUBSCRIBE实时跟踪：
+工作线程把消息写入固定容量的环形缓冲，界面按固定帧率批量取出渲染
+"""
+
+import threading
+import time
+from collections import deque
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QLineEdit, QComboBox, QCheckBox, QTableView, QHeaderView,
+                             QAbstractItemView)
+from PyQt5.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex
+
+
+# 工作线程侧环形缓冲容量：两帧之间超出的旧消息被丢弃
+TAIL_BUFFER_SIZE = 20000
+# 界面最多保留的消息行数
+TAIL_VIEW_ROWS = 5000
+# 渲染间隔（毫秒），即最高10帧/秒
+FRAME_INTERVAL_MS = 100
+# 每段读取的时长（秒），同步后端在两段之间处理其他任务
+TAIL_SLICE_SECONDS = 0.5
+# 每次XREAD最多读取的消息数
+TAIL_READ_COUNT = 1000
+# 待确认消息明细每次读取的条数
+PENDING_PAGE_SIZE = 100
+# 频道名包含这些字符时使用PSUBSCRIBE
+CHANNEL_PATTERN_CHARS = '*?['
+
+
+def split_stream_id(entry_id):
+    """'毫秒-序号' -> (毫秒, 序号)"""
+    ms, _, seq = str(entry_id).partition('-')
+    return int(ms), int(seq or 0)
+
+
+def next_stream_id(entry_id):
+    """紧跟在entry_id之后的ID，用作下一页XRANGE的起点（兼容不支持排他区间的旧版本）"""
+    ms, seq = split_stream_id(entry_id)
+    return f"{ms}-{seq + 1}"
+
+
+def prev_stream_id(entry_id):
+    """紧挨在entry_id之前的ID，用作下一页XREVRANGE的终点"""
+    ms, seq = split_stream_id(entry_id)
+    if seq > 0:
+        return f"{ms}-{seq - 1}"
+    if ms > 0:
+        return f"{ms - 1}-18446744073709551615"
+    return None
+
+
+def format_fields(fields):
+    """消息字段 -> 'field=value'文本"""
+    if isinstance(fields, dict):
+        fields = fields.items()
+    return "  ".join(f"{field}={value}" for field, value in fields)
+
+
+def stream_page_range(cursor, reverse):
+    """分页游标 -> XRANGE/XREVRANGE的区间，游标0表示从头（倒序时从最新）开始"""
+    if reverse:
+        return ('+' if not cursor else cursor), '-'
+    return ('-' if not cursor else cursor), '+'
+
+
+def next_stream_cursor(entries, count, reverse):
+    """本页的下一页游标，不足一页或已到ID边界时返回0"""
+    if len(entries) < count:
+        return 0
+    last_id = entries[-1][0]
+    return (prev_stream_id(last_id) if reverse else next_stream_id(last_id)) or 0
+
+
+def merge_stream_groups(groups, pendings):
+    """合并XINFO GROUPS和每个组的XPENDING概要"""
+    result = []
+    for group, pending in zip(groups, pendings):
+        consumers = []
+        if isinstance(pending, dict):
+            consumers = [(consumer['name'], consumer['pending'])
+                         for consumer in pending.get('consumers') or []]
+        result.append({
+            'name': group.get('name'),
+            'consumers': group.get('consumers', 0),
+            'pending': group.get('pending', 0),
+            'last_delivered_id': group.get('last-delivered-id', ''),
+            # Redis 7之前没有lag字段
+            'lag': group.get('lag'),
+            'pending_consumers': consumers,
+        })
+    return result
+
+
+def is_channel_pattern(channel):
+    """频道名是否为通配模式"""
+    return any(char in channel for char in CHANNEL_PATTERN_CHARS)
+
+
+class StreamTail:
+    """一次实时跟踪的状态
+    
+    工作线程调用push写入消息，界面定时调用drain取走两帧之间到达的消息；
+    缓冲满时最旧的消息被覆盖并计入丢弃数，内存占用与消息速率无关。
+    """
+    
+    MODE_STREAM = 'stream'
+    MODE_CHANNEL = 'channel'
+    
+    def __init__(self, mode, targets, capacity=TAIL_BUFFER_SIZE):
+        self.mode = mode
+        self.targets = targets
+        self.buffer = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.received = 0
+        self.dropped = 0
+        self.started = time.monotonic()
+        # Stream模式：key -> 已读到的最后一个ID
+        self.last_ids = {}
+        # Pub/Sub模式：订阅对象及其专用客户端（异步集群模式）
+        self.pubsub = None
+        self.pubsub_client = None
+        self.stopped = False
+    
+    def channels(self):
+        """(普通频道, 通配模式)"""
+        channels = [target for target in self.targets if not is_channel_pattern(target)]
+        patterns = [target for target in self.targets if is_channel_pattern(target)]
+        return channels, patterns
+    
+    def push(self, source, text):
+        """写入一条消息"""
+        with self.lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append((time.time(), source, text))
+            self.received += 1
+    
+    def push_stream_replies(self, replies):
+        """写入XREAD的返回 [[key, [(id, fields), ...]], ...]，并推进各key的读取位置"""
+        for key, entries in replies or []:
+            if not entries:
+                continue
+            for entry_id, fields in entries:
+                self.push(key, f"{entry_id}  {format_fields(fields)}")
+            self.last_ids[key] = entries[-1][0]
+    
+    def push_message(self, message):
+        """写入一条Pub/Sub消息"""
+        if message and message.get('type') in ('message', 'pmessage'):
+            self.push(message['channel'], message['data'])
+    
+    def drain(self):
+        """取走缓冲中的全部消息"""
+        with self.lock:
+            messages = list(self.buffer)
+            self.buffer.clear()
+        return messages
+    
+    def slice_deadline(self):
+        """本段读取的截止时间"""
+        return time.monotonic() + TAIL_SLICE_SECONDS
+    
+    def rate(self):
+        """平均每秒消息数"""
+        elapsed = time.monotonic() - self.started
+        return self.received / elapsed if elapsed > 0 else 0
+
+
+class TailMessageModel(QAbstractTableModel):
+    """实时消息模型：只保留最近max_rows行，超出时从头部删除"""
+    
+    HEADERS = ["时间", "来源", "内容"]
+    
+    def __init__(self, max_rows=TAIL_VIEW_ROWS, parent=None):
+        super().__init__(parent)
+        self.max_rows = max_rows
+        self.rows = []
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        timestamp, source, text = self.rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return time.strftime('%H:%M:%S', time.localtime(timestamp)) + f".{int(timestamp * 1000) % 1000:03d}"
+        if column == 1:
+            return str(source)
+        return str(text)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+    
+    def clear(self):
+        """清空"""
+        self.beginResetModel()
+        self.rows = []
+        self.endResetModel()
+    
+    def append_messages(self, messages):
+        """追加一批消息，一帧只触发一次删除和一次插入"""
+        if not messages:
+            return
+        if len(messages) >= self.max_rows:
+            self.beginResetModel()
+            self.rows = messages[-self.max_rows:]
+            self.endResetModel()
+            return
+        
+        overflow = len(self.rows) + len(messages) - self.max_rows
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            del self.rows[:overflow]
+            self.endRemoveRows()
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(messages) - 1)
+        self.rows.extend(messages)
+        self.endInsertRows()
+
+
+class StreamTailPanel(QWidget):
+    """Stream/Pub/Sub实时跟踪页面"""
+    
+    def __init__(self, tool, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.tail = None
+        self.task_id = None
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setInterval(FRAME_INTERVAL_MS)
+        self.frame_timer.timeout.connect(self.render_frame)
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 10, 0, 0)
+        
+        options_layout = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItem("Stream (XREAD)", StreamTail.MODE_STREAM)
+        self.mode_combo.addItem("Pub/Sub (SUBSCRIBE)", StreamTail.MODE_CHANNEL)
+        self.mode_combo.currentIndexChanged.connect(self.update_placeholder)
+        
+        self.target_input = QLineEdit()
+        self.target_input.setMinimumWidth(260)
+        self.target_input.returnPressed.connect(self.start_tail)
+        
+        self.start_btn = QPushButton("▶ 开始")
+        self.start_btn.setFixedWidth(80)
+        self.start_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #28a745;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #218838;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.start_btn.clicked.connect(self.start_tail)
+        
+        self.stop_btn = QPushButton("⏹ 停止")
+        self.stop_btn.setFixedWidth(80)
+        self.stop_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.stop_btn.clicked.connect(self.stop_tail)
+        
+        self.clear_btn = QPushButton("清空")
+        self.clear_btn.setFixedWidth(60)
+        self.clear_btn.clicked.connect(self.clear_messages)
+        
+        self.follow_checkbox = QCheckBox("自动滚动")
+        self.follow_checkbox.setChecked(True)
+        
+        for label_text, widget in (("方式:", self.mode_combo), ("目标:", self.target_input)):
+            label = QLabel(label_text)
+            label.setStyleSheet("font-weight: bold;")
+            options_layout.addWidget(label)
+            options_layout.addWidget(widget)
+        options_layout.addWidget(self.start_btn)
+        options_layout.addWidget(self.stop_btn)
+        options_layout.addWidget(self.clear_btn)
+        options_layout.addWidget(self.follow_checkbox)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #6c757d;")
+        layout.addWidget(self.status_label)
+        
+        self.model = TailMessageModel(parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        # 固定行高，避免每帧按内容重新计算
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Fixed)
+        header.resizeSection(0, 100)
+        header.setSectionResizeMode(1, QHeaderView.Interactive)
+        header.resizeSection(1, 180)
+        header.setStretchLastSection(True)
+        layout.addWidget(self.table, 1)
+        
+        self.update_placeholder()
+        self.update_controls()
+    
+    def update_placeholder(self):
+        """根据方式更新输入提示"""
+        if self.mode_combo.currentData() == StreamTail.MODE_STREAM:
+            self.target_input.setPlaceholderText("stream key，多个用空格分隔")
+        else:
+            self.target_input.setPlaceholderText("频道，多个用空格分隔，支持 * ? [] 通配")
+    
+    def follow_stream(self, key):
+        """从Stream值页面跳转：填入key并开始跟踪"""
+        self.mode_combo.setCurrentIndex(self.mode_combo.findData(StreamTail.MODE_STREAM))
+        self.target_input.setText(key)
+        self.start_tail()
+    
+    def start_tail(self):
+        """开始跟踪"""
+        thread = self.tool.connection_thread
+        if not (thread and thread.redis_client):
+            self.tool.show_message("警告", "请先连接到Redis", "warning")
+            return
+        targets = self.target_input.text().split()
+        if not targets:
+            self.tool.show_message("警告", "请输入要跟踪的stream key或频道", "warning")
+            return
+        
+        self.stop_tail()
+        self.tail = thread.create_stream_tail(self.mode_combo.currentData(), targets)
+        self.model.clear()
+        self.status_label.setText("等待消息...")
+        self.frame_timer.start()
+        self.submit_next_slice()
+    
+    def submit_next_slice(self):
+        """提交下一段读取任务"""
+        tail = self.tail
+        self.task_id = self.tool.submit_task(
+            self.tool.connection_thread.tail_slice, tail,
+            on_success=lambda result: self.on_slice_done(tail),
+            on_error=lambda error: self.on_tail_error(tail, error))
+        self.update_controls()
+    
+    def on_slice_done(self, tail):
+        """一段读取完成，未停止时继续"""
+        if tail is not self.tail:
+            return
+        self.task_id = None
+        if not tail.stopped and self.tool.connection_thread:
+            self.submit_next_slice()
+            return
+        self.update_controls()
+    
+    def on_tail_error(self, tail, error):
+        """读取失败"""
+        if tail is not self.tail:
+            return
+        self.task_id = None
+        self.render_frame()
+        self.frame_timer.stop()
+        tail.stopped = True
+        self.close_tail()
+        self.status_label.setText(f"跟踪失败: {error}")
+        self.update_controls()
+    
+    def render_frame(self):
+        """取出两帧之间到达的消息批量追加到视图"""
+        tail = self.tail
+        if tail is None:
+            return
+        messages = tail.drain()
+        if messages:
+            self.model.append_messages(messages)
+            if self.follow_checkbox.isChecked():
+                self.table.scrollToBottom()
+        self.status_label.setText(
+            f"已接收 {tail.received} 条，平均 {tail.rate():.0f} 条/秒，"
+            f"丢弃 {tail.dropped} 条（仅显示最近 {TAIL_VIEW_ROWS} 条）")
+    
+    def stop_tail(self):
+        """停止跟踪，保留已显示的消息"""
+        if self.tail is not None:
+            self.tail.stopped = True
+            self.render_frame()
+        self.frame_timer.stop()
+        self.tool.cancel_task(self.task_id)
+        self.task_id = None
+        self.close_tail()
+        self.update_controls()
+    
+    def close_tail(self):
+        """提交任务取消订阅并注销跟踪状态"""
+        tail = self.tail
+        thread = self.tool.connection_thread
+        if tail is not None and thread:
+            self.tool.submit_task(thread.close_stream_tail, tail)
+    
+    def clear_messages(self):
+        """清空已显示的消息"""
+        self.model.clear()
+    
+    def reset(self):
+        """断开连接时清空"""
+        self.stop_tail()
+        self.tail = None
+        self.status_label.setText("")
+        self.model.clear()
+    
+    def update_controls(self):
+        """根据状态更新控件"""
+        running = self.tail is not None and not self.tail.stopped
+        self.start_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.mode_combo.setEnabled(not running)
+        self.target_input.setEnabled(not running)
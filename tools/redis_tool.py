@@ -5,233 +5,1541 @@ Redis连接工具
 支持单机和集群模式
 """
 
+import itertools
 import json
 import os
+import queue
+import re
 import redis
-from redis.cluster import RedisCluster
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from redis.cluster import RedisCluster, ClusterNode
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                             QLabel, QLineEdit, QTextEdit, QComboBox, QTreeWidget, 
-                             QTreeWidgetItem, QSplitter, QGroupBox, QSpinBox,
+                             QLabel, QLineEdit, QTextEdit, QComboBox, QTreeView, 
+                             QAbstractItemView, QSplitter, QGroupBox, QSpinBox,
                              QMessageBox, QTabWidget, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QFrame, QSizePolicy, QCheckBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                             QHeaderView, QFrame, QSizePolicy, QCheckBox, QStackedWidget)
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon
 from .base_tool import BaseTool
+from .redis_key_model import RedisKeyModel
+from .redis_namespace_model import NamespaceTreeModel
+from .redis_key_cache import get_key_cache, glob_to_regex
+from .redis_pool_registry import acquire_client, release_client
+from .redis_cluster_topology import get_topology_service, cluster_nodes_text
+from .redis_memory_analyzer import MemoryAnalysis, MemoryAnalyzerPanel
+from .redis_transfer import ExportJob, TransferPanel, FORMAT_DUMP
+from .redis_bulk_ops import BulkKeyOperation, BulkOperationDialog
+from .redis_metrics import INFO_SECTIONS, MetricsPanel, merge_info_sections
+from .redis_slowlog import SlowlogPanel, parse_slowlog_entries, to_text
+from .redis_hotkeys import HotKeyProfile, HotKeyPanel
+from .redis_streams import (StreamTail, StreamTailPanel, PENDING_PAGE_SIZE, TAIL_READ_COUNT,
+                            format_fields, merge_stream_groups, next_stream_cursor,
+                            stream_page_range)
+from .redis_decoders import (DecodeSession, DecodedValueCache, decode_text, decode_value,
+                             formatter_names)
+from .redis_scan_filter import ScanFilterBar
+from .redis_key_index import (KeyIndex, KeyQuery, SEARCH_GLOB, SEARCH_SUBSTRING, SEARCH_REGEX,
+                              SEARCH_FUZZY)
+from .redis_keyspace_watch import KeyspaceWatch, missing_notify_flags, parse_notify_config
+from .redis_scripts import (KEY_INFO_SCRIPT, METADATA_FIELDS, METADATA_SIZE_FIELDS, MEMORY_FIELDS,
+                            ScriptUnavailable, slot_groups, queue_key_info, parse_key_info)
+from .redis_compare import (ComparePanel, ChunkedDigest, queue_value_command, value_digest, value_weight,
+                            is_large_value, budget_batches, iter_value_chunks)
+from .redis_value_cache import (ValueCache, CacheCursor, VALUE_DIGEST_SCRIPT, DIGEST_DEBUG, DIGEST_LUA,
+                                DIGEST_OFF, parse_digest_reply, lua_digest_allowed)
+
+
+class ConnectionModeError(Exception):
+    """连接模式与目标Redis不符（单机/集群）"""
 
 
 class RedisConnectionThread(QThread):
     """Redis连接线程"""
     connection_result = pyqtSignal(bool, str)
     data_loaded = pyqtSignal(dict)
+    # 流式扫描：每个SCAN页发出一批key，以及(已加载数量, 是否结束)进度；界面据此判断能否继续加载
+    keys_batch = pyqtSignal(dict)
+    scan_progress = pyqtSignal(int, bool)
+    # 集群并行扫描的单节点进度：(节点名, 该节点已加载数量, 该节点是否扫描完)
+    node_progress = pyqtSignal(str, int, bool)
+    # 任务队列结果：(任务ID, 结果) / (任务ID, 错误信息)
+    task_finished = pyqtSignal(int, object)
+    task_failed = pyqtSignal(int, str)
     
-    def __init__(self, host, port, password=None, db=0, cluster_mode=False):
+    # 每个pipeline批次包含的key数量
+    DEFAULT_PIPELINE_BATCH_SIZE = 500
+    # 每次SCAN的COUNT提示值
+    DEFAULT_SCAN_COUNT = 1000
+    # 分页取值：每页元素数量，大字符串每段读取的字节数
+    VALUE_PAGE_SIZE = 500
+    STRING_CHUNK_SIZE = 256 * 1024
+    # 集群并行扫描的最大并发节点数
+    MAX_SCAN_WORKERS = 8
+    # 已停止但仍在执行阻塞命令的线程，结束前保留引用，避免QThread在运行中被销毁
+    retiring_threads = set()
+    
+    def __init__(self, host, port, password=None, db=0, cluster_mode=False,
+                 pipeline_batch_size=DEFAULT_PIPELINE_BATCH_SIZE, key_cache=None):
         super().__init__()
         self.host = host
         self.port = port
         self.password = password
         self.db = db
         self.cluster_mode = cluster_mode
+        self.pipeline_batch_size = max(1, int(pipeline_batch_size))
         self.redis_client = None
         self.operation = None
         self.pattern = "*"
+        # 流式扫描状态：节点名 -> 游标（单机模式节点名为None）
+        self.scan_count = self.DEFAULT_SCAN_COUNT
+        self.scan_cursors = {}
+        self.scan_cancelled = False
+        self.scanned_total = 0
+        self.node_scanned = {}
+        # key元数据缓存（KeyMetadataCache），命中时直接从缓存分页产出
+        self.key_cache = key_cache
+        self.cached_pages = None
+        self.cache_hit = False
+        # 扫描开始时缓存的generation，扫描期间缓存失去过完整性时不记录该模式完整
+        self.cache_generation = None
+        # 扫描过滤条件（ScanFilter），服务端不支持SCAN TYPE时改为在元数据中过滤
+        self.scan_filter = None
+        self.scan_type_supported = True
+        self.server_filtered = False
+        self.filtered_out = 0
+        # 任务队列：所有Redis操作都在本线程中串行执行
+        self.task_queue = queue.Queue()
+        self.task_ids = itertools.count(1)
+        self.cancelled_tasks = set()
+        self.current_task_id = None
+        # 可能持有MONITOR连接的热Key分析，线程退出时关闭
+        self.hot_key_profiles = []
+        # 可能持有订阅连接的实时跟踪和keyspace通知监听，线程退出时关闭
+        self.stream_tails = []
+        self.key_watches = []
+        # 字符串值的解码结果缓存
+        self.decoded_cache = DecodedValueCache()
+        # 已取回的大值，服务端摘要不变时直接返回；摘要方式在第一次使用时探测
+        self.value_cache = ValueCache()
+        # 服务端禁用脚本或无权限时置为False，之后只用pipeline
+        self.batch_scripts_enabled = True
+        self.value_digest_mode = None
+        self.value_digest_script = None
     
     def run(self):
-        """线程主执行方法"""
+        """线程主执行方法：建立连接后循环处理任务队列，退出时归还客户端"""
+        if self.connect_client():
+            try:
+                self.process_tasks()
+            finally:
+                self.close_client()
+    
+    def connect_client(self):
+        """从连接池注册表获取Redis客户端，成功返回True
+        
+        同一会话配置的客户端在进程内共享，断开或切换工具后保留空闲的连接池和集群槽位映射，
+        重连时跳过TCP握手、认证和集群拓扑发现
+        """
         try:
-            if self.cluster_mode:
-                # 集群模式：智能检测和连接
-                try:
-                    # 步骤1：先测试单机连接获取集群信息
-                    test_client = redis.Redis(
-                        host=self.host,
-                        port=self.port,
-                        password=self.password,
-                        decode_responses=True,
-                        socket_connect_timeout=5,
-                        socket_timeout=5
-                    )
-                    
-                    # 检查是否是集群节点
-                    try:
-                        info = test_client.info()
-                        if info.get('redis_mode') != 'cluster':
-                            test_client.close()
-                            self.connection_result.emit(False, "这不是集群节点，请使用单机模式")
-                            return
-                    except:
-                        pass
-                    
-                    # 获取集群节点信息
-                    try:
-                        nodes_info = test_client.execute_command('CLUSTER', 'NODES')
-                        test_client.close()
-                        
-                        # 解析所有节点
-                        startup_nodes = []
-                        for line in nodes_info.split('\n'):
-                            if line.strip() and 'myself' in line:
-                                parts = line.split()
-                                host_port = parts[1]
-                                if '@' in host_port:
-                                    host_port = host_port.split('@')[0]
-                                if ':' in host_port:
-                                    node_host, node_port = host_port.split(':')
-                                    startup_nodes.append({"host": node_host, "port": int(node_port)})
-                        
-                        if not startup_nodes:
-                            startup_nodes = [{"host": self.host, "port": self.port}]
-                            
-                    except:
-                        startup_nodes = [{"host": self.host, "port": self.port}]
-                    
-                    # 使用发现的节点连接
-                    self.redis_client = RedisCluster(
-                        startup_nodes=startup_nodes,
-                        password=self.password,
-                        decode_responses=True,
-                        skip_full_coverage_check=True,
-                        socket_connect_timeout=15,
-                        socket_timeout=15,
-                        socket_keepalive=True,
-                        retry_on_timeout=True,
-                        retry_on_error=[ConnectionError, TimeoutError],
-                        max_connections=32
-                    )
-                    
-                except Exception as e:
-                    # 最后尝试：使用单个节点连接
-                    try:
-                        self.redis_client = RedisCluster(
-                            host=self.host,
-                            port=self.port,
-                            password=self.password,
-                            decode_responses=True,
-                            skip_full_coverage_check=True,
-                            socket_connect_timeout=15,
-                            socket_timeout=15,
-                            max_connections=32
-                        )
-                    except Exception as e2:
-                        # 检查具体错误类型
-                        error_str = str(e2).lower()
-                        if "cluster" in error_str and "not" in error_str:
-                            raise Exception("目标Redis不是集群模式，请检查配置")
-                        elif "connection" in error_str or "timeout" in error_str:
-                            raise Exception(f"连接失败: {e2}")
-                        else:
-                            raise e2
-            else:
-                # 单机模式
-                self.redis_client = redis.Redis(
-                    host=self.host,
-                    port=self.port,
+            self.redis_client, reused = acquire_client(
+                self.host, self.port, self.password, self.db, self.cluster_mode, self.create_client)
+            if reused:
+                print(f"复用连接池: {self.host}:{self.port}")
+            self.connection_result.emit(True, "连接成功")
+            return True
+        
+        except ConnectionModeError as e:
+            self.connection_result.emit(False, str(e))
+            return False
+        except Exception as e:
+            self.connection_result.emit(False, self.describe_connection_error(e))
+            return False
+    
+    def create_client(self):
+        """新建Redis客户端并检查连接模式，模式不符时抛出ConnectionModeError"""
+        if self.cluster_mode:
+            # 集群模式：以拓扑服务中已知的全部节点作为启动节点，入口节点不可用时仍能连上
+            topology = get_topology_service(self.host, self.port)
+            startup_nodes = [ClusterNode(host, port) for host, port in topology.startup_nodes()]
+            try:
+                client = RedisCluster(
+                    startup_nodes=startup_nodes,
                     password=self.password,
-                    db=self.db,
                     decode_responses=True,
-                    socket_connect_timeout=10,
-                    socket_timeout=10,
+                    skip_full_coverage_check=True,
+                    socket_connect_timeout=15,
+                    socket_timeout=15,
                     socket_keepalive=True,
-                    health_check_interval=30,
-                    retry_on_timeout=True
+                    retry_on_timeout=True,
+                    retry_on_error=[ConnectionError, TimeoutError],
+                    max_connections=32
                 )
-                
-                # 测试连接
-                self.redis_client.ping()
-                
-                # 检查是否是集群节点（提供提示）
-                try:
-                    info = self.redis_client.info()
-                    if info.get('redis_mode') == 'cluster' and not self.cluster_mode:
-                        self.connection_result.emit(False, "这是集群节点，请使用集群模式连接")
-                        return
-                except:
-                    pass
-                    
-            self.connection_result.emit(True, "连接成功")
+            except Exception as e:
+                # 检查具体错误类型
+                error_str = str(e).lower()
+                if "cluster" in error_str and "not" in error_str:
+                    raise ConnectionModeError("这不是集群节点，请使用单机模式")
+                elif "connection" in error_str or "timeout" in error_str:
+                    raise Exception(f"连接失败: {e}")
+                else:
+                    raise
             
-        except Exception as e:
-            # 智能错误分析
-            error_msg = str(e)
-            error_lower = error_msg.lower()
+            # 首次连接或拓扑过旧时在后台解析完整的节点/槽位映射，之后由重定向触发刷新
+            try:
+                topology.watch(client)
+            except Exception as e:
+                # 监听只用于及时刷新拓扑，挂载失败不影响连接
+                print(f"无法监听集群重定向: {e}")
+            if topology.topology is None or topology.topology.is_stale():
+                topology.request_refresh(lambda: cluster_nodes_text(client))
+            return client
+        
+        # 单机模式
+        client = redis.Redis(
+            host=self.host,
+            port=self.port,
+            password=self.password,
+            db=self.db,
+            decode_responses=True,
+            socket_connect_timeout=10,
+            socket_timeout=10,
+            socket_keepalive=True,
+            health_check_interval=30,
+            retry_on_timeout=True
+        )
+        
+        try:
+            # 测试连接
+            client.ping()
             
-            if "cluster" in error_lower and ("not" in error_lower or "no" in error_lower):
-                error_msg = "目标Redis不是集群模式，请使用单机模式"
-            elif "clusterdown" in error_lower:
-                error_msg = "集群已下线，请检查集群状态"
-            elif "timeout" in error_lower:
-                error_msg = "连接超时，请检查网络、防火墙或Redis配置"
-            elif "connection" in error_lower or "refused" in error_lower:
-                error_msg = "连接被拒绝，请检查Redis是否运行、端口是否正确"
-            elif "auth" in error_lower or "password" in error_lower:
-                error_msg = "认证失败，请检查密码是否正确"
-            elif "busy" in error_lower:
-                error_msg = "Redis正忙，请稍后重试"
-            else:
-                error_msg = f"连接失败: {error_msg}"
-                
-            self.connection_result.emit(False, error_msg)
+            # 检查是否是集群节点（提供提示）
+            try:
+                info = client.info()
+                if info.get('redis_mode') == 'cluster':
+                    raise ConnectionModeError("这是集群节点，请使用集群模式连接")
+            except ConnectionModeError:
+                raise
+            except:
+                pass
+        except Exception:
+            client.close()
+            raise
+        return client
+    
+    def describe_connection_error(self, e):
+        """智能错误分析：把连接异常转换为提示信息"""
+        error_msg = str(e)
+        error_lower = error_msg.lower()
+        
+        if "cluster" in error_lower and ("not" in error_lower or "no" in error_lower):
+            error_msg = "目标Redis不是集群模式，请使用单机模式"
+        elif "clusterdown" in error_lower:
+            error_msg = "集群已下线，请检查集群状态"
+        elif "timeout" in error_lower:
+            error_msg = "连接超时，请检查网络、防火墙或Redis配置"
+        elif "connection" in error_lower or "refused" in error_lower:
+            error_msg = "连接被拒绝，请检查Redis是否运行、端口是否正确"
+        elif "auth" in error_lower or "password" in error_lower:
+            error_msg = "认证失败，请检查密码是否正确"
+        elif "busy" in error_lower:
+            error_msg = "Redis正忙，请稍后重试"
+        else:
+            error_msg = f"连接失败: {error_msg}"
+        return error_msg
+    
+    def close_client(self):
+        """归还Redis客户端，连接池由注册表保持空闲或淘汰"""
+        for profile in list(self.hot_key_profiles):
+            self.close_hot_key_monitors(profile)
+        for tail in list(self.stream_tails):
+            self.close_stream_tail(tail)
+        for watch in list(self.key_watches):
+            self.close_key_watch(watch)
+        if self.redis_client:
+            release_client(self.redis_client)
+            self.redis_client = None
+    
+    def submit(self, func, *args, **kwargs):
+        """提交任务到工作线程，返回任务ID，结果通过task_finished/task_failed发出"""
+        task_id = next(self.task_ids)
+        self.task_queue.put((task_id, func, args, kwargs))
+        return task_id
+    
+    def cancel(self, task_id):
+        """取消任务：排队中的任务不再执行，执行中的任务丢弃结果"""
+        if task_id is not None:
+            self.cancelled_tasks.add(task_id)
+    
+    def is_cancelled(self, task_id=None):
+        """检查任务是否已取消，默认检查当前执行的任务"""
+        if task_id is None:
+            task_id = self.current_task_id
+        return task_id in self.cancelled_tasks
+    
+    def stop_worker(self):
+        """停止任务循环，丢弃所有排队任务"""
+        self.cancel(self.current_task_id)
+        self.cancel_scan()
+        try:
+            while True:
+                self.task_queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.task_queue.put(None)
+    
+    def retire(self):
+        """停止任务循环并交出线程，调用方之后不再持有它
+        
+        正在执行的命令（MONITOR/跟踪切片、大pipeline）可能超过任意的等待时间，
+        因此不等待：断开所有信号，保留引用直到finished后再deleteLater
+        """
+        self.stop_worker()
+        for signal in (self.connection_result, self.data_loaded, self.keys_batch, self.scan_progress,
+                       self.node_progress, self.task_finished, self.task_failed):
+            try:
+                signal.disconnect()
+            except TypeError:
+                # 没有连接的槽
+                pass
+        if self.isRunning():
+            RedisConnectionThread.retiring_threads.add(self)
+            self.finished.connect(self.on_retired)
+    
+    def on_retired(self):
+        """交出的线程已结束，释放引用"""
+        RedisConnectionThread.retiring_threads.discard(self)
+        self.deleteLater()
+    
+    @classmethod
+    def wait_retired(cls):
+        """程序退出前等待所有交出的线程结束"""
+        for thread in list(cls.retiring_threads):
+            thread.wait()
+        cls.retiring_threads.clear()
+    
+    def process_tasks(self):
+        """任务循环"""
+        while True:
+            task = self.task_queue.get()
+            if task is None:
+                break
+            
+            task_id, func, args, kwargs = task
+            if self.is_cancelled(task_id):
+                self.cancelled_tasks.discard(task_id)
+                continue
+            
+            self.current_task_id = task_id
+            try:
+                result = func(*args, **kwargs)
+                if not self.is_cancelled(task_id):
+                    self.task_finished.emit(task_id, result)
+            except Exception as e:
+                if not self.is_cancelled(task_id):
+                    self.task_failed.emit(task_id, str(e))
+            finally:
+                self.current_task_id = None
+                self.cancelled_tasks.discard(task_id)
     
     def load_keys(self, pattern="*"):
         """加载所有key"""
         if not self.redis_client:
             self.data_loaded.emit({})
             return
-            
+        
         try:
-            if self.cluster_mode:
-                # 集群模式：使用RedisCluster的scan_iter
-                keys = list(self.redis_client.scan_iter(match=pattern))
-            else:
-                # 单机模式
-                keys = list(self.redis_client.scan_iter(match=pattern))
-            
             key_data = {}
-            for key in keys:
-                try:
-                    key_type = self.redis_client.type(key)
-                    ttl = self.redis_client.ttl(key)
-                    key_data[key] = {
-                        'type': key_type,
-                        'ttl': ttl
-                    }
-                except Exception as e:
-                    # 跳过无法访问的key
-                    continue
-            
+            self.start_scan(pattern)
+            while self.has_more_keys():
+                key_data.update(self.scan_next_page(emit=False))
             self.data_loaded.emit(key_data)
         except Exception as e:
             print(f"加载key失败: {e}")
             self.data_loaded.emit({})
     
-    def get_value(self, key, key_type):
-        """获取值"""
-        if not self.redis_client:
-            return "未连接到Redis"
-            
+    def start_scan(self, pattern="*", count=None, use_cache=True, scan_filter=None):
+        """开始新的游标扫描，之后通过scan_next_page逐页加载
+        
+        缓存中已有该模式(或更宽模式)的完整扫描结果时，直接在本地过滤产出；
+        scan_filter为过滤条件，不满足的key不会产出
+        """
+        self.pattern = pattern or "*"
+        self.scan_filter = scan_filter if scan_filter is not None and scan_filter.is_active() else None
+        self.server_filtered = False
+        self.filtered_out = 0
+        self.scan_count = count or self.DEFAULT_SCAN_COUNT
+        self.scan_cancelled = False
+        self.scanned_total = 0
+        self.node_scanned = {}
+        self.cached_pages = None
+        self.cache_generation = self.key_cache.generation if self.key_cache is not None else None
+        self.cache_hit = use_cache and self.key_cache is not None and self.key_cache.covers(self.pattern)
+        if self.cache_hit:
+            self.cached_pages = self.key_cache.iter_matching(self.pattern, self.scan_count)
+            self.scan_cursors = {}
+        elif self.cluster_mode:
+            # 集群模式：每个主节点维护独立游标
+            self.scan_cursors = {node.name: 0 for node in self.redis_client.get_primaries()}
+            for node_name in self.scan_cursors:
+                self.node_progress.emit(node_name, 0, False)
+        else:
+            self.scan_cursors = {None: 0}
+    
+    def has_more_keys(self):
+        """是否还有未扫描完的游标"""
+        pending = bool(self.scan_cursors) or self.cached_pages is not None
+        return pending and not self.scan_cancelled
+    
+    def scan_from_cache(self):
+        """当前扫描是否由缓存提供"""
+        return self.cache_hit
+    
+    def browse_keys(self, pattern="*", max_keys=1000, use_cache=True, scan_filter=None):
+        """任务：开始新的扫描并加载第一页"""
+        self.start_scan(pattern, use_cache=use_cache, scan_filter=scan_filter)
+        return self.scan_pages(max_keys)
+    
+    def refresh_keys(self, pattern="*", max_keys=1000, scan_filter=None):
+        """任务：清空key缓存后重新扫描"""
+        if self.key_cache is not None:
+            self.key_cache.clear()
+        return self.browse_keys(pattern, max_keys, False, scan_filter)
+    
+    def cache_scan_page(self, key_data):
+        """把一页扫描到的元数据（过滤前）写入缓存"""
+        if self.key_cache is not None and key_data:
+            self.key_cache.update(key_data)
+    
+    def record_scan_complete(self):
+        """扫描完整结束时在缓存中记录该模式
+        
+        服务端按类型过滤时没有见到全部key，扫描期间缓存淘汰过条目时部分key已不在缓存中，都不记录
+        """
+        if self.key_cache is None:
+            return
+        if not self.scan_cursors and not self.scan_cancelled and not self.server_filtered:
+            self.key_cache.mark_complete(self.pattern, self.cache_generation)
+    
+    def scan_pages(self, max_keys):
+        """任务：连续扫描直到追加max_keys个key、游标结束或任务被取消"""
+        if self.cluster_mode and len(self.scan_cursors) > 1:
+            return self.scan_pages_parallel(max_keys)
+        
+        loaded = 0
+        while loaded < max_keys and self.has_more_keys() and not self.is_cancelled():
+            loaded += len(self.scan_next_page())
+        return loaded
+    
+    def scan_node_page(self, node_name, cursor):
+        """扫描单个节点的一页并获取元数据，返回本页结果
+        
+        集群模式下在线程池中执行，因此不修改扫描状态：跳过的数量和SCAN TYPE的情况
+        随结果返回，由apply_scan_page在任务线程中记录
+        """
+        client = self.get_scan_client(node_name)
+        page = self.scan_with_filter(client, cursor)
+        keys = page.pop('keys')
+        key_data = self.fetch_key_metadata(keys, client, self.metadata_fields()) if keys else {}
+        self.cache_scan_page(key_data)
+        page['key_data'], page['skipped'] = self.filter_key_data(key_data, client)
+        return page
+    
+    def metadata_fields(self):
+        """扫描需要的元数据字段，按大小过滤时由脚本一并返回大小"""
+        if self.scan_filter is not None and self.scan_filter.needs_size():
+            return METADATA_SIZE_FIELDS
+        return METADATA_FIELDS
+    
+    def server_scan_type(self):
+        """可以交给服务端过滤的类型"""
+        if self.scan_filter is None or not self.scan_type_supported:
+            return None
+        return self.scan_filter.key_type
+    
+    def scan_with_filter(self, client, cursor):
+        """执行一次SCAN；按类型过滤时带上TYPE（Redis 6.0+），服务端不支持时退回在元数据中过滤
+        
+        返回{'cursor', 'keys', 'server_filtered', 'type_unsupported'}
+        """
+        key_type = self.server_scan_type()
+        page = {'server_filtered': False, 'type_unsupported': False}
         try:
-            if key_type == 'string':
-                return self.redis_client.get(key)
-            elif key_type == 'list':
-                return self.redis_client.lrange(key, 0, -1)
-            elif key_type == 'set':
-                return list(self.redis_client.smembers(key))
-            elif key_type == 'zset':
-                return self.redis_client.zrange(key, 0, -1, withscores=True)
-            elif key_type == 'hash':
-                return self.redis_client.hgetall(key)
-            else:
-                return f"不支持的数据类型: {key_type}"
+            page['cursor'], page['keys'] = client.scan(cursor=cursor, match=self.pattern,
+                                                       count=self.scan_count, _type=key_type)
+        except redis.ResponseError:
+            if key_type is None:
+                raise
+            print("服务端不支持SCAN TYPE，改为在客户端按类型过滤")
+            page['type_unsupported'] = True
+            page['cursor'], page['keys'] = client.scan(cursor=cursor, match=self.pattern, count=self.scan_count)
+        else:
+            page['server_filtered'] = key_type is not None
+        return page
+    
+    def filter_key_data(self, key_data, client=None):
+        """按过滤条件筛选一页key：类型/TTL用已取得的元数据判断，最小大小再用一轮pipeline探测
+        
+        返回(保留的key数据, 跳过的数量)
+        """
+        scan_filter = self.scan_filter
+        if scan_filter is None or not key_data:
+            return key_data, 0
+        matched = {key: info for key, info in key_data.items() if scan_filter.matches(info)}
+        if matched and scan_filter.needs_size():
+            matched = self.filter_by_size(matched, client)
+        return matched, len(key_data) - len(matched)
+    
+    def filter_by_size(self, key_data, client=None):
+        """保留不小于下限的key，批量脚本已返回大小的直接判断，其余用pipeline探测"""
+        target = client or self.redis_client
+        min_size = self.scan_filter.min_size
+        matched = {key: info for key, info in key_data.items()
+                   if info.get('size') is not None and info['size'] >= min_size}
+        keys = [key for key, info in key_data.items()
+                if 'size' not in info and info['type'] in self.SIZE_COMMANDS]
+        for batch in self.iter_key_batches(keys, group_by_node=client is None and self.cluster_mode):
+            pipe = target.pipeline(transaction=False)
+            for key in batch:
+                getattr(pipe, self.SIZE_COMMANDS[key_data[key]['type']])(key)
+            try:
+                replies = pipe.execute(raise_on_error=False)
+            except Exception as e:
+                print(f"批量探测key大小失败: {e}")
+                continue
+            for key, size in zip(batch, replies):
+                if not isinstance(size, Exception) and size >= min_size:
+                    matched[key] = key_data[key]
+        return matched
+    
+    def scan_pages_parallel(self, max_keys):
+        """任务：用有界线程池并发扫描集群各主节点，合并各节点结果
+        
+        每个节点每次只提交一页，页完成后再为该节点提交下一页，
+        因此节点数多于线程数时各节点轮流推进；信号只在当前任务线程中发出。
+        """
+        loaded = 0
+        workers = min(self.MAX_SCAN_WORKERS, len(self.scan_cursors))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {
+                pool.submit(self.scan_node_page, node_name, cursor): node_name
+                for node_name, cursor in self.scan_cursors.items()
+            }
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node_name = running.pop(future)
+                    page = future.result()
+                    if self.scan_cancelled or self.is_cancelled():
+                        continue
+                    
+                    self.apply_scan_page(node_name, page)
+                    loaded += len(page['key_data'])
+                    if page['cursor'] and loaded < max_keys:
+                        running[pool.submit(self.scan_node_page, node_name, page['cursor'])] = node_name
+        return loaded
+    
+    def cancel_scan(self):
+        """取消当前扫描"""
+        self.scan_cancelled = True
+        self.scan_cursors = {}
+        self.cached_pages = None
+    
+    def get_scan_client(self, node_name):
+        """获取执行SCAN的客户端，集群模式下为对应主节点的连接"""
+        if node_name is None:
+            return self.redis_client
+        node = self.redis_client.get_node(node_name=node_name)
+        return self.redis_client.get_redis_connection(node)
+    
+    def scan_next_page(self, emit=True):
+        """执行一次SCAN并批量获取该页key的元数据
+        
+        返回本页的key数据，emit为True时同时通过keys_batch/scan_progress发出
+        """
+        if not self.has_more_keys():
+            return {}
+        
+        if self.cached_pages is not None:
+            key_data, skipped = self.filter_key_data(self.next_cached_page())
+            self.emit_cached_page(key_data, skipped, emit)
+            return key_data
+        
+        node_name, cursor = next(iter(self.scan_cursors.items()))
+        page = self.scan_node_page(node_name, cursor)
+        if self.scan_cancelled:
+            return {}
+        self.apply_scan_page(node_name, page, emit)
+        return page['key_data']
+    
+    def next_cached_page(self):
+        """从缓存取出一页（过滤前）"""
+        key_data = next(self.cached_pages, None)
+        if key_data is None:
+            self.cached_pages = None
+            key_data = {}
+        return key_data
+    
+    def emit_cached_page(self, key_data, skipped=0, emit=True):
+        """记录并发出一页来自缓存的key，skipped为本页被过滤掉的数量"""
+        self.filtered_out += skipped
+        self.scanned_total += len(key_data)
+        if emit:
+            if key_data:
+                self.keys_batch.emit(key_data)
+            self.scan_progress.emit(self.scanned_total, not self.has_more_keys())
+    
+    def apply_scan_page(self, node_name, page, emit=True):
+        """记录一个节点的SCAN页（scan_node_page的结果）：推进游标、累计过滤统计、更新进度并发出信号"""
+        cursor, key_data = page['cursor'], page['key_data']
+        if page['type_unsupported']:
+            self.scan_type_supported = False
+        if page['server_filtered']:
+            self.server_filtered = True
+        self.filtered_out += page['skipped']
+        if cursor == 0:
+            self.scan_cursors.pop(node_name, None)
+        else:
+            self.scan_cursors[node_name] = cursor
+        self.record_scan_complete()
+        
+        self.scanned_total += len(key_data)
+        if node_name is not None:
+            self.node_scanned[node_name] = self.node_scanned.get(node_name, 0) + len(key_data)
+        if emit:
+            if key_data:
+                self.keys_batch.emit(key_data)
+            if node_name is not None:
+                self.node_progress.emit(node_name, self.node_scanned[node_name], cursor == 0)
+            self.scan_progress.emit(self.scanned_total, not self.has_more_keys())
+    
+    def iter_key_batches(self, keys, group_by_node=None, key=None):
+        """按pipeline批次大小切分key
+        
+        集群模式下先按槽位排序再按节点分组，保证每个批次只落在一个节点上，
+        避免RedisCluster为每个key单独发起请求。key用于从条目中取出key名。
+        """
+        size = self.pipeline_batch_size
+        if group_by_node is None:
+            group_by_node = self.cluster_mode
+        if not group_by_node:
+            for start in range(0, len(keys), size):
+                yield keys[start:start + size]
+            return
+        
+        groups = {}
+        nodes_manager = self.redis_client.nodes_manager
+        for item in keys:
+            slot = self.redis_client.keyslot(key(item) if key else item)
+            try:
+                node_name = nodes_manager.get_node_from_slot(slot).name
+            except Exception:
+                # 槽位未覆盖时交给pipeline自行处理重定向
+                node_name = None
+            groups.setdefault(node_name, []).append((slot, item))
+        
+        for entries in groups.values():
+            entries.sort(key=lambda entry: entry[0])
+            for start in range(0, len(entries), size):
+                yield [item for _, item in entries[start:start + size]]
+    
+    def fetch_key_metadata(self, keys, client=None, fields=METADATA_FIELDS):
+        """批量获取key的类型和TTL，每个批次一次网络往返
+        
+        优先用批量脚本（fields中的其他字段一并返回），脚本不可用时用pipeline只取类型和TTL；
+        client为集群中某个节点的连接时，直接在该节点上执行（key均来自该节点的SCAN）
+        """
+        key_data = {}
+        target = client or self.redis_client
+        for batch in self.iter_key_batches(keys, group_by_node=client is None and self.cluster_mode):
+            if self.fetch_key_info(target, batch, fields, key_data):
+                continue
+            pipe = target.pipeline(transaction=False)
+            self.queue_metadata_commands(pipe, batch)
+            try:
+                replies = pipe.execute(raise_on_error=False)
+            except Exception as e:
+                print(f"批量获取key信息失败: {e}")
+                continue
+            if client is not None:
+                self.report_redirects(replies)
+            self.parse_metadata_replies(batch, replies, key_data)
+        return key_data
+    
+    def fetch_key_info(self, client, batch, fields, key_data):
+        """用批量脚本获取一批key的信息写入key_data，脚本不可用时返回False由调用方改用pipeline
+        
+        集群中按槽位分组，每组一次EVALSHA，同一批的各组在一个pipeline中发送；
+        遇到NOSCRIPT时SCRIPT LOAD后只重发缺少脚本的分组
+        """
+        if not self.batch_scripts_enabled:
+            return False
+        keyslot = self.redis_client.keyslot if self.cluster_mode else None
+        try:
+            missing = self.execute_key_info(client, slot_groups(batch, keyslot), fields, key_data)
+            if missing:
+                client.script_load(KEY_INFO_SCRIPT)
+                self.execute_key_info(client, missing, fields, key_data)
+        except (ScriptUnavailable, redis.ResponseError) as e:
+            print(f"批量脚本不可用，改用pipeline: {e}")
+            self.batch_scripts_enabled = False
+            return False
         except Exception as e:
-            return f"获取值失败: {str(e)}"
+            print(f"批量获取key信息失败: {e}")
+        return True
+    
+    def execute_key_info(self, client, groups, fields, key_data):
+        """发送一个批量脚本pipeline，返回需要重发的分组"""
+        pipe = client.pipeline(transaction=False)
+        queue_key_info(pipe, groups, fields)
+        replies = pipe.execute(raise_on_error=False)
+        if client is not self.redis_client:
+            self.report_redirects(replies)
+        return parse_key_info(groups, replies, fields, key_data)
+    
+    def report_redirects(self, replies):
+        """直接发往集群节点的pipeline遇到MOVED/ASK时，通知拓扑服务在后台刷新"""
+        if not self.cluster_mode:
+            return
+        client = self.redis_client
+        get_topology_service(self.host, self.port).report_redirects(
+            replies, lambda: cluster_nodes_text(client))
+    
+    def queue_metadata_commands(self, pipe, batch):
+        """向pipeline中加入一批key的元数据命令"""
+        for key in batch:
+            pipe.type(key)
+            pipe.ttl(key)
+    
+    def parse_metadata_replies(self, batch, replies, key_data):
+        """解析元数据pipeline的返回值，写入key_data"""
+        for i, key in enumerate(batch):
+            key_type = replies[2 * i]
+            ttl = replies[2 * i + 1]
+            # 跳过无法访问或扫描后已被删除的key
+            if isinstance(key_type, Exception) or isinstance(ttl, Exception):
+                continue
+            if key_type == 'none':
+                continue
+            key_data[key] = {
+                'type': key_type,
+                'ttl': ttl
+            }
+    
+    # 各类型探测大小使用的命令：元素个数，字符串为字节数
+    SIZE_COMMANDS = {
+        'string': 'strlen',
+        'list': 'llen',
+        'set': 'scard',
+        'zset': 'zcard',
+        'hash': 'hlen',
+        'stream': 'xlen',
+    }
+    
+    def get_value_size(self, key, key_type):
+        """探测值的大小：元素个数，字符串为字节数"""
+        if key_type not in self.SIZE_COMMANDS:
+            raise ValueError(f"不支持的数据类型: {key_type}")
+        return getattr(self.redis_client, self.SIZE_COMMANDS[key_type])(key)
+    
+    def get_value_page(self, key, key_type, cursor=0, count=None, reverse=False, session=None):
+        """任务：读取下一页，与值缓存的末尾衔接时一并追加到缓存；缓存游标直接返回缓存中的下一页"""
+        if isinstance(cursor, CacheCursor):
+            return self.value_cache.page(cursor.entry, cursor.index)
+        page = self.read_value_page(key, key_type, cursor, count, reverse, session)
+        if cursor:
+            self.value_cache.extend(key, key_type, self.value_cache_params(reverse, session), cursor, page)
+        return page
+    
+    @staticmethod
+    def value_cache_params(reverse, session):
+        """影响读取结果的参数：Stream方向和字符串的强制解码器"""
+        return reverse, session.forced if session else None
+    
+    def read_value_page(self, key, key_type, cursor=0, count=None, reverse=False, session=None):
+        """分页读取值
+        
+        返回 {'items': 本页数据, 'cursor': 下一页游标}，游标为0表示已读完。
+        列表和字符串的游标是偏移量，集合/有序集合/哈希的游标是SCAN游标，
+        Stream的游标是下一页的起始ID，reverse为True时用XREVRANGE从最新的消息开始。
+        字符串和集合元素都按原始字节读取，经解码链转为文本，session为字符串的解码状态。
+        """
+        count = count or self.VALUE_PAGE_SIZE
+        if key_type == 'string':
+            return self.get_string_chunk(key, cursor, session or DecodeSession())
+        elif key_type == 'list':
+            items = self.redis_client.execute_command(
+                'LRANGE', key, cursor, cursor + count - 1, NEVER_DECODE=True)
+            next_cursor = cursor + len(items) if len(items) == count else 0
+        elif key_type in self.VALUE_SCAN_COMMANDS:
+            next_cursor, items = self.redis_client.execute_command(
+                self.VALUE_SCAN_COMMANDS[key_type], key, cursor, 'COUNT', count, NEVER_DECODE=True)
+        elif key_type == 'stream':
+            start, end = stream_page_range(cursor, reverse)
+            if reverse:
+                items = self.redis_client.xrevrange(key, start, end, count=count)
+            else:
+                items = self.redis_client.xrange(key, start, end, count=count)
+            return {'items': items, 'cursor': next_stream_cursor(items, count, reverse)}
+        else:
+            raise ValueError(f"不支持的数据类型: {key_type}")
+        return {'items': self.decode_value_items(key_type, items), 'cursor': next_cursor}
+    
+    # 集合类型分页使用的SCAN命令
+    VALUE_SCAN_COMMANDS = {
+        'set': 'SSCAN',
+        'zset': 'ZSCAN',
+        'hash': 'HSCAN',
+    }
+    
+    def decode_value_items(self, key_type, items):
+        """解码一页集合元素：成员和值经过解码链，哈希字段只按文本解码"""
+        if key_type == 'zset':
+            return [(decode_value(member), score) for member, score in items]
+        if key_type == 'hash':
+            return [(decode_text(field), decode_value(value)) for field, value in items.items()]
+        return [decode_value(item) for item in items]
+    
+    def get_string_chunk(self, key, offset, session):
+        """用GETRANGE读取一段原始字节并增量解码；上一段解压输出受限时先输出积压部分"""
+        data = None
+        if not session.has_backlog():
+            end = offset + self.STRING_CHUNK_SIZE - 1
+            data = self.redis_client.execute_command('GETRANGE', key, offset, end, NEVER_DECODE=True)
+        return self.decode_string_chunk(key, data, offset, session)
+    
+    def decode_string_chunk(self, key, data, offset, session):
+        """解码GETRANGE读取的一段字节（None表示只输出积压部分），返回本段文本和下一段偏移
+        
+        整个值在第一段内读完时按内容版本查找/写入解码缓存。
+        """
+        if data is None:
+            text = session.feed(b"", session.input_done)
+        else:
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            final = len(data) < self.STRING_CHUNK_SIZE
+            version = self.decoded_cache.version(data) if offset == 0 and final else None
+            cached = version and self.decoded_cache.get(key, version, session.forced)
+            if cached:
+                text = session.restore(cached)
+            else:
+                text = session.feed(data, final)
+                if version and session.finished():
+                    self.decoded_cache.put(key, version, session.forced, session, text)
+            offset += len(data)
+        return {'items': text, 'cursor': 0 if session.finished() else offset,
+                'decoder': session.describe()}
+    
+    def get_value(self, key, key_type, reverse=False, session=None):
+        """获取值：先探测大小，再读取第一页，Stream同时返回消费组信息
+        
+        大值在读取前先取服务端摘要，与缓存的摘要一致时返回缓存的第一页，之后的页也从缓存读取
+        """
+        if not self.redis_client:
+            raise ConnectionError("未连接到Redis")
+        
+        params = self.value_cache_params(reverse, session)
+        entry = self.value_cache.get(key, key_type, params)
+        size = self.get_value_size(key, key_type)
+        digest = None
+        if entry is not None or self.value_cache.accepts(key_type, size):
+            digest = self.get_value_digest(key, key_type, size)
+        if entry is not None and digest is not None and digest == entry['digest']:
+            return self.value_cache.page(entry)
+        
+        page = self.read_value_page(key, key_type, 0, None, reverse, session)
+        page['size'] = size
+        if digest is not None and self.value_cache.accepts(key_type, size):
+            self.value_cache.put(key, key_type, params, digest, size, page)
+        if key_type == 'stream':
+            page['groups'] = self.get_stream_groups(key)
+        return page
+    
+    def get_value_digest(self, key, key_type, size):
+        """值的服务端摘要：优先DEBUG DIGEST-VALUE（集群中无法按key路由，直接用Lua脚本），
+        都不可用或值太大不宜用Lua脚本时返回None
+        """
+        if self.value_digest_mode is None:
+            self.value_digest_mode = DIGEST_LUA if self.cluster_mode else DIGEST_DEBUG
+        if self.value_digest_mode == DIGEST_DEBUG:
+            try:
+                return parse_digest_reply(self.redis_client.execute_command('DEBUG', 'DIGEST-VALUE', key))
+            except redis.ResponseError as e:
+                print(f"DEBUG DIGEST-VALUE不可用，改用Lua脚本计算摘要: {e}")
+                self.value_digest_mode = DIGEST_LUA
+        if self.value_digest_mode == DIGEST_LUA:
+            if not lua_digest_allowed(key_type, size):
+                return None
+            if self.value_digest_script is None:
+                self.value_digest_script = self.redis_client.register_script(VALUE_DIGEST_SCRIPT)
+            try:
+                return parse_digest_reply(self.value_digest_script(keys=[key]))
+            except redis.ResponseError as e:
+                print(f"无法用Lua脚本计算摘要，不再缓存值: {e}")
+                self.value_digest_mode = DIGEST_OFF
+        return None
+    
+    def get_stream_groups(self, key):
+        """XINFO GROUPS及每个组的XPENDING概要"""
+        groups = self.redis_client.xinfo_groups(key)
+        if not groups:
+            return []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for group in groups:
+            pipe.xpending(key, group['name'])
+        return merge_stream_groups(groups, pipe.execute(raise_on_error=False))
+    
+    def get_stream_pending(self, key, group, count=PENDING_PAGE_SIZE):
+        """任务：消费组最早的一批待确认消息"""
+        return self.redis_client.xpending_range(key, group, '-', '+', count)
+    
+    # ---- 大Key分析 ----
+    
+    def create_memory_analysis(self, pattern="*", sample_rate=1.0, report=None):
+        """创建大Key分析状态，集群模式下每个主节点一个游标"""
+        if self.cluster_mode:
+            cursors = {node.name: 0 for node in self.redis_client.get_primaries()}
+        else:
+            cursors = {None: 0}
+        return MemoryAnalysis(pattern or "*", cursors, sample_rate, report)
+    
+    def analyze_memory_page(self, analysis):
+        """任务：每个未完成的节点扫描一页，分析抽样到的key，返回报告快照"""
+        for node_name, cursor in list(analysis.cursors.items()):
+            if analysis.stopped or self.is_cancelled():
+                break
+            client = self.get_scan_client(node_name)
+            cursor, keys = client.scan(cursor=cursor, match=analysis.pattern,
+                                       count=self.DEFAULT_SCAN_COUNT)
+            for batch in self.iter_key_batches(analysis.sample(keys), group_by_node=False):
+                self.measure_keys(client, batch, analysis.report)
+            analysis.advance(node_name, cursor, len(keys))
+        return analysis.snapshot()
+    
+    def measure_keys(self, client, batch, report):
+        """批量脚本一次往返取得类型、内存、元素个数和编码
+        
+        脚本不可用时两次pipeline往返：先取类型、MEMORY USAGE和编码，再按类型取元素个数
+        """
+        key_data = {}
+        if self.fetch_key_info(client, batch, MEMORY_FIELDS, key_data):
+            self.report_key_info(key_data, report)
+            return
+        
+        pipe = client.pipeline(transaction=False)
+        self.queue_memory_commands(pipe, batch)
+        measured = self.parse_memory_replies(batch, pipe.execute(raise_on_error=False))
+        
+        pipe = client.pipeline(transaction=False)
+        self.queue_size_commands(pipe, measured)
+        self.report_measured_keys(measured, pipe.execute(raise_on_error=False), report)
+    
+    @staticmethod
+    def report_key_info(key_data, report):
+        """把批量脚本的结果写入报告"""
+        for key, info in key_data.items():
+            report.add(key, info['type'], info['memory'], info['size'], info['encoding'])
+    
+    def queue_memory_commands(self, pipe, batch):
+        """向pipeline中加入一批key的TYPE、MEMORY USAGE和OBJECT ENCODING"""
+        for key in batch:
+            pipe.type(key)
+            pipe.memory_usage(key)
+            pipe.object('encoding', key)
+    
+    def parse_memory_replies(self, batch, replies):
+        """解析TYPE/MEMORY USAGE/OBJECT ENCODING的返回值，返回[(key, 类型, 内存, 编码)]"""
+        measured = []
+        for i, key in enumerate(batch):
+            key_type, memory, encoding = replies[3 * i:3 * i + 3]
+            # 跳过扫描后已被删除或无法访问的key
+            if isinstance(key_type, Exception) or key_type == 'none':
+                continue
+            if isinstance(memory, Exception) or memory is None:
+                memory = 0
+            if isinstance(encoding, Exception):
+                encoding = None
+            measured.append((key, key_type, memory, encoding))
+        return measured
+    
+    def queue_size_commands(self, pipe, measured):
+        """向pipeline中加入元素计数命令，不支持的类型不计数"""
+        for key, key_type, _, _ in measured:
+            if key_type in self.SIZE_COMMANDS:
+                getattr(pipe, self.SIZE_COMMANDS[key_type])(key)
+    
+    def report_measured_keys(self, measured, replies, report):
+        """把分析结果写入报告"""
+        replies = iter(replies)
+        for key, key_type, memory, encoding in measured:
+            elements = None
+            if key_type in self.SIZE_COMMANDS:
+                elements = next(replies)
+                if isinstance(elements, Exception):
+                    elements = None
+            report.add(key, key_type, memory, elements, encoding)
+    
+    # ---- 导入导出 ----
+    
+    def create_export_job(self, path, pattern="*", fmt=FORMAT_DUMP):
+        """创建导出任务，集群模式下每个主节点一个游标"""
+        if self.cluster_mode:
+            cursors = {node.name: 0 for node in self.redis_client.get_primaries()}
+        else:
+            cursors = {None: 0}
+        return ExportJob(path, pattern or "*", cursors, fmt)
+    
+    def resume_export_job(self, path):
+        """从断点恢复导出任务，集群节点发生变化时无法继续"""
+        job = ExportJob.resume(path)
+        if job is None:
+            return None
+        if self.cluster_mode:
+            primaries = {node.name for node in self.redis_client.get_primaries()}
+            if not set(job.cursors) <= primaries:
+                raise ValueError("集群主节点已变化，无法从断点继续，请重新导出")
+        elif set(job.cursors) != {None}:
+            raise ValueError("断点来自集群模式的导出，无法在单机连接上继续")
+        return job
+    
+    def export_page(self, job):
+        """任务：每个未完成的节点导出一页key，返回进度
+        
+        集群模式下SCAN和DUMP都在该节点的连接上执行，每个pipeline只访问一个节点
+        """
+        for node_name, cursor in list(job.cursors.items()):
+            if job.stopped or self.is_cancelled():
+                break
+            client = self.get_scan_client(node_name)
+            cursor, keys = client.scan(cursor=cursor, match=job.pattern,
+                                       count=self.DEFAULT_SCAN_COUNT)
+            for batch in self.iter_key_batches(keys, group_by_node=False):
+                pipe = client.pipeline(transaction=False)
+                job.queue_entry_commands(pipe, batch)
+                entries = job.parse_entry_replies(batch, pipe.execute(raise_on_error=False))
+                if job.needs_values():
+                    entries = self.export_values(client, job, entries)
+                job.write_entries(entries)
+            job.advance(node_name, cursor, len(keys))
+        return job.progress()
+    
+    def export_values(self, client, job, entries):
+        """可读格式：先探测大小，小值用pipeline完整读取后返回，大值逐个分块读取直接写入文件"""
+        pipe = client.pipeline(transaction=False)
+        job.queue_size_commands(pipe, entries)
+        small, large = job.split_large(entries, pipe.execute(raise_on_error=False))
+        
+        for entry, size in large:
+            offset = job.file_size()
+            written = False
+            try:
+                for chunk in iter_value_chunks(client, entry['key'], entry['type'], size):
+                    if chunk:
+                        job.write_chunk(entry, chunk, not written)
+                        written = True
+            except redis.ResponseError as e:
+                print(f"分块读取 {entry['key']} 失败: {e}")
+                job.finish_large(written, offset)
+                continue
+            job.finish_large(written)
+        
+        pipe = client.pipeline(transaction=False)
+        job.queue_value_commands(pipe, small)
+        return job.parse_value_replies(small, pipe.execute(raise_on_error=False))
+    
+    def import_page(self, job):
+        """任务：从文件读取一批key写入Redis，返回进度
+        
+        集群模式下按槽位所在节点分批，每个pipeline只访问一个节点
+        """
+        entries = job.read_entries()
+        for batch in self.iter_key_batches(entries, key=lambda entry: entry['key']):
+            if not job.replace:
+                pipe = self.redis_client.pipeline(transaction=False)
+                job.queue_exists_commands(pipe, batch)
+                batch = job.filter_existing(batch, pipe.execute(raise_on_error=False))
+            pipe = self.redis_client.pipeline(transaction=False)
+            counts = job.queue_write_commands(pipe, batch)
+            job.record_replies(batch, counts, pipe.execute(raise_on_error=False))
+        job.commit()
+        return job.progress()
+    
+    # ---- 会话对比 ----
+    
+    def compare_scan_page(self, job, side):
+        """任务：对比的一侧在每个未完成的节点上扫描一页，{key: 类型}按桶写入临时文件，返回该侧是否扫描完
+        
+        集群模式下SCAN和TYPE都在该节点的连接上执行，每个pipeline只访问一个节点
+        """
+        if job.cursors[side] is None:
+            if self.cluster_mode:
+                job.cursors[side] = {node.name: 0 for node in self.redis_client.get_primaries()}
+            else:
+                job.cursors[side] = {None: 0}
+        for node_name, cursor in list(job.cursors[side].items()):
+            if job.stopped or self.is_cancelled():
+                break
+            client = self.get_scan_client(node_name)
+            cursor, keys = client.scan(cursor=cursor, match=job.pattern,
+                                       count=self.DEFAULT_SCAN_COUNT)
+            key_types = {}
+            for batch in self.iter_key_batches(keys, group_by_node=False):
+                pipe = client.pipeline(transaction=False)
+                for key in batch:
+                    pipe.type(key)
+                for key, key_type in zip(batch, pipe.execute(raise_on_error=False)):
+                    # 跳过扫描后已被删除的key
+                    if not isinstance(key_type, Exception) and key_type != 'none':
+                        key_types[key] = key_type
+            job.spill(side, key_types)
+            job.advance(side, node_name, cursor, len(keys))
+        return job.scan_finished(side)
+    
+    def compare_digests(self, key_types):
+        """任务：计算一批key的值摘要，返回{key: 摘要}
+        
+        先探测大小：小值按总容量分批，用pipeline读取完整值；大值逐个分块读取，边读边计算摘要，
+        内存占用与值的大小无关
+        """
+        sizes = self.probe_value_sizes(key_types)
+        large = {key for key, size in sizes.items() if is_large_value(key_types[key], size)}
+        small = [key for key in key_types if key not in large]
+        weights = {key: value_weight(key_types[key], size) for key, size in sizes.items()}
+        
+        digests = {}
+        for group in self.iter_key_batches(small):
+            for batch in budget_batches(group, weights, self.pipeline_batch_size):
+                if self.is_cancelled():
+                    return digests
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key in batch:
+                    queue_value_command(pipe, key, key_types[key])
+                try:
+                    replies = pipe.execute(raise_on_error=False)
+                except Exception as e:
+                    print(f"批量读取值失败: {e}")
+                    continue
+                for key, reply in zip(batch, replies):
+                    digests[key] = value_digest(key_types[key], reply)
+        
+        for key in large:
+            if self.is_cancelled():
+                break
+            digest = ChunkedDigest(key_types[key], sizes[key])
+            try:
+                for chunk in iter_value_chunks(self.redis_client, key, key_types[key], sizes[key]):
+                    digest.update(chunk)
+                    if self.is_cancelled():
+                        return digests
+            except Exception as e:
+                print(f"分块读取 {key} 失败: {e}")
+                continue
+            digests[key] = digest.hexdigest()
+        return digests
+    
+    def probe_value_sizes(self, key_types):
+        """批量探测值的大小，返回{key: 大小}，无法探测的key不在结果中"""
+        sizes = {}
+        for batch in self.iter_key_batches([key for key in key_types if key_types[key] in self.SIZE_COMMANDS]):
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in batch:
+                getattr(pipe, self.SIZE_COMMANDS[key_types[key]])(key)
+            try:
+                replies = pipe.execute(raise_on_error=False)
+            except Exception as e:
+                print(f"批量探测大小失败: {e}")
+                continue
+            for key, size in zip(batch, replies):
+                if isinstance(size, int):
+                    sizes[key] = size
+        return sizes
+    
+    # ---- 批量操作 ----
+    
+    def create_bulk_operation(self, action, pattern="*", ttl=0, rate=0, dry_run=False):
+        """创建批量操作，集群模式下每个主节点一个游标"""
+        if self.cluster_mode:
+            cursors = {node.name: 0 for node in self.redis_client.get_primaries()}
+        else:
+            cursors = {None: 0}
+        return BulkKeyOperation(action, pattern or "*", cursors, ttl, rate, dry_run)
+    
+    def bulk_page(self, operation):
+        """任务：执行一段批量操作，返回进度
+        
+        没有待执行的批次时每个未完成的节点扫描一页，按槽位分批；限速需要等待时立即返回，
+        由界面延时后提交下一个任务，期间其他任务照常执行
+        """
+        if not operation.pending:
+            keyslot = self.redis_client.keyslot if self.cluster_mode else None
+            size = operation.batch_size(self.pipeline_batch_size)
+            for node_name, cursor in list(operation.cursors.items()):
+                if operation.stopped or self.is_cancelled():
+                    return operation.progress()
+                client = self.get_scan_client(node_name)
+                cursor, keys = client.scan(cursor=cursor, match=operation.pattern,
+                                           count=self.DEFAULT_SCAN_COUNT)
+                if not operation.dry_run:
+                    operation.pending.extend((node_name, batch)
+                                             for batch in operation.iter_batches(keys, size, keyslot))
+                operation.advance(node_name, cursor, len(keys))
+        
+        while not (operation.stopped or self.is_cancelled()):
+            item = operation.take_batch()
+            if item is None:
+                break
+            node_name, batch = item
+            pipe = self.get_scan_client(node_name).pipeline(transaction=False)
+            operation.queue_commands(pipe, batch)
+            done = operation.record_replies(batch, pipe.execute(raise_on_error=False))
+            operation.update_cache(self.key_cache, done)
+        return operation.progress()
+    
+    # ---- 监控指标 ----
+    
+    def metric_nodes(self, masters_only=False):
+        """需要采集指标的节点：[(节点名, 客户端)]，集群模式默认包含所有主从节点"""
+        if not self.cluster_mode:
+            return [(f"{self.host}:{self.port}", self.redis_client)]
+        nodes = self.redis_client.get_primaries() if masters_only else self.redis_client.get_nodes()
+        return [(node.name, self.redis_client.get_redis_connection(node)) for node in nodes]
+    
+    def fetch_node_info(self, client):
+        """一次pipeline往返获取节点所需的INFO段"""
+        pipe = client.pipeline(transaction=False)
+        for section in INFO_SECTIONS:
+            pipe.info(section)
+        return merge_info_sections(pipe.execute(raise_on_error=False))
+    
+    def poll_metrics(self, sampler):
+        """任务：并发获取各节点INFO，记录到采样器并返回快照"""
+        nodes = self.metric_nodes()
+        results = {}
+        workers = min(self.MAX_SCAN_WORKERS, len(nodes))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.fetch_node_info, client): name for name, client in nodes}
+            for future in futures:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+        return sampler.record(results)
+    
+    # ---- 慢查询 ----
+    
+    def fetch_slowlog(self, collector, count):
+        """任务：并发获取各主节点的慢查询和延迟事件，合并到收集器，返回新增条目数"""
+        nodes = self.metric_nodes(masters_only=True)
+        added = 0
+        collector.errors = {}
+        workers = min(self.MAX_SCAN_WORKERS, len(nodes))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.fetch_node_slowlog, client, count): name
+                       for name, client in nodes}
+            for future in futures:
+                name = futures[future]
+                try:
+                    items, latest, histories = future.result()
+                except Exception as e:
+                    collector.errors[name] = str(e)
+                    continue
+                added += collector.add_slowlog(name, items)
+                collector.set_latency(name, latest, histories)
+        return added
+    
+    def fetch_node_slowlog(self, client, count):
+        """两次pipeline往返：SLOWLOG GET和LATENCY LATEST，再取各延迟事件的HISTORY"""
+        pipe = client.pipeline(transaction=False)
+        pipe.execute_command('SLOWLOG', 'GET', count)
+        pipe.execute_command('LATENCY', 'LATEST')
+        raw, latest = pipe.execute(raise_on_error=False)
+        if isinstance(raw, Exception):
+            raise raw
+        # 未开启延迟监控或不支持LATENCY时只返回慢查询
+        if isinstance(latest, Exception):
+            latest = []
+        
+        histories = {}
+        if latest:
+            pipe = client.pipeline(transaction=False)
+            for row in latest:
+                pipe.execute_command('LATENCY', 'HISTORY', row[0])
+            for row, history in zip(latest, pipe.execute(raise_on_error=False)):
+                if not isinstance(history, Exception):
+                    histories[to_text(row[0])] = history
+        return parse_slowlog_entries(raw), latest, histories
+    
+    # ---- 热Key分析 ----
+    
+    # MONITOR每轮从每个节点最多读取的命令数，避免繁忙节点独占读取
+    MONITOR_READ_BATCH = 1000
+    
+    def create_hot_key_profile(self, mode, top_k, duration, pattern="*"):
+        """创建热Key分析状态，FREQ模式为每个主节点准备扫描游标"""
+        cursors = None
+        if mode == HotKeyProfile.MODE_FREQ:
+            if self.cluster_mode:
+                cursors = {node.name: 0 for node in self.redis_client.get_primaries()}
+            else:
+                cursors = {None: 0}
+        profile = HotKeyProfile(mode, top_k, duration, pattern, cursors)
+        self.hot_key_profiles.append(profile)
+        return profile
+    
+    def hot_key_page(self, profile):
+        """任务：MONITOR模式读取一段命令流，FREQ模式扫描各节点一页，返回排行快照"""
+        if profile.mode == HotKeyProfile.MODE_MONITOR:
+            self.monitor_slice(profile)
+        else:
+            self.hot_key_freq_page(profile)
+        if not profile.has_more():
+            self.close_hot_key_monitors(profile)
+        return profile.snapshot()
+    
+    def monitor_slice(self, profile):
+        """在各主节点上执行MONITOR，轮流读取已到达的命令直到本段时间结束"""
+        if not profile.monitors:
+            for name, client in self.metric_nodes(masters_only=True):
+                monitor = client.monitor()
+                monitor.__enter__()
+                profile.monitors[name] = monitor
+        
+        deadline = profile.slice_deadline()
+        connections = [monitor.connection for monitor in profile.monitors.values()]
+        while time.monotonic() < deadline and not (profile.stopped or self.is_cancelled()):
+            idle = True
+            for connection in connections:
+                for _ in range(self.MONITOR_READ_BATCH):
+                    if not connection.can_read(timeout=0):
+                        break
+                    profile.record_line(connection.read_response())
+                    idle = False
+            if idle:
+                time.sleep(0.01)
+    
+    def close_hot_key_monitors(self, profile):
+        """任务：退出MONITOR，连接断开后归还连接池"""
+        monitors = list(profile.monitors.values())
+        profile.monitors.clear()
+        for monitor in monitors:
+            try:
+                monitor.__exit__(None, None, None)
+            except Exception as e:
+                print(f"关闭MONITOR失败: {e}")
+        if profile in self.hot_key_profiles:
+            self.hot_key_profiles.remove(profile)
+    
+    def check_lfu_policy(self, client, profile):
+        """OBJECT FREQ只在LFU淘汰策略下可用，CONFIG被禁用时跳过检查"""
+        profile.policy_checked = True
+        try:
+            policy = client.config_get('maxmemory-policy').get('maxmemory-policy', '')
+        except Exception:
+            return
+        if 'lfu' not in policy:
+            raise Exception(f"当前淘汰策略为 {policy}，OBJECT FREQ需要LFU策略，请改用MONITOR采样")
+    
+    def hot_key_freq_page(self, profile):
+        """每个未完成的节点扫描一页，pipeline获取OBJECT FREQ"""
+        for node_name, cursor in list(profile.cursors.items()):
+            if profile.stopped or self.is_cancelled():
+                break
+            client = self.get_scan_client(node_name)
+            if not profile.policy_checked:
+                self.check_lfu_policy(client, profile)
+            cursor, keys = client.scan(cursor=cursor, match=profile.pattern,
+                                       count=self.DEFAULT_SCAN_COUNT)
+            for batch in self.iter_key_batches(keys, group_by_node=False):
+                pipe = client.pipeline(transaction=False)
+                for key in batch:
+                    pipe.object('freq', key)
+                profile.record_freqs(batch, pipe.execute(raise_on_error=False))
+            profile.advance(node_name, cursor, len(keys))
+    
+    # ---- Stream/Pub/Sub实时跟踪 ----
+    
+    def create_stream_tail(self, mode, targets):
+        """创建实时跟踪状态"""
+        tail = StreamTail(mode, targets)
+        self.stream_tails.append(tail)
+        return tail
+    
+    def tail_slice(self, tail):
+        """任务：读取一段时间内到达的消息写入跟踪缓冲"""
+        if tail.mode == StreamTail.MODE_STREAM:
+            self.read_stream_tail(tail)
+        else:
+            self.read_channel_tail(tail)
+    
+    def start_stream_ids(self, tail):
+        """从各stream当前最后一条消息之后开始读取（不用$，避免两段之间漏消息）"""
+        for key in tail.targets:
+            last = self.redis_client.xrevrange(key, '+', '-', count=1)
+            tail.last_ids[key] = last[0][0] if last else '0-0'
+    
+    def read_stream_tail(self, tail):
+        """XREAD BLOCK直到本段结束；集群中多个key可能不在同一槽位，逐个非阻塞读取"""
+        if not tail.last_ids:
+            self.start_stream_ids(tail)
+        
+        deadline = tail.slice_deadline()
+        blocking = not self.cluster_mode or len(tail.targets) == 1
+        while not (tail.stopped or self.is_cancelled()):
+            block = int((deadline - time.monotonic()) * 1000)
+            if block <= 0:
+                break
+            if blocking:
+                tail.push_stream_replies(self.redis_client.xread(
+                    dict(tail.last_ids), count=TAIL_READ_COUNT, block=block))
+                continue
+            idle = True
+            for key, last_id in list(tail.last_ids.items()):
+                replies = self.redis_client.xread({key: last_id}, count=TAIL_READ_COUNT)
+                if replies:
+                    tail.push_stream_replies(replies)
+                    idle = False
+            if idle:
+                time.sleep(0.01)
+    
+    def read_channel_tail(self, tail):
+        """SUBSCRIBE/PSUBSCRIBE后读取消息直到本段结束"""
+        if tail.pubsub is None:
+            tail.pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            channels, patterns = tail.channels()
+            if channels:
+                tail.pubsub.subscribe(*channels)
+            if patterns:
+                tail.pubsub.psubscribe(*patterns)
+        
+        deadline = tail.slice_deadline()
+        while not (tail.stopped or self.is_cancelled()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            tail.push_message(tail.pubsub.get_message(timeout=min(remaining, 0.1)))
+    
+    def close_stream_tail(self, tail):
+        """任务：取消订阅并归还连接"""
+        pubsub = tail.pubsub
+        tail.pubsub = None
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception as e:
+                print(f"关闭订阅失败: {e}")
+        if tail in self.stream_tails:
+            self.stream_tails.remove(tail)
+    
+    # ---- keyspace通知 ----
+    
+    def check_keyspace_events(self):
+        """任务：各主节点notify-keyspace-events缺少的通知类型 {节点名: (当前配置, 缺少的类型)}"""
+        missing = {}
+        for name, client in self.metric_nodes(masters_only=True):
+            flags = parse_notify_config(client.config_get('notify-keyspace-events'))
+            if missing_notify_flags(flags):
+                missing[name] = (flags, missing_notify_flags(flags))
+        return missing
+    
+    def enable_keyspace_events(self, missing):
+        """任务：在缺少通知类型的节点上补齐notify-keyspace-events，保留原有的类型"""
+        for name, client in self.metric_nodes(masters_only=True):
+            if name in missing:
+                flags, lacking = missing[name]
+                client.config_set('notify-keyspace-events', flags + lacking)
+    
+    def create_key_watch(self):
+        """创建keyspace通知监听状态"""
+        watch = KeyspaceWatch(self.db)
+        self.key_watches.append(watch)
+        return watch
+    
+    def key_watch_slice(self, watch):
+        """任务：监听一段时间的通知，合并后重新获取变化key的类型和TTL，返回本段的变更"""
+        if not watch.pubsubs:
+            # 通知只在产生它的节点上发布，集群中每个主节点各订阅一次
+            for name, client in self.metric_nodes(masters_only=True):
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(watch.channel_pattern())
+                watch.pubsubs[name] = pubsub
+        
+        deadline = watch.slice_deadline()
+        pubsubs = list(watch.pubsubs.values())
+        while not (watch.stopped or self.is_cancelled()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if len(pubsubs) == 1:
+                watch.push_message(pubsubs[0].get_message(timeout=min(remaining, 0.1)))
+                continue
+            idle = True
+            for pubsub in pubsubs:
+                message = pubsub.get_message(timeout=0)
+                while message is not None:
+                    watch.push_message(message)
+                    idle = False
+                    message = pubsub.get_message(timeout=0)
+            if idle:
+                time.sleep(0.01)
+        
+        removed, changed = watch.drain()
+        key_data = self.fetch_key_metadata(changed) if changed else {}
+        changes = watch.build_changes(removed, changed, key_data)
+        self.cache_key_changes(changes)
+        return changes
+    
+    def cache_key_changes(self, changes):
+        """把通知带来的变更写入key元数据缓存；有事件被丢弃时缓存不再视为完整"""
+        if self.key_cache is None:
+            return
+        for key in changes['removed']:
+            self.key_cache.invalidate_key(key)
+        self.key_cache.update(changes['updated'])
+        if changes['overflow']:
+            self.key_cache.mark_stale()
+    
+    def close_key_watch(self, watch):
+        """任务：取消订阅并归还连接"""
+        pubsubs = list(watch.pubsubs.values())
+        watch.pubsubs.clear()
+        for pubsub in pubsubs:
+            try:
+                pubsub.close()
+            except Exception as e:
+                print(f"关闭订阅失败: {e}")
+        if watch in self.key_watches:
+            self.key_watches.remove(watch)
 
 
 class RedisTool(BaseTool):
     """Redis连接工具类"""
     
+    # 每次"加载更多"追加的key数量
+    KEY_PAGE_SIZE = 1000
+    
     def __init__(self, parent_widget=None):
         super().__init__(parent_widget)
         self.redis_client = None
         self.connection_thread = None
+        # 工作线程任务：任务ID -> (成功回调, 失败回调)
+        self.task_callbacks = {}
+        self.scan_task_id = None
+        self.value_task_id = None
+        # 集群扫描各节点进度：节点名 -> (已加载数量, 是否完成)
+        self.node_scan_progress = {}
+        # 当前扫描是否还有未加载的key，由scan_progress更新，不直接读取工作线程的游标
+        self.scan_has_more = False
+        # 本地key索引，由扫描到的批次增量建立；key_query为当前的本地搜索条件
+        self.key_index = KeyIndex()
+        self.key_query = None
+        # 当前列表的Glob模式（编译后），实时更新据此判断新key是否加入列表
+        self.view_pattern = None
+        # keyspace通知监听
+        self.key_watch = None
+        self.watch_task_id = None
+        # 当前展示的值：key、类型、大小、已加载数量、下一页游标
+        self.value_state = None
         # 使用更可靠的路径
         home_dir = os.path.expanduser("~")
         self.session_file = os.path.join(home_dir, ".redis_sessions.json")
@@ -254,7 +1562,6 @@ class RedisTool(BaseTool):
         main_layout.addWidget(self.data_group, 1)
         
         # 延迟加载会话，确保UI完全初始化
-        from PyQt5.QtCore import QTimer
         QTimer.singleShot(100, self.load_sessions)
     
     def create_connection_area(self):
@@ -284,6 +1591,10 @@ class RedisTool(BaseTool):
         self.password_input.setEchoMode(QLineEdit.Password)
         self.db_input = QSpinBox()
         self.cluster_checkbox = QCheckBox("集群模式")
+        self.disk_cache_checkbox = QCheckBox("磁盘缓存")
+        self.async_checkbox = QCheckBox("异步后端")
+        self.async_checkbox.setToolTip("使用redis.asyncio并发执行扫描和取值请求")
+        self.disk_cache_checkbox.setToolTip("将key元数据缓存保存到 ~/.redis_key_cache，重启后可复用")
         
         # 设置控件属性
         self.session_combo.setFixedWidth(150)
@@ -390,8 +1701,19 @@ class RedisTool(BaseTool):
         self.cluster_checkbox.setStyleSheet("font-weight: bold; font-size: 13px;")
         self.cluster_checkbox.setFixedHeight(30)
         
+        self.disk_cache_checkbox.setStyleSheet("font-size: 12px;")
+        self.async_checkbox.setStyleSheet("font-size: 12px;")
+        
+        # redis-py版本过低时异步后端不可用
+        from .redis_async_backend import ASYNC_AVAILABLE
+        if not ASYNC_AVAILABLE:
+            self.async_checkbox.setEnabled(False)
+            self.async_checkbox.setToolTip("当前redis-py版本不支持asyncio集群客户端（需要4.3以上）")
+        
         cluster_layout.addWidget(cluster_label)
         cluster_layout.addWidget(self.cluster_checkbox)
+        cluster_layout.addWidget(self.disk_cache_checkbox)
+        cluster_layout.addWidget(self.async_checkbox)
         
         form_layout.addWidget(cluster_group)
         
@@ -562,13 +1884,28 @@ class RedisTool(BaseTool):
         layout = QVBoxLayout(self.data_group)
         layout.setContentsMargins(15, 15, 15, 15)
         
+        # 数据区域分页：key浏览、大Key分析
+        self.data_tabs = QTabWidget()
+        browse_page = QWidget()
+        browse_layout = QVBoxLayout(browse_page)
+        browse_layout.setContentsMargins(0, 10, 0, 0)
+        
         # 搜索区域
         search_layout = QHBoxLayout()
         search_label = QLabel("搜索模式:")
         search_label.setStyleSheet("font-weight: bold;")
+        # Glob由服务端SCAN匹配，子串/正则/模糊在已扫描key的本地索引中搜索
+        self.search_mode_combo = QComboBox()
+        self.search_mode_combo.addItem("Glob", SEARCH_GLOB)
+        self.search_mode_combo.addItem("子串(本地)", SEARCH_SUBSTRING)
+        self.search_mode_combo.addItem("正则(本地)", SEARCH_REGEX)
+        self.search_mode_combo.addItem("模糊(本地)", SEARCH_FUZZY)
+        self.search_mode_combo.setToolTip("本地搜索只在已扫描到的key中查找，刷新时重新扫描全部key建立索引")
+        self.search_mode_combo.currentIndexChanged.connect(self.update_search_placeholder)
         self.search_input = QLineEdit("*")
         self.search_input.setPlaceholderText("输入key搜索模式...")
         self.search_input.setFixedWidth(200)
+        self.search_input.returnPressed.connect(self.load_keys)
         
         self.search_btn = QPushButton("🔍 搜索")
         self.search_btn.setFixedWidth(80)
@@ -587,34 +1924,167 @@ class RedisTool(BaseTool):
         """)
         self.search_btn.clicked.connect(self.load_keys)
         
+        # 流式加载控制
+        self.load_more_btn = QPushButton("⏬ 加载更多")
+        self.load_more_btn.setFixedWidth(100)
+        self.load_more_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #17a2b8;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #138496;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.load_more_btn.clicked.connect(self.load_more_keys)
+        self.load_more_btn.setEnabled(False)
+        
+        self.stop_scan_btn = QPushButton("⏹ 停止")
+        self.stop_scan_btn.setFixedWidth(80)
+        self.stop_scan_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+            QPushButton:disabled {
+                background-color: #adb5bd;
+            }
+        """)
+        self.stop_scan_btn.clicked.connect(self.stop_scan)
+        self.stop_scan_btn.setEnabled(False)
+        
+        # key元数据缓存：更窄的模式在本地过滤，刷新时清空缓存重新扫描
+        self.cache_checkbox = QCheckBox("使用缓存")
+        self.cache_checkbox.setChecked(True)
+        
+        # 订阅keyspace通知，把增删改合并后应用到列表，不必重新扫描
+        self.watch_checkbox = QCheckBox("实时更新")
+        self.watch_checkbox.setToolTip("订阅__keyevent@<db>__通知（集群中每个主节点），每0.5秒合并应用一次变更")
+        self.watch_checkbox.toggled.connect(self.toggle_key_watch)
+        self.refresh_btn = QPushButton("🔄 刷新")
+        self.refresh_btn.setFixedWidth(80)
+        self.refresh_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #28a745;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #218838;
+            }
+        """)
+        self.refresh_btn.clicked.connect(self.refresh_keys)
+        
+        # 对当前搜索模式匹配的key执行批量删除/过期
+        self.bulk_btn = QPushButton("🧹 批量操作")
+        self.bulk_btn.setFixedWidth(100)
+        self.bulk_btn.setStyleSheet("""
+            QPushButton {
+                font-weight: bold;
+                background-color: #dc3545;
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #c82333;
+            }
+        """)
+        self.bulk_btn.clicked.connect(self.open_bulk_dialog)
+        
+        self.scan_status_label = QLabel("")
+        self.scan_status_label.setStyleSheet("color: #6c757d;")
+        
+        # 命名空间视图：按分隔符把key组织成前缀树
+        self.namespace_checkbox = QCheckBox("命名空间")
+        self.namespace_checkbox.toggled.connect(self.toggle_namespace_view)
+        self.delimiter_input = QLineEdit(":")
+        self.delimiter_input.setFixedWidth(40)
+        self.delimiter_input.setToolTip("命名空间分隔符")
+        self.delimiter_input.editingFinished.connect(self.update_namespace_delimiter)
+        
         search_layout.addWidget(search_label)
+        search_layout.addWidget(self.search_mode_combo)
         search_layout.addWidget(self.search_input)
         search_layout.addWidget(self.search_btn)
+        search_layout.addWidget(self.load_more_btn)
+        search_layout.addWidget(self.stop_scan_btn)
+        search_layout.addWidget(self.refresh_btn)
+        search_layout.addWidget(self.bulk_btn)
+        search_layout.addWidget(self.cache_checkbox)
+        search_layout.addWidget(self.watch_checkbox)
+        search_layout.addWidget(self.namespace_checkbox)
+        search_layout.addWidget(self.delimiter_input)
+        search_layout.addWidget(self.scan_status_label)
         search_layout.addStretch()
-        layout.addLayout(search_layout)
+        browse_layout.addLayout(search_layout)
+        
+        # 过滤条件：类型交给服务端，TTL/大小在工作线程中筛选
+        self.scan_filter_bar = ScanFilterBar()
+        browse_layout.addWidget(self.scan_filter_bar)
         
         # 数据展示区域
         self.data_splitter = QSplitter(Qt.Horizontal)
         
-        # 左侧：key列表
-        self.key_tree = QTreeWidget()
-        self.key_tree.setHeaderLabels(["Key", "Type", "TTL"])
+        # 左侧：key列表（模型/视图，按需渲染）
+        self.key_tree = QTreeView()
+        self.key_model = RedisKeyModel(self.key_tree)
+        self.key_tree.setModel(self.key_model)
+        self.key_tree.setRootIsDecorated(False)
+        self.key_tree.setUniformRowHeights(True)
+        self.key_tree.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.key_tree.setAlternatingRowColors(True)
+        self.key_tree.header().setSortIndicator(-1, Qt.AscendingOrder)
+        self.key_tree.setSortingEnabled(True)
         self.key_tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 alternate-background-color: #f8f9fa;
                 border: 1px solid #dee2e6;
                 border-radius: 4px;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 padding: 4px;
             }
-            QTreeWidget::item:selected {
+            QTreeView::item:selected {
                 background-color: #007bff;
                 color: white;
             }
         """)
-        self.key_tree.itemClicked.connect(self.show_key_value)
+        self.key_tree.clicked.connect(self.show_key_value)
+        
+        # 左侧（命名空间视图）：与key列表共享存储，展开时才加载子节点
+        self.namespace_tree = QTreeView()
+        self.namespace_model = NamespaceTreeModel(self.key_model, self.delimiter_input.text(),
+                                                  self.namespace_tree)
+        self.namespace_tree.setModel(self.namespace_model)
+        self.namespace_tree.setUniformRowHeights(True)
+        self.namespace_tree.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.namespace_tree.setAlternatingRowColors(True)
+        self.namespace_tree.setStyleSheet(self.key_tree.styleSheet())
+        self.namespace_tree.clicked.connect(self.show_key_value)
+        self.namespace_tree.verticalScrollBar().valueChanged.connect(self.check_namespace_scroll)
+        
+        self.key_view_stack = QStackedWidget()
+        self.key_view_stack.addWidget(self.key_tree)
+        self.key_view_stack.addWidget(self.namespace_tree)
         
         # 右侧：值展示
         self.value_tabs = QTabWidget()
@@ -637,17 +2107,58 @@ class RedisTool(BaseTool):
         # 创建不同类型的展示页面
         self.create_value_tabs()
         
-        self.data_splitter.addWidget(self.key_tree)
-        self.data_splitter.addWidget(self.value_tabs)
+        # 值大小与分页加载进度
+        self.value_info_label = QLabel("")
+        self.value_info_label.setStyleSheet("color: #6c757d;")
+        value_panel = QWidget()
+        value_layout = QVBoxLayout(value_panel)
+        value_layout.setContentsMargins(0, 0, 0, 0)
+        value_layout.addWidget(self.value_info_label)
+        value_layout.addWidget(self.value_tabs)
+        
+        # 滚动到底部时加载下一页
+        for widget in (self.string_text, self.list_table, self.set_table,
+                       self.zset_table, self.hash_table, self.stream_table):
+            widget.verticalScrollBar().valueChanged.connect(self.check_value_scroll)
+        
+        self.data_splitter.addWidget(self.key_view_stack)
+        self.data_splitter.addWidget(value_panel)
         self.data_splitter.setSizes([300, 500])
+        browse_layout.addWidget(self.data_splitter)
         
-        layout.addWidget(self.data_splitter)
+        self.memory_panel = MemoryAnalyzerPanel(self)
+        self.data_tabs.addTab(browse_page, "🔑 Key浏览")
+        self.data_tabs.addTab(self.memory_panel, "📊 大Key分析")
+        self.transfer_panel = TransferPanel(self)
+        self.data_tabs.addTab(self.transfer_panel, "📦 导入导出")
+        self.metrics_panel = MetricsPanel(self)
+        self.data_tabs.addTab(self.metrics_panel, "📈 监控")
+        self.slowlog_panel = SlowlogPanel(self)
+        self.data_tabs.addTab(self.slowlog_panel, "🐢 慢查询")
+        self.hot_key_panel = HotKeyPanel(self)
+        self.data_tabs.addTab(self.hot_key_panel, "🔥 热Key")
+        self.stream_tail_panel = StreamTailPanel(self)
+        self.data_tabs.addTab(self.stream_tail_panel, "📡 实时订阅")
+        self.compare_panel = ComparePanel(self)
+        self.data_tabs.addTab(self.compare_panel, "🔀 会话对比")
+        layout.addWidget(self.data_tabs)
     
     def create_value_tabs(self):
         """创建值展示标签页"""
         # 字符串值
         self.string_tab = QWidget()
         string_layout = QVBoxLayout(self.string_tab)
+        decoder_layout = QHBoxLayout()
+        decoder_layout.addWidget(QLabel("解码:"))
+        self.decoder_combo = QComboBox()
+        self.decoder_combo.addItem("自动识别", None)
+        for name in formatter_names():
+            self.decoder_combo.addItem(name, name)
+        self.decoder_combo.setToolTip("自动识别按开头的魔数选择解压和格式，其他选项直接作用于原始字节")
+        self.decoder_combo.currentIndexChanged.connect(self.reload_string_value)
+        decoder_layout.addWidget(self.decoder_combo)
+        decoder_layout.addStretch()
+        string_layout.addLayout(decoder_layout)
         self.string_text = QTextEdit()
         self.string_text.setFont(QFont("Consolas", 10))
         string_layout.addWidget(self.string_text)
@@ -692,6 +2203,45 @@ class RedisTool(BaseTool):
         self.hash_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         hash_layout.addWidget(self.hash_table)
         self.value_tabs.addTab(self.hash_tab, "哈希")
+        
+        # Stream值：消息、消费组、选中组的待确认消息
+        self.stream_tab = QWidget()
+        stream_layout = QVBoxLayout(self.stream_tab)
+        stream_options = QHBoxLayout()
+        self.stream_reverse_checkbox = QCheckBox("从最新开始 (XREVRANGE)")
+        self.stream_reverse_checkbox.toggled.connect(self.reload_stream_value)
+        self.stream_follow_btn = QPushButton("📡 实时跟踪")
+        self.stream_follow_btn.clicked.connect(self.follow_current_stream)
+        stream_options.addWidget(self.stream_reverse_checkbox)
+        stream_options.addStretch()
+        stream_options.addWidget(self.stream_follow_btn)
+        stream_layout.addLayout(stream_options)
+        
+        self.stream_table = QTableWidget()
+        self.stream_table.setColumnCount(2)
+        self.stream_table.setHorizontalHeaderLabels(["ID", "字段"])
+        self.stream_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.stream_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        stream_layout.addWidget(self.stream_table, 3)
+        
+        self.stream_group_table = QTableWidget()
+        self.stream_group_table.setColumnCount(6)
+        self.stream_group_table.setHorizontalHeaderLabels(
+            ["消费组", "消费者", "待确认", "最后投递ID", "滞后", "各消费者待确认"])
+        self.stream_group_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.stream_group_table.horizontalHeader().setStretchLastSection(True)
+        self.stream_group_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.stream_group_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.stream_group_table.cellClicked.connect(self.load_stream_pending)
+        stream_layout.addWidget(self.stream_group_table, 1)
+        
+        self.stream_pending_table = QTableWidget()
+        self.stream_pending_table.setColumnCount(4)
+        self.stream_pending_table.setHorizontalHeaderLabels(["消息ID", "消费者", "空闲(毫秒)", "投递次数"])
+        self.stream_pending_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.stream_pending_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        stream_layout.addWidget(self.stream_pending_table, 1)
+        self.value_tabs.addTab(self.stream_tab, "Stream")
     
     def connect_redis(self):
         """连接Redis"""
@@ -701,17 +2251,40 @@ class RedisTool(BaseTool):
         db = self.db_input.value()
         cluster_mode = self.cluster_checkbox.isChecked()
         
-        # 确保之前的线程已清理
-        if self.connection_thread and self.connection_thread.isRunning():
-            self.connection_thread.quit()
-            self.connection_thread.wait()
+        # 确保之前的线程已停止，仍在执行命令的线程结束后自行释放
+        if self.connection_thread:
+            self.connection_thread.retire()
+        self.task_callbacks.clear()
+        self.scan_task_id = None
+        self.value_task_id = None
+        self.key_index.clear()
+        self.key_query = None
+        self.reset_key_watch()
+        self.memory_panel.reset()
+        self.transfer_panel.reset()
+        self.metrics_panel.reset()
+        self.slowlog_panel.reset()
+        self.hot_key_panel.reset()
+        self.stream_tail_panel.reset()
         
         # 添加调试信息
         print(f"正在连接: host={host}, port={port}, cluster_mode={cluster_mode}")
         
-        self.connection_thread = RedisConnectionThread(host, port, password, db, cluster_mode)
+        key_cache = get_key_cache(host, port, db, cluster_mode, self.disk_cache_checkbox.isChecked())
+        if self.async_checkbox.isEnabled() and self.async_checkbox.isChecked():
+            from .redis_async_backend import AsyncRedisConnectionThread
+            thread_class = AsyncRedisConnectionThread
+        else:
+            thread_class = RedisConnectionThread
+        self.connection_thread = thread_class(host, port, password, db, cluster_mode,
+                                              key_cache=key_cache)
         self.connection_thread.connection_result.connect(self.on_connection_result)
         self.connection_thread.data_loaded.connect(self.on_data_loaded)
+        self.connection_thread.keys_batch.connect(self.on_keys_batch)
+        self.connection_thread.scan_progress.connect(self.on_scan_progress)
+        self.connection_thread.node_progress.connect(self.on_node_progress)
+        self.connection_thread.task_finished.connect(self.on_task_finished)
+        self.connection_thread.task_failed.connect(self.on_task_failed)
         self.connection_thread.start()
         
         self.status_label.setText("连接中...")
@@ -729,23 +2302,35 @@ class RedisTool(BaseTool):
     def disconnect_redis(self):
         """断开Redis连接"""
         try:
-            # 安全地关闭Redis连接
-            if self.redis_client:
-                try:
-                    self.redis_client.close()
-                except:
-                    pass  # 忽略关闭时的错误
-                self.redis_client = None
+            # 客户端由工作线程退出时归还连接池
+            self.redis_client = None
+            
+            # 停止正在进行的扫描、分析和实时更新
+            self.stop_scan()
+            self.reset_key_watch()
+            self.memory_panel.reset()
+            self.transfer_panel.reset()
+            self.metrics_panel.reset()
+            self.slowlog_panel.reset()
+            self.hot_key_panel.reset()
+            self.stream_tail_panel.reset()
+            self.save_key_cache()
             
-            # 安全地停止线程
-            if self.connection_thread and self.connection_thread.isRunning():
-                self.connection_thread.quit()
-                self.connection_thread.wait(1000)  # 等待最多1秒
+            # 安全地停止线程，仍在执行命令的线程结束后自行释放
+            if self.connection_thread:
+                self.connection_thread.retire()
             
             self.connection_thread = None
+            self.task_callbacks.clear()
+            self.value_task_id = None
+            self.value_state = None
+            self.value_info_label.setText("")
             
             # 清空UI
-            self.key_tree.clear()
+            self.key_model.clear()
+            self.key_index.clear()
+            self.key_query = None
+            self.scan_status_label.setText("")
             self.status_label.setText("已断开")
             self.status_label.setStyleSheet("""
                 QLabel {
@@ -760,7 +2345,7 @@ class RedisTool(BaseTool):
             
             self.connect_btn.setEnabled(True)
             self.disconnect_btn.setEnabled(False)
-            
+        
         except Exception as e:
             print(f"断开连接时出错: {e}")
             # 即使出错也确保UI状态正确
@@ -802,65 +2387,581 @@ class RedisTool(BaseTool):
     
     def on_data_loaded(self, data):
         """数据加载完成"""
-        self.key_tree.clear()
-        for key, info in data.items():
-            item = QTreeWidgetItem(self.key_tree)
-            item.setText(0, key)
-            item.setText(1, info['type'])
-            item.setText(2, str(info['ttl']) if info['ttl'] > 0 else '永久')
-            item.setData(0, Qt.UserRole, info['type'])
-    
-    def load_keys(self):
-        """加载key列表"""
-        if self.connection_thread and self.connection_thread.redis_client:
-            pattern = self.search_input.text() or "*"
-            self.connection_thread.load_keys(pattern)
+        self.key_model.clear()
+        self.on_keys_batch(data)
     
-    def show_key_value(self, item):
-        """显示key的值"""
-        if not item:
+    def on_keys_batch(self, data):
+        """追加一批扫描到的key，同时加入本地索引；本地搜索中只追加匹配的key"""
+        self.key_index.add(data)
+        if self.key_query is not None:
+            data = self.key_query.filter(data)
+        self.key_model.append_keys(data)
+        if self.namespace_checkbox.isChecked():
+            self.namespace_model.sync()
+    
+    def on_scan_progress(self, loaded, finished):
+        """扫描进度更新"""
+        self.scan_has_more = not finished
+        if finished:
+            text = f"扫描完成，共 {loaded} 个key"
+        else:
+            text = f"已加载 {loaded} 个key..."
+        thread = self.connection_thread
+        if thread and thread.scan_from_cache():
+            text += "（来自缓存）"
+        if thread and thread.scan_filter is not None:
+            text += f"（{thread.scan_filter.describe()}，已跳过 {thread.filtered_out} 个）"
+        if self.key_query is not None:
+            text = f"本地{self.key_query.describe()}匹配 {self.key_model.total_count()} 个key | {text}"
+        
+        # 集群模式附加各节点进度
+        if self.node_scan_progress:
+            done = sum(1 for _, node_done in self.node_scan_progress.values() if node_done)
+            text += f"（节点 {done}/{len(self.node_scan_progress)} 完成）"
+        self.scan_status_label.setText(text)
+    
+    def on_node_progress(self, node_name, loaded, finished):
+        """集群单节点扫描进度"""
+        self.node_scan_progress[node_name] = (loaded, finished)
+        lines = []
+        for name, (count, node_done) in sorted(self.node_scan_progress.items()):
+            lines.append(f"{name}: {count} 个key{'（完成）' if node_done else ''}")
+        self.scan_status_label.setToolTip("\n".join(lines))
+    
+    def submit_task(self, func, *args, on_success=None, on_error=None):
+        """提交任务到工作线程，结果回到GUI线程后调用对应回调"""
+        task_id = self.connection_thread.submit(func, *args)
+        self.task_callbacks[task_id] = (on_success, on_error)
+        return task_id
+    
+    def cancel_task(self, task_id):
+        """取消工作线程中的任务并丢弃其回调"""
+        if task_id is None:
             return
-            
-        key = item.text(0)
-        key_type = item.data(0, Qt.UserRole)
+        self.task_callbacks.pop(task_id, None)
+        if self.connection_thread:
+            self.connection_thread.cancel(task_id)
+    
+    def on_task_finished(self, task_id, result):
+        """任务完成"""
+        on_success, _ = self.task_callbacks.pop(task_id, (None, None))
+        if on_success:
+            on_success(result)
+    
+    def on_task_failed(self, task_id, error):
+        """任务失败"""
+        callbacks = self.task_callbacks.pop(task_id, None)
+        if callbacks is None:
+            return
+        _, on_error = callbacks
+        if on_error:
+            on_error(error)
+        else:
+            self.show_message("错误", f"操作失败: {error}", "error")
+    
+    def load_keys(self, refresh=False):
+        """按搜索模式重新开始流式加载key列表，refresh为True时清空缓存重新扫描
         
+        本地搜索模式直接查询索引；刷新或扫描全部key时重建索引，扫描到的批次按条件追加
+        """
+        if self.connection_thread and self.connection_thread.redis_client:
+            query = self.current_key_query()
+            if query is False:
+                return
+            if query is not None and not refresh:
+                self.search_local(query)
+                return
+            self.key_query = query
+            pattern = "*" if query is not None else (self.search_input.text() or "*")
+            if refresh or pattern == "*":
+                # 重新扫描全部key时按新的结果重建索引，已不存在的key不会残留
+                self.key_index.clear()
+            self.view_pattern = glob_to_regex(pattern)
+            scan_filter = self.scan_filter_bar.current_filter()
+            self.stop_scan()
+            self.key_model.clear()
+            self.node_scan_progress = {}
+            self.scan_status_label.setToolTip("")
+            self.scan_status_label.setText("扫描中...")
+            if refresh:
+                func = self.connection_thread.refresh_keys
+                args = (pattern, self.KEY_PAGE_SIZE, scan_filter)
+            else:
+                func = self.connection_thread.browse_keys
+                args = (pattern, self.KEY_PAGE_SIZE, self.cache_checkbox.isChecked(), scan_filter)
+            self.scan_task_id = self.submit_task(
+                func, *args,
+                on_success=self.on_scan_task_done, on_error=self.on_scan_task_error)
+            self.update_scan_controls()
+    
+    def refresh_keys(self):
+        """清空key缓存并重新扫描"""
+        self.load_keys(refresh=True)
+    
+    def current_key_query(self):
+        """本地搜索条件；Glob模式返回None，正则无效时提示并返回False"""
+        mode = self.search_mode_combo.currentData()
+        if mode == SEARCH_GLOB:
+            return None
         try:
-            if self.connection_thread and self.connection_thread.redis_client:
-                value = self.connection_thread.get_value(key, key_type)
-                self.display_value(key_type, value)
+            return KeyQuery(mode, self.search_input.text())
+        except re.error as e:
+            self.show_message("错误", f"正则表达式无效: {e}", "error")
+            return False
+    
+    def search_local(self, query):
+        """在本地索引中搜索；扫描仍在进行时，之后到达的批次继续按条件追加"""
+        self.key_query = query
+        start = time.perf_counter()
+        key_data, total = self.key_index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.key_model.clear()
+        self.key_model.append_keys(key_data)
+        if self.namespace_checkbox.isChecked():
+            self.namespace_model.sync()
+        
+        if not len(self.key_index):
+            self.scan_status_label.setText("本地索引为空，请先用Glob模式扫描或刷新")
+            return
+        text = (f"本地{query.describe()}匹配 {total} 个key，用时 {elapsed:.1f} 毫秒"
+                f"（索引中 {len(self.key_index)} 个key）")
+        if total > len(key_data):
+            text += f"，仅显示前 {len(key_data)} 个"
+        self.scan_status_label.setText(text)
+    
+    # ---- 实时更新 ----
+    
+    def toggle_key_watch(self, checked):
+        """开启/关闭keyspace通知监听"""
+        if checked:
+            self.start_key_watch()
+        else:
+            self.stop_key_watch()
+    
+    def start_key_watch(self):
+        """检查各节点的通知配置，缺少所需类型时询问是否开启"""
+        if not (self.connection_thread and self.connection_thread.redis_client):
+            self.show_message("警告", "请先连接到Redis", "warning")
+            self.set_watch_checked(False)
+            return
+        self.key_model.key_positions()
+        self.watch_task_id = self.submit_task(
+            self.connection_thread.check_keyspace_events,
+            on_success=self.on_keyspace_events_checked, on_error=self.on_key_watch_error)
+    
+    def on_keyspace_events_checked(self, missing):
+        """通知配置检查完成"""
+        self.watch_task_id = None
+        if not self.watch_checkbox.isChecked():
+            return
+        if not missing:
+            self.begin_key_watch()
+            return
+        
+        lines = "\n".join(f"{node}: 当前 '{flags}'，缺少 '{lacking}'"
+                          for node, (flags, lacking) in sorted(missing.items()))
+        reply = QMessageBox.question(
+            self.main_widget,
+            "开启keyspace通知",
+            f"以下节点未开启所需的keyspace通知:\n{lines}\n\n"
+            f"是否执行 CONFIG SET notify-keyspace-events 补齐？开启后服务端每次写入都会发布通知。",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            self.set_watch_checked(False)
+            return
+        self.watch_task_id = self.submit_task(
+            self.connection_thread.enable_keyspace_events, missing,
+            on_success=lambda result: self.on_keyspace_events_checked({}),
+            on_error=self.on_key_watch_error)
+    
+    def begin_key_watch(self):
+        """订阅通知并开始按段监听"""
+        self.key_watch = self.connection_thread.create_key_watch()
+        self.submit_watch_slice()
+    
+    def submit_watch_slice(self):
+        """提交下一段监听任务"""
+        watch = self.key_watch
+        self.watch_task_id = self.submit_task(
+            self.connection_thread.key_watch_slice, watch,
+            on_success=lambda changes: self.on_watch_slice_done(watch, changes),
+            on_error=self.on_key_watch_error)
+    
+    def on_watch_slice_done(self, watch, changes):
+        """一段监听完成：应用变更，未停止时继续"""
+        if watch is not self.key_watch:
+            return
+        self.watch_task_id = None
+        self.apply_key_changes(changes)
+        if not watch.stopped and self.connection_thread:
+            self.submit_watch_slice()
+    
+    def apply_key_changes(self, changes):
+        """把一段合并后的变更应用到本地索引和列表：删除行、更新类型/TTL、追加符合当前条件的新key"""
+        removed, updated = changes['removed'], changes['updated']
+        self.key_index.remove(removed)
+        self.key_index.add(updated)
+        
+        removed_rows = self.key_model.remove_keys(removed)
+        added = {key: info for key, info in self.key_model.update_keys(updated).items()
+                 if self.key_in_view(key, info)}
+        self.key_model.append_keys(added)
+        if removed_rows:
+            # 前缀树只能整体重建
+            self.namespace_model.invalidate()
+        if self.namespace_checkbox.isChecked():
+            self.namespace_model.sync()
+        
+        text = (f"实时更新：已接收 {changes['received']} 个事件，合并 {changes['coalesced']} 个，"
+                f"本次删除 {removed_rows} 行、新增 {len(added)} 行")
+        if changes['overflow']:
+            text += f"；变更过多，已忽略 {changes['overflow']} 个事件，建议刷新"
+        self.scan_status_label.setToolTip(text)
+        if removed_rows or added:
+            self.scan_status_label.setText(text)
+    
+    def key_in_view(self, key, info):
+        """新出现的key是否符合当前列表的搜索和过滤条件；需要按大小过滤时不加入"""
+        if self.key_query is not None:
+            if not self.key_query.pattern.search(key):
+                return False
+        elif self.view_pattern is None or not self.view_pattern.match(key):
+            return False
+        thread = self.connection_thread
+        scan_filter = thread.scan_filter if thread else None
+        if scan_filter is None:
+            return True
+        return not scan_filter.needs_size() and scan_filter.matches(info)
+    
+    def on_key_watch_error(self, error):
+        """监听失败：停止并提示"""
+        self.watch_task_id = None
+        self.stop_key_watch()
+        self.set_watch_checked(False)
+        self.show_message("错误", f"实时更新失败: {error}", "error")
+    
+    def stop_key_watch(self):
+        """停止监听，提交任务取消订阅"""
+        watch = self.key_watch
+        self.key_watch = None
+        self.cancel_task(self.watch_task_id)
+        self.watch_task_id = None
+        if watch is not None:
+            watch.stopped = True
+            if self.connection_thread:
+                self.submit_task(self.connection_thread.close_key_watch, watch)
+    
+    def reset_key_watch(self):
+        """断开或重新连接时停止监听并取消勾选"""
+        self.stop_key_watch()
+        self.set_watch_checked(False)
+    
+    def set_watch_checked(self, checked):
+        """修改勾选状态而不触发开启/关闭"""
+        self.watch_checkbox.blockSignals(True)
+        self.watch_checkbox.setChecked(checked)
+        self.watch_checkbox.blockSignals(False)
+    
+    def update_search_placeholder(self):
+        """按搜索方式更新输入框提示"""
+        placeholders = {
+            SEARCH_GLOB: "输入key搜索模式...",
+            SEARCH_SUBSTRING: "输入key中包含的文本...",
+            SEARCH_REGEX: "输入正则表达式...",
+            SEARCH_FUZZY: "按顺序输入key中的字符...",
+        }
+        self.search_input.setPlaceholderText(placeholders[self.search_mode_combo.currentData()])
+    
+    def save_key_cache(self):
+        """开启磁盘缓存时保存key元数据缓存"""
+        if self.connection_thread and self.connection_thread.key_cache is not None:
+            self.connection_thread.key_cache.save()
+    
+    def load_more_keys(self):
+        """继续扫描，直到再追加一页key或游标结束"""
+        if not (self.connection_thread and self.scan_has_more):
+            return
+        if self.scan_task_id is not None:
+            return
+        self.scan_task_id = self.submit_task(
+            self.connection_thread.scan_pages, self.KEY_PAGE_SIZE,
+            on_success=self.on_scan_task_done, on_error=self.on_scan_task_error)
+        self.update_scan_controls()
+    
+    def on_scan_task_done(self, loaded):
+        """一页扫描任务结束"""
+        self.scan_task_id = None
+        self.update_scan_controls()
+    
+    def on_scan_task_error(self, error):
+        """扫描任务失败"""
+        self.scan_task_id = None
+        self.scan_status_label.setText(f"加载key失败: {error}")
+        self.update_scan_controls()
+    
+    def stop_scan(self):
+        """取消正在进行的扫描"""
+        self.cancel_task(self.scan_task_id)
+        self.scan_task_id = None
+        self.scan_has_more = False
+        if self.connection_thread:
+            self.connection_thread.cancel_scan()
+        self.update_scan_controls()
+    
+    def open_bulk_dialog(self):
+        """打开批量操作对话框"""
+        if not (self.connection_thread and self.connection_thread.redis_client):
+            self.show_message("警告", "请先连接到Redis", "warning")
+            return
+        if self.search_mode_combo.currentData() != SEARCH_GLOB:
+            self.show_message("警告", "批量操作按Glob模式匹配key，请切换到Glob搜索", "warning")
+            return
+        dialog = BulkOperationDialog(self, self.search_input.text() or "*", self.main_widget)
+        dialog.exec_()
+    
+    def toggle_namespace_view(self, checked):
+        """切换平铺列表/命名空间树，切换到树时补齐尚未建立索引的key"""
+        if checked:
+            self.namespace_model.sync()
+        self.key_view_stack.setCurrentWidget(self.namespace_tree if checked else self.key_tree)
+    
+    def check_namespace_scroll(self, *args):
+        """某个节点已加载的最后一行滚动到可见区域时为该节点加载更多行（视图只会自动加载顶层）"""
+        view = self.namespace_tree
+        top = view.indexAt(view.viewport().rect().topLeft())
+        index = view.indexAt(view.viewport().rect().bottomLeft())
+        while index.isValid():
+            parent = index.parent()
+            if (index.row() == self.namespace_model.rowCount(parent) - 1
+                    and self.namespace_model.canFetchMore(parent)):
+                self.namespace_model.fetchMore(parent)
+                return
+            if index == top:
+                break
+            index = view.indexAbove(index)
+    
+    def update_namespace_delimiter(self):
+        """修改命名空间分隔符"""
+        self.namespace_model.set_delimiter(self.delimiter_input.text())
+    
+    def update_scan_controls(self):
+        """根据扫描状态更新按钮"""
+        scanning = self.scan_task_id is not None
+        has_more = bool(self.connection_thread and self.scan_has_more)
+        self.load_more_btn.setEnabled(has_more and not scanning)
+        self.stop_scan_btn.setEnabled(scanning)
+    
+    def show_key_value(self, index):
+        """显示点击的key的值"""
+        if not index.isValid():
+            return
+        
+        if index.model() is self.namespace_model:
+            entry = self.namespace_model.key_entry(index)
+            if entry is None:
+                # 前缀节点只展开/折叠
+                return
+            key, key_type = entry
+        else:
+            key = self.key_model.key_at(index.row())
+            key_type = self.key_model.type_at(index.row())
+        
+        self.load_value(key, key_type)
+    
+    def load_value(self, key, key_type):
+        """在工作线程中获取值的第一页"""
+        if not (self.connection_thread and self.connection_thread.redis_client):
+            self.show_message("警告", "请先连接到Redis", "warning")
+            return
+        
+        # 新的点击取代尚未返回的取值请求
+        self.cancel_task(self.value_task_id)
+        state = {'key': key, 'type': key_type, 'size': 0, 'loaded': 0, 'cursor': 0,
+                 'reverse': self.stream_reverse_checkbox.isChecked(), 'decoder': '',
+                 'session': DecodeSession(self.decoder_combo.currentData()) if key_type == 'string' else None}
+        self.value_state = state
+        self.value_info_label.setText(f"加载中: {key}")
+        self.value_task_id = self.submit_task(
+            self.connection_thread.get_value, key, key_type, state['reverse'], state['session'],
+            on_success=lambda page: self.on_value_loaded(state, page),
+            on_error=self.on_value_error)
+    
+    def reload_string_value(self):
+        """切换解码方式后重新加载当前字符串"""
+        state = self.value_state
+        if state and state['type'] == 'string':
+            self.load_value(state['key'], state['type'])
+    
+    def reload_stream_value(self):
+        """切换Stream浏览方向后从头重新加载"""
+        state = self.value_state
+        if state and state['type'] == 'stream':
+            self.load_value(state['key'], state['type'])
+    
+    def follow_current_stream(self):
+        """在实时订阅页跟踪当前Stream"""
+        state = self.value_state
+        if not state or state['type'] != 'stream':
+            return
+        self.data_tabs.setCurrentWidget(self.stream_tail_panel)
+        self.stream_tail_panel.follow_stream(state['key'])
+    
+    def load_stream_pending(self, row, column):
+        """点击消费组：加载该组最早的一批待确认消息"""
+        state = self.value_state
+        item = self.stream_group_table.item(row, 0)
+        if not state or state['type'] != 'stream' or item is None:
+            return
+        if not (self.connection_thread and self.connection_thread.redis_client):
+            return
+        self.submit_task(
+            self.connection_thread.get_stream_pending, state['key'], item.text(),
+            on_success=lambda entries: self.show_stream_pending(state, entries),
+            on_error=lambda error: self.show_message("错误", f"获取待确认消息失败: {error}", "error"))
+    
+    def show_stream_pending(self, state, entries):
+        """显示待确认消息"""
+        if state is not self.value_state:
+            return
+        self.stream_pending_table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            values = (entry['message_id'], entry['consumer'],
+                      entry['time_since_delivered'], entry['times_delivered'])
+            for column, value in enumerate(values):
+                self.stream_pending_table.setItem(row, column, QTableWidgetItem(str(value)))
+    
+    def show_stream_groups(self, groups):
+        """显示消费组及其待确认概要"""
+        self.stream_pending_table.setRowCount(0)
+        self.stream_group_table.setRowCount(len(groups))
+        for row, group in enumerate(groups):
+            consumers = ", ".join(f"{name}: {count}" for name, count in group['pending_consumers'])
+            values = (group['name'], group['consumers'], group['pending'], group['last_delivered_id'],
+                      "-" if group['lag'] is None else group['lag'], consumers or "-")
+            for column, value in enumerate(values):
+                self.stream_group_table.setItem(row, column, QTableWidgetItem(str(value)))
+    
+    def load_next_value_page(self):
+        """加载当前值的下一页"""
+        state = self.value_state
+        if not state or not state['cursor'] or self.value_task_id is not None:
+            return
+        if not (self.connection_thread and self.connection_thread.redis_client):
+            return
+        self.value_task_id = self.submit_task(
+            self.connection_thread.get_value_page, state['key'], state['type'], state['cursor'],
+            None, state['reverse'], state['session'],
+            on_success=lambda page: self.on_value_loaded(state, page, append=True),
+            on_error=self.on_value_error)
+    
+    def on_value_loaded(self, state, page, append=False):
+        """取值完成"""
+        self.value_task_id = None
+        if state is not self.value_state:
+            return
+        
+        if 'size' in page:
+            state['size'] = page['size']
+        if not append:
+            state['cached'] = page.get('cached', False)
+        state['cursor'] = page['cursor']
+        state['loaded'] += len(page['items'])
+        state['decoder'] = page.get('decoder', state['decoder'])
+        self.display_value(state['type'], page['items'], append)
+        if 'groups' in page:
+            self.show_stream_groups(page['groups'])
+        self.update_value_info()
+        
+        # 当前页没有填满可视区域时继续加载
+        QTimer.singleShot(0, self.check_value_scroll)
+    
+    def on_value_error(self, error):
+        """取值失败"""
+        self.value_task_id = None
+        self.value_info_label.setText("")
+        self.show_message("错误", f"获取值失败: {error}", "error")
+    
+    def update_value_info(self):
+        """更新值的大小/加载进度提示"""
+        state = self.value_state
+        if not state:
+            self.value_info_label.setText("")
+            return
+        unit = {'string': "字节", 'stream': "条消息"}.get(state['type'], "个元素")
+        text = f"{state['key']}  共 {state['size']} {unit}"
+        if state['decoder']:
+            text += f"  [{state['decoder']}]"
+        if state.get('cached'):
+            text += "（未变化，来自本地缓存）"
+        if state['cursor']:
+            if state['type'] == 'string' and not state.get('cached'):
+                text += f"，已读取 {state['cursor']} 字节（滚动到底部加载更多）"
             else:
-                self.show_message("警告", "请先连接到Redis", "warning")
-        except Exception as e:
-            self.show_message("错误", f"获取值失败: {str(e)}", "error")
+                text += f"，已加载 {state['loaded']}（滚动到底部加载更多）"
+        self.value_info_label.setText(text)
+    
+    def value_scroll_bar(self):
+        """当前值展示控件的垂直滚动条"""
+        widgets = {
+            'string': self.string_text,
+            'list': self.list_table,
+            'set': self.set_table,
+            'zset': self.zset_table,
+            'hash': self.hash_table,
+            'stream': self.stream_table,
+        }
+        widget = widgets.get(self.value_state['type']) if self.value_state else None
+        return widget.verticalScrollBar() if widget else None
+    
+    def check_value_scroll(self, *args):
+        """滚动接近底部时加载下一页"""
+        bar = self.value_scroll_bar()
+        if bar is None:
+            return
+        if bar.maximum() - bar.value() <= bar.pageStep():
+            self.load_next_value_page()
     
-    def display_value(self, key_type, value):
-        """显示值"""
+    def display_value(self, key_type, value, append=False):
+        """显示值，append为True时追加到已显示的数据后面"""
         if key_type == 'string':
             self.value_tabs.setCurrentWidget(self.string_tab)
-            self.string_text.setPlainText(str(value))
-        elif key_type == 'list':
-            self.value_tabs.setCurrentWidget(self.list_tab)
-            self.list_table.setRowCount(len(value))
-            for i, val in enumerate(value):
-                self.list_table.setItem(i, 0, QTableWidgetItem(str(i)))
-                self.list_table.setItem(i, 1, QTableWidgetItem(str(val)))
-        elif key_type == 'set':
-            self.value_tabs.setCurrentWidget(self.set_tab)
-            self.set_table.setRowCount(len(value))
-            for i, val in enumerate(value):
-                self.set_table.setItem(i, 0, QTableWidgetItem(str(val)))
-        elif key_type == 'zset':
-            self.value_tabs.setCurrentWidget(self.zset_tab)
-            self.zset_table.setRowCount(len(value))
-            for i, (val, score) in enumerate(value):
-                self.zset_table.setItem(i, 0, QTableWidgetItem(str(val)))
-                self.zset_table.setItem(i, 1, QTableWidgetItem(str(score)))
-        elif key_type == 'hash':
-            self.value_tabs.setCurrentWidget(self.hash_tab)
-            self.hash_table.setRowCount(len(value))
-            for i, (field, val) in enumerate(value.items()):
-                self.hash_table.setItem(i, 0, QTableWidgetItem(str(field)))
-                self.hash_table.setItem(i, 1, QTableWidgetItem(str(val)))
+            if append:
+                cursor = self.string_text.textCursor()
+                cursor.movePosition(cursor.End)
+                cursor.insertText(str(value))
+            else:
+                self.string_text.setPlainText(str(value))
+            return
+        
+        tables = {
+            'list': (self.list_tab, self.list_table),
+            'set': (self.set_tab, self.set_table),
+            'zset': (self.zset_tab, self.zset_table),
+            'hash': (self.hash_tab, self.hash_table),
+            'stream': (self.stream_tab, self.stream_table),
+        }
+        if key_type not in tables:
+            return
+        tab, table = tables[key_type]
+        self.value_tabs.setCurrentWidget(tab)
+        start = table.rowCount() if append else 0
+        table.setRowCount(start + len(value))
+        for i, val in enumerate(value, start):
+            if key_type == 'list':
+                table.setItem(i, 0, QTableWidgetItem(str(i)))
+                table.setItem(i, 1, QTableWidgetItem(str(val)))
+            elif key_type == 'set':
+                table.setItem(i, 0, QTableWidgetItem(str(val)))
+            elif key_type == 'stream':
+                # (消息ID, 字段字典)
+                table.setItem(i, 0, QTableWidgetItem(str(val[0])))
+                table.setItem(i, 1, QTableWidgetItem(format_fields(val[1])))
+            else:
+                # 有序集合为(成员, 分数)，哈希为(字段, 值)
+                table.setItem(i, 0, QTableWidgetItem(str(val[0])))
+                table.setItem(i, 1, QTableWidgetItem(str(val[1])))
     
     def copy_key(self, key):
         """复制key到剪贴板"""
@@ -899,12 +3000,12 @@ class RedisTool(BaseTool):
                     display_name = name
                 self.session_combo.addItem(display_name, session)
                 print(f"添加会话: {name}")
-                
+            
             if sessions:
                 # 自动选择第一个会话
                 self.session_combo.setCurrentIndex(1)
                 self.load_session_config(self.session_combo.currentText())
-                
+        
         except Exception as e:
             print(f"加载会话失败: {e}")
             self.session_combo.addItem("新建会话", None)
@@ -913,7 +3014,7 @@ class RedisTool(BaseTool):
         """加载会话配置"""
         if session_name == "新建会话" or session_name is None:
             return
-            
+        
         session_data = self.session_combo.currentData()
         if session_data:
             self.host_input.setText(session_data.get('host', 'localhost'))
@@ -921,6 +3022,8 @@ class RedisTool(BaseTool):
             self.password_input.setText(session_data.get('password', ''))
             self.db_input.setValue(session_data.get('db', 0))
             self.cluster_checkbox.setChecked(session_data.get('cluster_mode', False))
+            self.disk_cache_checkbox.setChecked(session_data.get('cache_to_disk', False))
+            self.async_checkbox.setChecked(session_data.get('backend') == 'async')
     
     def save_current_session(self):
         """保存当前会话"""
@@ -930,7 +3033,7 @@ class RedisTool(BaseTool):
             # 限制会话名称长度
             if len(session_name) > 30:
                 session_name = session_name[:27] + "..."
-                
+            
             session_config = {
                 'name': session_name,
                 'host': self.host_input.text(),
@@ -938,6 +3041,8 @@ class RedisTool(BaseTool):
                 'password': self.password_input.text(),
                 'db': self.db_input.value(),
                 'cluster_mode': self.cluster_checkbox.isChecked(),
+                'cache_to_disk': self.disk_cache_checkbox.isChecked(),
+                'backend': 'async' if self.async_checkbox.isChecked() else 'sync',
                 'timestamp': str(int(__import__('time').time()))
             }
             
@@ -978,7 +3083,7 @@ class RedisTool(BaseTool):
                 self.session_combo.setCurrentIndex(index)
             
             self.show_message("成功", "会话已保存")
-            
+        
         except Exception as e:
             self.show_message("错误", f"保存会话失败: {str(e)}", "error")
     
@@ -1030,7 +3135,7 @@ class RedisTool(BaseTool):
             self.session_combo.setCurrentIndex(0)  # 选择"新建会话"
             
             self.show_message("成功", "会话已删除")
-            
+        
         except Exception as e:
             self.show_message("错误", f"删除会话失败: {str(e)}", "error")
     
@@ -1064,7 +3169,7 @@ class RedisTool(BaseTool):
                     rc.close()
                 except Exception as e:
                     test_result.append(f"❌ 集群连接失败: {str(e)}")
-                    
+                
                 # 测试单机模式（作为对比）
                 try:
                     r = redis.Redis(host=host, port=port, password=password, decode_responses=True)
@@ -1091,22 +3196,25 @@ class RedisTool(BaseTool):
             # 显示测试结果
             result_text = "\n".join(test_result)
             QMessageBox.information(self.main_widget, "连接测试结果", result_text)
-            
+        
         except Exception as e:
             QMessageBox.critical(self.main_widget, "测试错误", f"测试失败: {str(e)}")
     
     def cleanup(self):
         """清理资源"""
         try:
-            if self.redis_client:
-                try:
-                    self.redis_client.close()
-                except:
-                    pass
+            self.save_key_cache()
+            self.metrics_panel.stop_monitor()
+            self.stream_tail_panel.frame_timer.stop()
+            self.compare_panel.reset()
+            if self.key_watch is not None:
+                # 订阅由工作线程退出时关闭
+                self.key_watch.stopped = True
+            self.redis_client = None
             
-            if self.connection_thread and self.connection_thread.isRunning():
-                self.connection_thread.quit()
-                self.connection_thread.wait(1000)
-                
+            if self.connection_thread:
+                self.connection_thread.retire()
+                self.connection_thread = None
+        
         except Exception as e:
             print(f"清理资源时出错: {e}")
\ No newline at end of file
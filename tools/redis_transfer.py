@@ -0,0 +1,727 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis批量导入导出
+按模式流式导出key到JSONL文件（DUMP二进制或可读值），再用RESTORE/写命令导入，
+进度保存在旁边的.progress文件中，中断后可以从断点继续
+"""
+
+import base64
+import json
+import os
+from .redis_compare import is_large_value, queue_value_command
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QLineEdit, QComboBox, QCheckBox, QProgressBar, QFileDialog,
+                             QMessageBox)
+
+
+FORMAT_DUMP = 'dump'
+FORMAT_JSONL = 'jsonl'
+# 可读格式中含有非UTF-8字节的值整体用base64表示，条目带"encoding": "base64"
+ENCODING_BASE64 = 'base64'
+
+
+def progress_path(path):
+    """断点文件路径"""
+    return path + '.progress'
+
+
+def load_progress(path, mode):
+    """读取断点，不存在或不是同一种任务时返回None"""
+    try:
+        with open(progress_path(path), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('mode') == mode else None
+
+
+def save_progress(path, state):
+    """原子地写入断点"""
+    tmp_path = progress_path(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, progress_path(path))
+
+
+def clear_progress(path):
+    """删除断点文件"""
+    try:
+        os.remove(progress_path(path))
+    except OSError:
+        pass
+
+
+def zset_pairs(value):
+    """有序集合的(成员, 分数)对，兼容扁平的WITHSCORES回复"""
+    if value and isinstance(value[0], (list, tuple)):
+        return value
+    return list(zip(value[0::2], value[1::2]))
+
+
+def encode_value(key_type, value):
+    """把未解码的值转换为JSON可以表示的形式，返回(值, 编码)
+    
+    全部是UTF-8时直接写文本，编码为None；否则所有部分都用base64，编码为ENCODING_BASE64
+    """
+    def convert(text):
+        if key_type == 'string':
+            return text(value)
+        if key_type == 'list':
+            return [text(item) for item in value]
+        if key_type == 'set':
+            return [text(item) for item in sorted(value)]
+        if key_type == 'zset':
+            return [[text(member), float(score)] for member, score in zset_pairs(value)]
+        return {text(field): text(item) for field, item in value.items()}
+    
+    try:
+        return convert(lambda data: data.decode('utf-8')), None
+    except UnicodeDecodeError:
+        return convert(lambda data: base64.b64encode(data).decode('ascii')), ENCODING_BASE64
+
+
+def decode_value(key_type, value, encoding):
+    """encode_value的逆过程，base64编码的值还原为字节"""
+    if encoding is None:
+        return value
+    if encoding != ENCODING_BASE64:
+        raise ValueError(f"未知的值编码: {encoding}")
+    
+    def data(text):
+        return base64.b64decode(text, validate=True)
+    
+    if key_type == 'string':
+        return data(value)
+    if key_type in ('list', 'set'):
+        return [data(item) for item in value]
+    if key_type == 'zset':
+        return [[data(member), score] for member, score in value]
+    if key_type == 'hash':
+        return {data(field): data(item) for field, item in value.items()}
+    return value
+
+
+class ExportJob:
+    """导出任务状态
+    
+    每个节点维护独立游标，每个工作线程任务推进一页：读取该页key，写入文件后记录游标和文件长度。
+    文件中每行是一个key：{"key", "pttl", "dump"}（DUMP载荷的base64）或
+    {"key", "pttl", "type", "value"}（可读值，非UTF-8时带"encoding"）。
+    可读格式的大值分块读取，第一块写成完整条目，之后每块一行{"key", "type", "value", "append": true}，
+    内存占用只与一页或一块的大小有关。
+    """
+    
+    def __init__(self, path, pattern, cursors, fmt=FORMAT_DUMP):
+        self.path = path
+        self.pattern = pattern
+        self.format = fmt
+        # 节点名 -> 游标（单机模式节点名为None）
+        self.cursors = cursors
+        self.scanned = 0
+        self.exported = 0
+        self.skipped = 0
+        # 上次保存断点时的文件长度，继续导出时截断到这里
+        self.offset = 0
+        self.stopped = False
+    
+    @classmethod
+    def resume(cls, path):
+        """从断点恢复导出，没有断点时返回None"""
+        state = load_progress(path, 'export')
+        if state is None:
+            return None
+        cursors = {name or None: cursor for name, cursor in state['cursors'].items()}
+        job = cls(path, state['pattern'], cursors, state['format'])
+        job.scanned = state['scanned']
+        job.exported = state['exported']
+        job.skipped = state['skipped']
+        job.offset = state['offset']
+        # 丢弃上次断点之后写入的不完整内容
+        with open(path, 'ab') as f:
+            f.truncate(job.offset)
+        return job
+    
+    def start(self):
+        """新建导出文件"""
+        open(self.path, 'w', encoding='utf-8').close()
+        self.save()
+    
+    def save(self):
+        """保存断点"""
+        save_progress(self.path, {
+            'mode': 'export',
+            'pattern': self.pattern,
+            'format': self.format,
+            'cursors': {name or '': cursor for name, cursor in self.cursors.items()},
+            'scanned': self.scanned,
+            'exported': self.exported,
+            'skipped': self.skipped,
+            'offset': self.offset,
+        })
+    
+    def has_more(self):
+        """是否还有未扫描完的节点"""
+        return bool(self.cursors) and not self.stopped
+    
+    def needs_values(self):
+        """可读格式需要第二次往返按类型读取值"""
+        return self.format == FORMAT_JSONL
+    
+    def queue_entry_commands(self, pipe, batch):
+        """第一次往返：PTTL以及DUMP（二进制格式）或TYPE（可读格式）"""
+        for key in batch:
+            pipe.pttl(key)
+            if self.format == FORMAT_DUMP:
+                pipe.dump(key)
+            else:
+                pipe.type(key)
+    
+    def parse_entry_replies(self, batch, replies):
+        """解析第一次往返的结果，扫描后已删除的key跳过"""
+        entries = []
+        for i, key in enumerate(batch):
+            pttl = replies[2 * i]
+            data = replies[2 * i + 1]
+            if isinstance(pttl, Exception) or isinstance(data, Exception):
+                self.skipped += 1
+                continue
+            if pttl == -2 or data is None or data == 'none':
+                self.skipped += 1
+                continue
+            entry = {'key': key, 'pttl': max(pttl, 0)}
+            if self.format == FORMAT_DUMP:
+                entry['dump'] = base64.b64encode(data).decode('ascii')
+            else:
+                entry['type'] = data
+            entries.append(entry)
+        return entries
+    
+    # 可读格式支持的类型及探测大小的命令，其他类型（如stream）只能用DUMP格式导出
+    VALUE_SIZE_COMMANDS = {
+        'string': 'strlen',
+        'list': 'llen',
+        'set': 'scard',
+        'zset': 'zcard',
+        'hash': 'hlen',
+    }
+    
+    def queue_size_commands(self, pipe, entries):
+        """第二次往返：探测值的大小，决定完整读取还是分块读取"""
+        for entry in entries:
+            command = self.VALUE_SIZE_COMMANDS.get(entry['type'])
+            if command is not None:
+                getattr(pipe, command)(entry['key'])
+    
+    def split_large(self, entries, replies):
+        """按大小分开，返回(完整读取的条目, [(分块读取的条目, 大小)])"""
+        replies = iter(replies)
+        small, large = [], []
+        for entry in entries:
+            if entry['type'] not in self.VALUE_SIZE_COMMANDS:
+                self.skipped += 1
+                continue
+            size = next(replies)
+            if isinstance(size, Exception):
+                self.skipped += 1
+            elif is_large_value(entry['type'], size):
+                large.append((entry, size))
+            else:
+                small.append(entry)
+        return small, large
+    
+    def queue_value_commands(self, pipe, entries):
+        """第三次往返：按类型读取完整值，返回值不解码"""
+        for entry in entries:
+            queue_value_command(pipe, entry['key'], entry['type'])
+    
+    def parse_value_replies(self, entries, replies):
+        """把值写入条目，返回可以导出的条目；单个key读取或转换失败时只跳过这个key"""
+        exported = []
+        for entry, value in zip(entries, replies):
+            if isinstance(value, Exception) or value is None:
+                self.skipped += 1
+                continue
+            try:
+                entry['value'], encoding = encode_value(entry['type'], value)
+            except (TypeError, ValueError, AttributeError) as e:
+                print(f"无法导出 {entry['key']}: {e}")
+                self.skipped += 1
+                continue
+            if encoding is not None:
+                entry['encoding'] = encoding
+            exported.append(entry)
+        return exported
+    
+    def write_lines(self, lines):
+        """追加写入若干行"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+    
+    def write_entries(self, entries):
+        """追加写入一批条目"""
+        if not entries:
+            return
+        self.write_lines(entries)
+        self.exported += len(entries)
+    
+    def write_chunk(self, entry, chunk, first):
+        """写入分块读取的大值的一块，first为True时写成完整条目，否则写成追加行"""
+        value, encoding = encode_value(entry['type'], chunk)
+        if first:
+            line = dict(entry, value=value)
+        else:
+            line = {'key': entry['key'], 'type': entry['type'], 'value': value, 'append': True}
+        if encoding is not None:
+            line['encoding'] = encoding
+        self.write_lines([line])
+    
+    def file_size(self):
+        """当前文件长度，分块写入失败时截断到这里"""
+        return os.path.getsize(self.path)
+    
+    def finish_large(self, written, error_offset=None):
+        """一个大值分块写完；error_offset不为None时读取失败，丢弃已写入的部分并跳过这个key"""
+        if error_offset is not None:
+            with open(self.path, 'ab') as f:
+                f.truncate(error_offset)
+            self.skipped += 1
+        elif written:
+            self.exported += 1
+        else:
+            # 扫描后已删除或已清空
+            self.skipped += 1
+    
+    def advance(self, node_name, cursor, scanned):
+        """一个节点的一页已写入文件：推进游标并保存断点"""
+        self.scanned += scanned
+        if cursor == 0:
+            self.cursors.pop(node_name, None)
+        else:
+            self.cursors[node_name] = cursor
+        self.offset = os.path.getsize(self.path)
+        if self.cursors:
+            self.save()
+        else:
+            clear_progress(self.path)
+    
+    def progress(self):
+        """进度快照"""
+        return {
+            'scanned': self.scanned,
+            'done': self.exported,
+            'skipped': self.skipped,
+            'finished': not self.cursors,
+        }
+
+
+class ImportJob:
+    """导入任务状态
+    
+    每个工作线程任务从断点偏移处读取一批行，写入后才推进偏移，
+    中断后重新开始只会重放最后一批（覆盖模式下结果相同）。
+    """
+    
+    # 每批读取的行数和字节数上限，分块导出的大值每行可能有1MB以上
+    BATCH_SIZE = 500
+    BATCH_BYTES = 8 * 1024 * 1024
+    
+    def __init__(self, path, replace=False):
+        self.path = path
+        self.replace = replace
+        self.offset = 0
+        self.next_offset = 0
+        self.total_bytes = os.path.getsize(path)
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        # 不覆盖时因已存在而跳过的key，紧随其后的追加行一起跳过
+        self.skipping_key = None
+        self.stopped = False
+    
+    @classmethod
+    def resume(cls, path):
+        """从断点恢复导入，没有断点时返回None"""
+        state = load_progress(path, 'import')
+        if state is None:
+            return None
+        job = cls(path, state['replace'])
+        job.offset = job.next_offset = state['offset']
+        job.imported = state['imported']
+        job.skipped = state['skipped']
+        job.failed = state['failed']
+        job.skipping_key = state.get('skipping_key')
+        return job
+    
+    def save(self):
+        """保存断点"""
+        save_progress(self.path, {
+            'mode': 'import',
+            'replace': self.replace,
+            'offset': self.offset,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'skipping_key': self.skipping_key,
+        })
+    
+    def has_more(self):
+        """文件是否还有未导入的内容"""
+        return self.offset < self.total_bytes and not self.stopped
+    
+    def read_entries(self):
+        """从当前偏移读取一批条目"""
+        entries = []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while len(entries) < self.BATCH_SIZE and f.tell() - self.offset < self.BATCH_BYTES:
+                line = f.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    if 'key' not in entry or ('dump' not in entry and 'value' not in entry):
+                        raise ValueError("缺少key或值")
+                    if 'value' in entry:
+                        entry['value'] = decode_value(entry.get('type'), entry['value'], entry.get('encoding'))
+                except (ValueError, TypeError, AttributeError):
+                    self.failed += 1
+                    continue
+                entries.append(entry)
+            self.next_offset = f.tell()
+        return entries
+    
+    def queue_exists_commands(self, pipe, entries):
+        """不覆盖时先检查key是否已存在，追加行不检查"""
+        for entry in entries:
+            if not entry.get('append'):
+                pipe.exists(entry['key'])
+    
+    def filter_existing(self, entries, replies):
+        """跳过已存在的key，以及紧随其后属于同一个key的追加行"""
+        replies = iter(replies)
+        remaining = []
+        for entry in entries:
+            if entry.get('append'):
+                if entry['key'] != self.skipping_key:
+                    remaining.append(entry)
+                continue
+            exists = next(replies)
+            if isinstance(exists, Exception) or not exists:
+                self.skipping_key = None
+                remaining.append(entry)
+            else:
+                self.skipping_key = entry['key']
+                self.skipped += 1
+        return remaining
+    
+    # 可读格式各类型写入完整值的命令
+    VALUE_WRITERS = {
+        'string': lambda pipe, key, value: pipe.set(key, value),
+        'list': lambda pipe, key, value: pipe.rpush(key, *value),
+        'set': lambda pipe, key, value: pipe.sadd(key, *value),
+        'zset': lambda pipe, key, value: pipe.zadd(key, {member: score for member, score in value}),
+        'hash': lambda pipe, key, value: pipe.hset(key, mapping=value),
+    }
+    # 分块导出的追加行：写入同一个key，不删除旧值也不改变过期时间
+    VALUE_APPENDERS = dict(VALUE_WRITERS, string=lambda pipe, key, value: pipe.append(key, value))
+    
+    def queue_write_commands(self, pipe, entries):
+        """写入命令：DUMP条目用RESTORE，可读条目先删除旧值、按类型写入再设置过期时间，追加行只写入
+        
+        返回每个条目占用的命令数，用于对应pipeline结果；0表示无法导入
+        """
+        counts = []
+        for entry in entries:
+            key = entry['key']
+            pttl = entry.get('pttl', 0)
+            if 'dump' in entry:
+                pipe.restore(key, pttl, base64.b64decode(entry['dump']), replace=self.replace)
+                counts.append(1)
+                continue
+            
+            if entry.get('append'):
+                appender = self.VALUE_APPENDERS.get(entry.get('type'))
+                if appender is None or not entry['value']:
+                    counts.append(0)
+                    continue
+                appender(pipe, key, entry['value'])
+                counts.append(1)
+                continue
+            
+            writer = self.VALUE_WRITERS.get(entry.get('type'))
+            if writer is None or (entry['type'] != 'string' and not entry['value']):
+                counts.append(0)
+                continue
+            pipe.delete(key)
+            writer(pipe, key, entry['value'])
+            commands = 2
+            if pttl > 0:
+                pipe.pexpire(key, pttl)
+                commands += 1
+            counts.append(commands)
+        return counts
+    
+    def record_replies(self, entries, counts, replies):
+        """统计写入结果，追加行属于前面已统计的key，只记录失败"""
+        position = 0
+        for entry, count in zip(entries, counts):
+            results = replies[position:position + count]
+            position += count
+            if entry.get('append'):
+                if any(isinstance(result, Exception) for result in results):
+                    self.failed += 1
+                continue
+            if count == 0:
+                self.skipped += 1
+            elif any(isinstance(result, Exception) for result in results):
+                if any('BUSYKEY' in str(result) for result in results):
+                    self.skipped += 1
+                else:
+                    self.failed += 1
+            else:
+                self.imported += 1
+    
+    def commit(self):
+        """当前批次已写入：推进偏移并保存断点"""
+        self.offset = self.next_offset
+        if self.offset < self.total_bytes:
+            self.save()
+        else:
+            clear_progress(self.path)
+    
+    def progress(self):
+        """进度快照"""
+        return {
+            'done': self.imported,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'offset': self.offset,
+            'total_bytes': self.total_bytes,
+            'finished': self.offset >= self.total_bytes,
+        }
+
+
+class TransferPanel(QWidget):
+    """导入导出页面
+    
+    通过RedisTool的任务队列逐批提交导入/导出任务，每批返回后更新进度。
+    """
+    
+    FORMATS = [
+        ("DUMP/RESTORE（二进制，保留全部类型）", FORMAT_DUMP),
+        ("JSONL（可读值）", FORMAT_JSONL),
+    ]
+    
+    def __init__(self, tool, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.job = None
+        self.task_id = None
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 10, 0, 0)
+        
+        options_layout = QHBoxLayout()
+        pattern_label = QLabel("模式:")
+        pattern_label.setStyleSheet("font-weight: bold;")
+        self.pattern_input = QLineEdit("*")
+        self.pattern_input.setFixedWidth(160)
+        format_label = QLabel("格式:")
+        format_label.setStyleSheet("font-weight: bold;")
+        self.format_combo = QComboBox()
+        for text, fmt in self.FORMATS:
+            self.format_combo.addItem(text, fmt)
+        self.replace_checkbox = QCheckBox("导入时覆盖已存在的key")
+        
+        self.export_btn = self.create_button("📤 导出", "#007bff", "#0056b3")
+        self.export_btn.clicked.connect(self.start_export)
+        self.import_btn = self.create_button("📥 导入", "#28a745", "#218838")
+        self.import_btn.clicked.connect(self.start_import)
+        self.stop_btn = self.create_button("⏹ 停止", "#6c757d", "#5a6268")
+        self.stop_btn.clicked.connect(self.stop_transfer)
+        self.stop_btn.setEnabled(False)
+        
+        options_layout.addWidget(pattern_label)
+        options_layout.addWidget(self.pattern_input)
+        options_layout.addWidget(format_label)
+        options_layout.addWidget(self.format_combo)
+        options_layout.addWidget(self.replace_checkbox)
+        options_layout.addWidget(self.export_btn)
+        options_layout.addWidget(self.import_btn)
+        options_layout.addWidget(self.stop_btn)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.status_label = QLabel("导出文件格式为JSONL，每行一个key；中断后再次选择同一文件可从断点继续")
+        self.status_label.setStyleSheet("color: #6c757d;")
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addStretch()
+    
+    def create_button(self, text, color, hover_color):
+        """创建操作按钮"""
+        button = QPushButton(text)
+        button.setFixedWidth(80)
+        button.setStyleSheet(f"""
+            QPushButton {{
+                font-weight: bold;
+                background-color: {color};
+                color: white;
+                border: none;
+                padding: 6px 12px;
+                border-radius: 4px;
+            }}
+            QPushButton:hover {{
+                background-color: {hover_color};
+            }}
+            QPushButton:disabled {{
+                background-color: #adb5bd;
+            }}
+        """)
+        return button
+    
+    def ask_resume(self, message):
+        """询问是否从断点继续"""
+        reply = QMessageBox.question(self, "继续", message,
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        return reply == QMessageBox.Yes
+    
+    def check_connection(self):
+        """检查是否已连接"""
+        thread = self.tool.connection_thread
+        if not (thread and thread.redis_client):
+            self.tool.show_message("警告", "请先连接到Redis", "warning")
+            return None
+        return thread
+    
+    def start_export(self):
+        """选择文件并开始（或继续）导出"""
+        thread = self.check_connection()
+        if thread is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出到", "redis_export.jsonl",
+                                              "JSONL (*.jsonl);;所有文件 (*)")
+        if not path:
+            return
+        
+        try:
+            job = None
+            if load_progress(path, 'export') and self.ask_resume("该文件有未完成的导出，是否从断点继续？"):
+                job = thread.resume_export_job(path)
+            if job is None:
+                job = thread.create_export_job(path, self.pattern_input.text() or "*",
+                                               self.format_combo.currentData())
+                job.start()
+        except Exception as e:
+            self.tool.show_message("错误", f"无法开始导出: {e}", "error")
+            return
+        
+        self.progress_bar.setRange(0, 0)
+        self.run_job(job, thread.export_page)
+    
+    def start_import(self):
+        """选择文件并开始（或继续）导入"""
+        thread = self.check_connection()
+        if thread is None:
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "导入文件", "",
+                                              "JSONL (*.jsonl);;所有文件 (*)")
+        if not path:
+            return
+        
+        try:
+            job = None
+            if load_progress(path, 'import') and self.ask_resume("该文件有未完成的导入，是否从断点继续？"):
+                job = ImportJob.resume(path)
+            if job is None:
+                job = ImportJob(path, self.replace_checkbox.isChecked())
+        except Exception as e:
+            self.tool.show_message("错误", f"无法开始导入: {e}", "error")
+            return
+        
+        self.progress_bar.setRange(0, 100)
+        self.run_job(job, thread.import_page)
+    
+    def run_job(self, job, page_func):
+        """开始逐批执行任务"""
+        self.stop_transfer()
+        self.job = job
+        self.status_label.setText("处理中...")
+        self.submit_next_page(page_func)
+    
+    def submit_next_page(self, page_func):
+        """提交下一批任务"""
+        job = self.job
+        self.task_id = self.tool.submit_task(
+            page_func, job,
+            on_success=lambda progress: self.on_page_done(job, page_func, progress),
+            on_error=self.on_transfer_error)
+        self.update_controls()
+    
+    def on_page_done(self, job, page_func, progress):
+        """一批完成：更新进度，未结束时继续"""
+        if job is not self.job:
+            return
+        self.task_id = None
+        self.show_progress(progress)
+        if job.has_more() and self.tool.connection_thread:
+            self.submit_next_page(page_func)
+        else:
+            self.update_controls()
+    
+    def show_progress(self, progress):
+        """显示进度"""
+        if isinstance(self.job, ExportJob):
+            text = f"已扫描 {progress['scanned']} 个key，导出 {progress['done']} 个"
+        else:
+            text = f"已导入 {progress['done']} 个key，失败 {progress['failed']} 个"
+            if progress['total_bytes']:
+                self.progress_bar.setValue(int(progress['offset'] * 100 / progress['total_bytes']))
+        if progress['skipped']:
+            text += f"，跳过 {progress['skipped']} 个"
+        if progress['finished']:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(100)
+            text = "完成：" + text
+        elif self.job.stopped:
+            text = "已停止（可从断点继续）：" + text
+        self.status_label.setText(text)
+    
+    def on_transfer_error(self, error):
+        """任务失败，断点保留"""
+        self.task_id = None
+        self.progress_bar.setRange(0, 100)
+        self.status_label.setText(f"失败（可从断点继续）: {error}")
+        self.update_controls()
+    
+    def stop_transfer(self):
+        """停止当前任务，断点保留"""
+        if self.job is not None and self.task_id is not None:
+            self.job.stopped = True
+            self.status_label.setText("已停止（可从断点继续）")
+            self.progress_bar.setRange(0, 100)
+        self.tool.cancel_task(self.task_id)
+        self.task_id = None
+        self.update_controls()
+    
+    def reset(self):
+        """断开连接时停止任务"""
+        self.stop_transfer()
+        self.job = None
+    
+    def update_controls(self):
+        """根据任务状态更新按钮"""
+        running = self.task_id is not None
+        self.export_btn.setEnabled(not running)
+        self.import_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
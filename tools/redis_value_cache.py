@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis值缓存
+按key缓存已经取回的值（已加载的各页），再次查看大值前先取服务端摘要：
+优先DEBUG DIGEST-VALUE，不可用时（包括集群）对不太大的值用Lua脚本计算SHA1，摘要不变时直接返回本地缓存。
+摘要总是在读取值之前获取，读取期间发生的修改会在下次探测时发现
+"""
+
+import threading
+from collections import OrderedDict
+
+
+# 摘要方式：未探测时为None，两种方式都不可用时不再缓存
+DIGEST_DEBUG = 'debug'
+DIGEST_LUA = 'lua'
+DIGEST_OFF = 'off'
+
+# 可缓存的类型；Stream的消费组状态随时变化，每次都重新读取
+CACHED_TYPES = frozenset(('string', 'list', 'set', 'zset', 'hash'))
+# 元素个数（字符串为字节数）达到该值才缓存，小值直接读取比探测摘要更快
+VALUE_CACHE_MIN_SIZE = 1000
+# 缓存容量，按元素个数计，字符串每STRING_CHARS_PER_ITEM个字符计为一个元素
+VALUE_CACHE_CAPACITY = 1000000
+STRING_CHARS_PER_ITEM = 64
+# Lua脚本要在服务端读出整个值、排序后计算摘要，期间阻塞Redis；
+# 超过该大小（字符串按字节）时不用脚本探测，这样的值不走缓存，每次直接分页读取
+LUA_DIGEST_MAX_SIZE = 10000
+LUA_DIGEST_MAX_BYTES = 1024 * 1024
+
+# 按类型读取整个值并计算SHA1，哈希字段和集合成员排序后计算，key不存在时返回false
+VALUE_DIGEST_SCRIPT = """
+local key = KEYS[1]
+local key_type = redis.call('TYPE', key)['ok']
+local parts
+if key_type == 'string' then
+    return redis.sha1hex(redis.call('GET', key))
+elseif key_type == 'list' then
+    parts = redis.call('LRANGE', key, 0, -1)
+elseif key_type == 'set' then
+    parts = redis.call('SMEMBERS', key)
+    table.sort(parts)
+elseif key_type == 'zset' then
+    parts = redis.call('ZRANGE', key, 0, -1, 'WITHSCORES')
+elseif key_type == 'hash' then
+    local flat = redis.call('HGETALL', key)
+    local fields, values = {}, {}
+    for i = 1, #flat, 2 do
+        fields[#fields + 1] = flat[i]
+        values[flat[i]] = flat[i + 1]
+    end
+    table.sort(fields)
+    parts = {}
+    for _, field in ipairs(fields) do
+        parts[#parts + 1] = field
+        parts[#parts + 1] = values[field]
+    end
+else
+    return false
+end
+local buffer = {}
+for i, part in ipairs(parts) do
+    buffer[i] = #part .. ':' .. part
+end
+return redis.sha1hex(table.concat(buffer))
+"""
+
+
+def parse_digest_reply(reply):
+    """DEBUG DIGEST-VALUE返回每个key一个摘要的列表，Lua脚本直接返回摘要"""
+    if isinstance(reply, list):
+        reply = reply[0] if reply else None
+    if isinstance(reply, bytes):
+        reply = reply.decode('ascii')
+    return reply or None
+
+
+class CacheCursor:
+    """缓存命中后继续读取已缓存各页的游标，持有缓存项本身，期间被淘汰也不影响翻页"""
+    
+    def __init__(self, entry, index):
+        self.entry = entry
+        self.index = index
+
+
+def lua_digest_allowed(key_type, size):
+    """该值是否小到可以用Lua脚本计算摘要，大小未知时不允许"""
+    if size is None:
+        return False
+    return size <= (LUA_DIGEST_MAX_BYTES if key_type == 'string' else LUA_DIGEST_MAX_SIZE)
+
+
+def item_weight(key_type, items):
+    """一页数据占用的容量"""
+    if key_type == 'string':
+        return len(items) // STRING_CHARS_PER_ITEM + 1
+    return len(items)
+
+
+class ValueCache:
+    """已取回的值：key -> {类型, 读取参数, 摘要, 大小, 各页数据, 下一页游标}，按容量LRU淘汰
+    
+    只缓存第一页开始连续读取的数据；字符串的增量解码状态无法复用，只有完整读取后才会命中。
+    """
+    
+    def __init__(self, capacity=VALUE_CACHE_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def accepts(key_type, size):
+        """该值是否值得缓存"""
+        return key_type in CACHED_TYPES and size >= VALUE_CACHE_MIN_SIZE
+    
+    def get(self, key, key_type, params):
+        """查找可以直接返回的缓存，params为影响读取结果的参数（方向、强制解码器）"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry['type'] != key_type or entry['params'] != params:
+                return None
+            if key_type == 'string' and entry['cursor']:
+                return None
+            self.entries.move_to_end(key)
+            return entry
+    
+    def put(self, key, key_type, params, digest, size, page):
+        """以读取前取得的摘要缓存第一页"""
+        entry = {'type': key_type, 'params': params, 'digest': digest, 'size': size,
+                 'pages': [], 'weight': 0, 'cursor': 0, 'decoder': ''}
+        with self.lock:
+            self.discard(key)
+            self.entries[key] = entry
+            self.append(key, entry, page)
+    
+    def extend(self, key, key_type, params, cursor, page):
+        """追加从cursor开始读取的下一页，与缓存末尾衔接时才追加"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if (entry is None or entry['type'] != key_type or entry['params'] != params
+                    or not entry['cursor'] or entry['cursor'] != cursor):
+                return
+            self.append(key, entry, page)
+    
+    def append(self, key, entry, page):
+        """写入一页并按容量淘汰，单个值超过容量的一半时不再缓存"""
+        weight = item_weight(entry['type'], page['items'])
+        if (entry['weight'] + weight) * 2 > self.capacity:
+            self.discard(key)
+            return
+        entry['pages'].append(page['items'])
+        entry['weight'] += weight
+        entry['cursor'] = page['cursor']
+        entry['decoder'] = page.get('decoder', entry['decoder'])
+        self.size += weight
+        while self.size > self.capacity:
+            evicted_key = next(iter(self.entries))
+            self.discard(evicted_key)
+    
+    def discard(self, key):
+        """删除一个key的缓存"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry['weight']
+    
+    def page(self, entry, index=0):
+        """缓存中的第index页，与从服务端读取时一样逐页返回；缓存的页读完后接着用服务端游标"""
+        with self.lock:
+            items = entry['pages'][index]
+            more = index + 1 < len(entry['pages'])
+            cursor = CacheCursor(entry, index + 1) if more else entry['cursor']
+        return {'items': items, 'cursor': cursor, 'decoder': entry['decoder'],
+                'size': entry['size'], 'cached': True}